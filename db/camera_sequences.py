@@ -0,0 +1,207 @@
+# db/camera_sequences.py
+"""
+Camera filename sequences.
+
+Cameras name files <prefix><zero-padded counter> (IMG_0042.HEIC, DSC00042.JPG) and wrap the
+counter after the last number (IMG_9999 -> IMG_0001). camera_sequences (migration 052) stores
+the parsed prefix and number of every such asset, so continuity checks can list the exact
+missing numbers of a month from one sorted index range and find the neighbouring files of
+earlier and later months with index seeks, instead of parsing MIN/MAX filenames.
+Assets flagged ignore_continuity_check (copied by the sync, kept current by a trigger on
+assets, migration 057) are left out of both lookups, like everywhere else in the check.
+"""
+import os
+import re
+
+CAMERA_SEQUENCES_TABLE = "camera_sequences"
+
+# Same convention the planner's reasonability checks use: letters, '_' or '-', then digits
+SEQUENCE_PATTERN = re.compile(r'^([a-zA-Z_-]+)(\d+)$')
+
+
+def parse_sequence(filename):
+    """Returns (prefix, number, width) for 'IMG_0042.HEIC', or None when the name has no counter."""
+    if not filename:
+        return None
+    m = SEQUENCE_PATTERN.match(os.path.splitext(filename)[0])
+    if not m:
+        return None
+    return m.group(1), int(m.group(2)), len(m.group(2))
+
+
+def _part(index):
+    def extract(filename):
+        parsed = parse_sequence(filename)
+        return parsed[index] if parsed else None
+    return extract
+
+
+def register_sequence_functions(conn):
+    """Registers seq_prefix(), seq_number() and seq_width() on `conn`."""
+    for index, name in enumerate(("seq_prefix", "seq_number", "seq_width")):
+        conn.create_function(name, 1, _part(index), deterministic=True)
+
+
+def has_camera_sequences(cursor):
+    cursor.execute("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = ?", (CAMERA_SEQUENCES_TABLE,))
+    return cursor.fetchone() is not None
+
+
+def sync_camera_sequences(cursor, changed_only=False):
+    """
+    Brings camera_sequences in line with the assets table (joined to the ZEXTENDEDATTRIBUTES
+    mirror for the camera model) with a set-difference upsert/delete keyed on asset_pk. With
+    `changed_only` only assets in temp.derived_changed_assets are compared.
+    Returns (upserted, deleted).
+    """
+    register_sequence_functions(cursor.connection)
+    scope = "AND a.asset_pk IN (SELECT asset_pk FROM temp.derived_changed_assets)" if changed_only else ""
+    cursor.execute(f"""
+        INSERT INTO {CAMERA_SEQUENCES_TABLE} (
+            asset_pk, asset_id, camera_model, prefix, seq, seq_width,
+            original_filename, month, created_local_datetime, import_uuid, ignore_continuity_check
+        )
+        SELECT
+            a.asset_pk,
+            a.asset_id,
+            COALESCE(ea.ZCAMERAMODEL, 'Unknown'),
+            seq_prefix(a.original_filename),
+            seq_number(a.original_filename),
+            seq_width(a.original_filename),
+            a.original_filename,
+            a.month,
+            a.created_local_datetime,
+            a.import_id,
+            COALESCE(a.ignore_continuity_check, 0)
+        FROM assets a
+        LEFT JOIN ZEXTENDEDATTRIBUTES ea ON ea.ZASSET = a.asset_pk
+        WHERE a.asset_pk IS NOT NULL
+          AND seq_number(a.original_filename) IS NOT NULL
+          {scope}
+        ON CONFLICT(asset_pk) DO UPDATE SET
+            asset_id = excluded.asset_id,
+            camera_model = excluded.camera_model,
+            prefix = excluded.prefix,
+            seq = excluded.seq,
+            seq_width = excluded.seq_width,
+            original_filename = excluded.original_filename,
+            month = excluded.month,
+            created_local_datetime = excluded.created_local_datetime,
+            import_uuid = excluded.import_uuid,
+            ignore_continuity_check = excluded.ignore_continuity_check
+        WHERE asset_id IS NOT excluded.asset_id
+           OR camera_model IS NOT excluded.camera_model
+           OR original_filename IS NOT excluded.original_filename
+           OR month IS NOT excluded.month
+           OR created_local_datetime IS NOT excluded.created_local_datetime
+           OR import_uuid IS NOT excluded.import_uuid
+           OR ignore_continuity_check IS NOT excluded.ignore_continuity_check
+    """)
+    upserted = cursor.rowcount
+
+    delete_scope = "asset_pk IN (SELECT asset_pk FROM temp.derived_changed_assets) AND" if changed_only else ""
+    cursor.execute(f"""
+        DELETE FROM {CAMERA_SEQUENCES_TABLE}
+        WHERE {delete_scope} NOT EXISTS (
+            SELECT 1 FROM assets a
+            WHERE a.asset_pk = {CAMERA_SEQUENCES_TABLE}.asset_pk
+              AND seq_number(a.original_filename) IS NOT NULL
+        )
+    """)
+    return upserted, cursor.rowcount
+
+
+def format_sequence_number(prefix, number, width):
+    return f"{prefix}{number:0{width}d}"
+
+
+def find_sequence_gaps(cursor, camera_model, month, import_uuid=None):
+    """
+    Lists the sequence numbers missing from `camera_model`'s checked files of `month`
+    (optionally one import session), per prefix, as
+    [(prefix, width, first_missing, last_missing), ...].
+
+    Each prefix is read as one sorted run from idx_camera_sequences_month_seq; jumps between
+    consecutive numbers are the gaps. The counter is circular (width digits, wrapping to 1),
+    so when one jump is longer than the distance around the wrap the month rolled over
+    (e.g. IMG_9990..IMG_9999, IMG_0001..IMG_0010): that jump is not a gap, while the numbers
+    missing on either side of the wrap are.
+    """
+    session_filter = "AND import_uuid = ?" if import_uuid is not None else ""
+    params = [camera_model, month] + ([import_uuid] if import_uuid is not None else [])
+
+    cursor.execute(f"""
+        SELECT prefix, MIN(seq), MAX(seq), MAX(seq_width)
+        FROM {CAMERA_SEQUENCES_TABLE}
+        WHERE camera_model = ? AND month = ? AND ignore_continuity_check = 0 {session_filter}
+        GROUP BY prefix
+    """, params)
+    bounds = {prefix: (low, high, width) for prefix, low, high, width in cursor.fetchall()}
+
+    cursor.execute(f"""
+        SELECT prefix, prev_seq, seq
+        FROM (
+            SELECT prefix, seq, LAG(seq) OVER (PARTITION BY prefix ORDER BY seq) AS prev_seq
+            FROM {CAMERA_SEQUENCES_TABLE}
+            WHERE camera_model = ? AND month = ? AND ignore_continuity_check = 0 {session_filter}
+        )
+        WHERE seq > prev_seq + 1
+        ORDER BY prefix, seq
+    """, params)
+    jumps = {}
+    for prefix, prev_seq, seq in cursor.fetchall():
+        jumps.setdefault(prefix, []).append((prev_seq + 1, seq - 1))
+
+    gaps = []
+    for prefix, (low, high, width) in sorted(bounds.items()):
+        ranges = jumps.get(prefix, [])
+        last_number = 10 ** width - 1
+        around_wrap = (last_number - high) + (low - 1)
+        longest = max(ranges, key=lambda r: r[1] - r[0], default=None)
+        if longest and longest[1] - longest[0] + 1 > around_wrap:
+            ranges = [r for r in ranges if r is not longest]
+            if high < last_number:
+                ranges.append((high + 1, last_number))
+            if low > 1:
+                ranges.insert(0, (1, low - 1))
+        gaps.extend((prefix, width, first, last) for first, last in ranges)
+    return gaps
+
+
+def describe_sequence_gaps(gaps, limit=5):
+    """'3 missing: IMG_0012-IMG_0013, IMG_0020' for the output of find_sequence_gaps()."""
+    missing = sum(last - first + 1 for _, _, first, last in gaps)
+    parts = []
+    for prefix, width, first, last in gaps[:limit]:
+        label = format_sequence_number(prefix, first, width)
+        if last != first:
+            label += f"-{format_sequence_number(prefix, last, width)}"
+        parts.append(label)
+    if len(gaps) > limit:
+        parts.append(f"+{len(gaps) - limit} more ranges")
+    return f"{missing} missing: {', '.join(parts)}"
+
+
+def get_sequence_neighbours(cursor, camera_model, prefix, month_start, month_end):
+    """
+    Returns (before, after): the (original_filename, created_local_datetime) of the camera's
+    last checked `prefix` file created before `month_start` and its first one from `month_end` on,
+    each found with one seek on idx_camera_sequences_created. Either may be None.
+    """
+    cursor.execute(f"""
+        SELECT original_filename, created_local_datetime
+        FROM {CAMERA_SEQUENCES_TABLE}
+        WHERE camera_model = ? AND prefix = ? AND ignore_continuity_check = 0 AND created_local_datetime < ?
+        ORDER BY created_local_datetime DESC
+        LIMIT 1
+    """, (camera_model, prefix, month_start))
+    before = cursor.fetchone()
+    cursor.execute(f"""
+        SELECT original_filename, created_local_datetime
+        FROM {CAMERA_SEQUENCES_TABLE}
+        WHERE camera_model = ? AND prefix = ? AND ignore_continuity_check = 0 AND created_local_datetime >= ?
+        ORDER BY created_local_datetime ASC
+        LIMIT 1
+    """, (camera_model, prefix, month_end))
+    after = cursor.fetchone()
+    return before, after
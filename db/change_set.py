@@ -0,0 +1,65 @@
+# db/change_set.py
+"""
+Change set handed from raw sync to derived sync.
+
+Raw sync appends one raw_change_set row per mirror-table PK it inserted, updated or deleted,
+with the ZASSET.Z_PK that row belongs to and, for ZASSET rows, the import session the asset
+had before the change (so sessions that lose an asset are recomputed too). A row with pk IS
+NULL means the whole table was rebuilt and derived sync has to rebuild everything. Derived sync consumes the rows up to the
+id it read at its start and deletes them once it succeeded.
+"""
+
+CHANGE_SET_TABLE = "raw_change_set"
+
+# Mirror tables whose rows hang off an asset through their ZASSET column
+ASSET_ATTRIBUTE_TABLES = ("ZADDITIONALASSETATTRIBUTES", "ZEXTENDEDATTRIBUTES")
+
+
+def has_change_set(cursor):
+    cursor.execute("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = ?", (CHANGE_SET_TABLE,))
+    return cursor.fetchone() is not None
+
+
+def record_table_changes(cursor, table, pk_sql):
+    """
+    Records the PKs returned by `pk_sql` (a SELECT with a `pk` column) as changed rows of
+    `table`. Call it before the changes are applied to main so deleted attribute rows can
+    still be mapped to their asset. Needs photos_db attached. Returns the number of rows recorded.
+    """
+    session_expr = "NULL"
+    if table == "ZASSET":
+        asset_expr = "c.pk"
+        session_expr = "(SELECT m.ZIMPORTSESSION FROM main.ZASSET m WHERE m.Z_PK = c.pk)"
+    elif table in ASSET_ATTRIBUTE_TABLES:
+        asset_expr = f"""COALESCE(
+            (SELECT s.ZASSET FROM photos_db.{table} s WHERE s.Z_PK = c.pk),
+            (SELECT m.ZASSET FROM main.{table} m WHERE m.Z_PK = c.pk))"""
+    else:
+        asset_expr = "NULL"
+    cursor.execute(f"""
+        INSERT INTO main.{CHANGE_SET_TABLE} (table_name, pk, asset_pk, old_import_session)
+        SELECT ?, c.pk, {asset_expr}, {session_expr} FROM ({pk_sql}) c
+    """, (table,))
+    return cursor.rowcount
+
+
+def record_full_rebuild(cursor, table):
+    cursor.execute(f"INSERT INTO main.{CHANGE_SET_TABLE} (table_name, pk, asset_pk) VALUES (?, NULL, NULL)", (table,))
+
+
+def get_pending_changes(cursor):
+    """
+    Returns (max_id, needs_full_rebuild, changed_rows) for the pending change set.
+    max_id is None when nothing is pending.
+    """
+    cursor.execute(f"""
+        SELECT MAX(id), COALESCE(MAX(pk IS NULL), 0), COUNT(*) FROM main.{CHANGE_SET_TABLE}
+    """)
+    max_id, needs_full, changed_rows = cursor.fetchone()
+    return max_id, bool(needs_full), changed_rows
+
+
+def clear_changes(cursor, max_id):
+    """Deletes the change set rows consumed by a derived sync (ids up to max_id)."""
+    if max_id is not None:
+        cursor.execute(f"DELETE FROM main.{CHANGE_SET_TABLE} WHERE id <= ?", (max_id,))
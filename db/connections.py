@@ -1,13 +1,56 @@
 # db/connection.py
+"""
+Connections to the Media Organizer DB.
+
+Every connection is opened through connect(), which applies the PRAGMA profile in
+constants.DB_CONNECTION_PRAGMAS (WAL, synchronous=NORMAL, busy timeout, cache, mmap, temp
+store) so scripts do not each set their own. get_connection() is the process-wide shared
+connection most scripts use; get_thread_connection() gives each worker thread its own.
+With QUERY_STATS_ENABLED every connection is instrumented (db/query_stats.py).
+"""
 import sqlite3
-from constants import MEDIA_ORGANIZER_DB_PATH
+import threading
+from urllib.parse import quote
+from constants import MEDIA_ORGANIZER_DB_PATH, DB_CONNECTION_PRAGMAS, QUERY_STATS_ENABLED
+from db.query_stats import InstrumentedConnection
 
 _conn = None
+_thread_local = threading.local()
+
+
+def apply_pragmas(conn, read_only=False, **overrides):
+    """Applies DB_CONNECTION_PRAGMAS, with `overrides` taking precedence, to `conn`."""
+    pragmas = {**DB_CONNECTION_PRAGMAS, **overrides}
+    if read_only:
+        # The journal mode is a property of the file; read-only connections cannot change it
+        pragmas.pop("journal_mode", None)
+    for name, value in pragmas.items():
+        if value is not None:
+            conn.execute(f"PRAGMA {name} = {value};")
+    return conn
+
+
+def connect(db_path=None, read_only=False, query_only=None, timeout=30, detect_types=0, **pragmas):
+    """
+    Opens a new connection with the PRAGMA profile applied; keyword `pragmas` override it
+    (e.g. cache_size=-262144). read_only opens the file with mode=ro and, unless query_only
+    is False (a read-only main with a writable attached database), sets PRAGMA query_only.
+    """
+    db_path = db_path or MEDIA_ORGANIZER_DB_PATH
+    # Opened as a URI so 'file:...?mode=ro' paths can be ATTACHed on this connection too
+    uri = f"file:{quote(db_path)}" + ("?mode=ro" if read_only else "")
+    factory = InstrumentedConnection if QUERY_STATS_ENABLED else sqlite3.Connection
+    conn = sqlite3.connect(uri, timeout=timeout, detect_types=detect_types, uri=True, factory=factory)
+    apply_pragmas(conn, read_only=read_only, **pragmas)
+    if query_only if query_only is not None else read_only:
+        conn.execute("PRAGMA query_only = ON;")
+    return conn
+
 
 def get_connection():
     global _conn
     if _conn is None:
-        _conn = sqlite3.connect(MEDIA_ORGANIZER_DB_PATH, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES, uri=True)
+        _conn = connect(detect_types=sqlite3.PARSE_DECLTYPES)
     return _conn
 
 def get_cursor():
@@ -20,4 +63,28 @@ def close():
     global _conn
     if _conn:
         _conn.close()
-        _conn = None
\ No newline at end of file
+        _conn = None
+
+
+def get_thread_connection(read_only=False, query_only=None):
+    """
+    Returns the calling thread's own connection (sqlite3 connections must not be shared
+    across threads), opening it with connect(read_only=..., query_only=...) on first use and
+    reusing it for later tasks of the same worker. Close it with close_thread_connection()
+    before the worker thread exits.
+    """
+    key = (read_only, query_only)
+    connections = getattr(_thread_local, "connections", None)
+    if connections is None:
+        connections = _thread_local.connections = {}
+    conn = connections.get(key)
+    if conn is None:
+        conn = connections[key] = connect(read_only=read_only, query_only=query_only)
+    return conn
+
+def close_thread_connection():
+    """Closes every connection get_thread_connection() opened on the calling thread."""
+    connections = getattr(_thread_local, "connections", None) or {}
+    for conn in connections.values():
+        conn.close()
+    connections.clear()
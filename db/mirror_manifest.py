@@ -0,0 +1,58 @@
+# db/mirror_manifest.py
+"""
+Column manifest for the raw Photos tables mirrored into the Media Organizer DB.
+
+sync_photos_raw.py mirrors only these columns (plus the Core Data key columns) instead of
+the hundreds each Photos table has. Any query that reads a mirror table through `main.` or
+an unqualified name must only use columns listed here; scripts/utils/check_mirror_columns.py
+fails when one does not. Queries against `photos_db.*` read the Photos DB directly and are
+not limited by this manifest.
+"""
+
+# Core Data bookkeeping columns, always mirrored: Z_PK is the primary key and the diff
+# sync compares Z_OPT.
+KEY_COLUMNS = ["Z_PK", "Z_ENT", "Z_OPT"]
+
+MIRROR_COLUMNS = {
+    "ZASSET": [
+        "ZUUID",
+        "ZFILENAME",
+        "ZDATECREATED",
+        "ZADDEDDATE",
+        "ZIMPORTSESSION",
+        "ZTRASHEDSTATE",
+        "ZFAVORITE",
+        "ZOVERALLAESTHETICSCORE",
+    ],
+    "ZADDITIONALASSETATTRIBUTES": [
+        "ZASSET",
+        "ZORIGINALFILENAME",
+    ],
+    "ZEXTENDEDATTRIBUTES": [
+        "ZASSET",
+        "ZCAMERAMAKE",
+        "ZCAMERAMODEL",
+    ],
+    "ZIMPORTSESSION": [],
+}
+
+# Secondary indexes kept on the mirror tables. Derived sync aggregates imports per session
+# and joins the attribute tables on their asset, so both lookups must not scan the table.
+MIRROR_INDEXES = {
+    "ZASSET": {"idx_mirror_zasset_import_session": ["ZIMPORTSESSION"]},
+    "ZADDITIONALASSETATTRIBUTES": {"idx_mirror_zadditionalassetattributes_asset": ["ZASSET"]},
+    "ZEXTENDEDATTRIBUTES": {"idx_mirror_zextendedattributes_asset": ["ZASSET"]},
+}
+
+
+def get_mirror_columns(table):
+    """Returns the full ordered column list mirrored for `table` (key columns first)."""
+    return KEY_COLUMNS + [c for c in MIRROR_COLUMNS[table] if c not in KEY_COLUMNS]
+
+
+def get_mirror_index_statements(table):
+    """Returns the CREATE INDEX IF NOT EXISTS statements for main.<table>."""
+    return [
+        f"CREATE INDEX IF NOT EXISTS main.{name} ON {table} ({', '.join(columns)})"
+        for name, columns in MIRROR_INDEXES.get(table, {}).items()
+    ]
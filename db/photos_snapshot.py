@@ -0,0 +1,102 @@
+# db/photos_snapshot.py
+"""
+Read-only access to the Apple Photos database (Photos.sqlite) as the `photos_db` schema of a
+Media DB connection.
+
+The file is the live library, which Photos can open and write at any point of a long sync, so
+it is attached with mode=ro: SQLite keeps its shared locks and change detection and reads the
+pages still in the WAL. immutable=1 would skip both and could return torn pages. A large mmap
+window serves the multi-GB reads from the page cache. photos_snapshot() guarantees the DETACH;
+get_photos_schema() reads the table/column map once per file version.
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from urllib.parse import quote
+from constants import APPLE_PHOTOS_DB_PATH, PHOTOS_SNAPSHOT_MMAP_SIZE
+
+PHOTOS_DB_ALIAS = "photos_db"
+
+_schema_cache = {}
+
+
+def snapshot_uri(path=None):
+    """'file:...?mode=ro' URI of Photos.sqlite."""
+    return f"file:{quote(path or APPLE_PHOTOS_DB_PATH)}?mode=ro"
+
+
+def attach_photos_db(conn_or_cursor, path=None, alias=PHOTOS_DB_ALIAS):
+    """ATTACHes Photos.sqlite read-only as `alias` (see snapshot_uri) with the snapshot mmap window."""
+    conn_or_cursor.execute(f"ATTACH DATABASE '{snapshot_uri(path)}' AS {alias};")
+    try:
+        conn_or_cursor.execute(f"PRAGMA {alias}.mmap_size = {PHOTOS_SNAPSHOT_MMAP_SIZE};")
+    except sqlite3.Error:
+        detach_photos_db(conn_or_cursor, alias)
+        raise
+
+
+def detach_photos_db(conn_or_cursor, alias=PHOTOS_DB_ALIAS):
+    """DETACHes `alias`; a no-op when it is not attached."""
+    try:
+        conn_or_cursor.execute(f"DETACH DATABASE {alias};")
+    except sqlite3.OperationalError as e:
+        if "no such database" not in str(e):
+            raise
+
+
+@contextmanager
+def photos_snapshot(conn_or_cursor, path=None, alias=PHOTOS_DB_ALIAS):
+    """
+    with photos_snapshot(cursor): ... queries photos_db.<table> and detaches on the way out,
+    also when the body raises.
+
+    SQLite refuses to DETACH a database that the open transaction has read, so the transaction
+    is ended first: committed when the body completes, rolled back when it raises. On the error
+    path a failing rollback or DETACH is swallowed so the body's exception is the one raised.
+    """
+    conn = getattr(conn_or_cursor, "connection", conn_or_cursor)
+    attach_photos_db(conn_or_cursor, path, alias)
+    try:
+        yield conn_or_cursor
+    except BaseException:
+        try:
+            conn.rollback()
+            detach_photos_db(conn_or_cursor, alias)
+        except sqlite3.Error:
+            pass
+        raise
+    if conn.in_transaction:
+        conn.commit()
+    detach_photos_db(conn_or_cursor, alias)
+
+
+def _attached_path(cursor, alias):
+    cursor.execute("PRAGMA database_list;")
+    for _, name, file in cursor.fetchall():
+        if name == alias:
+            return file
+    raise sqlite3.OperationalError(f"Database {alias} is not attached.")
+
+
+def get_photos_schema(cursor, alias=PHOTOS_DB_ALIAS):
+    """
+    Returns {table: {column: declared_type}} (in table_info order) for the attached Photos DB.
+    Cached per file path, size and mtime, so repeated syncs and checks against the same
+    snapshot do not re-read sqlite_master and table_info.
+    """
+    path = _attached_path(cursor, alias)
+    stat = os.stat(path) if path and os.path.exists(path) else None
+    key = (path, stat.st_size, stat.st_mtime_ns) if stat else None
+    if key is not None and key in _schema_cache:
+        return _schema_cache[key]
+
+    cursor.execute(f"SELECT name FROM {alias}.sqlite_master WHERE type = 'table';")
+    schema = {}
+    for (table,) in cursor.fetchall():
+        cursor.execute(f"PRAGMA {alias}.table_info({table});")
+        schema[table] = {row[1]: row[2] for row in cursor.fetchall()}
+
+    if key is not None:
+        _schema_cache.clear()
+        _schema_cache[key] = schema
+    return schema
@@ -0,0 +1,120 @@
+# db/query_registry.py
+"""
+Registry of the pipeline's hot queries, checked by scripts/utils/check_query_plans.py.
+
+Each entry names a SQL string literal where it lives: the function that runs it and text
+that singles it out among the function's literals. The checker reads the literal from the
+source, so a registered query cannot drift from the SQL the pipeline actually runs. Its
+EXPLAIN QUERY PLAN against a synthetic schema must not fall back to a full SCAN of the tables
+in WATCHED_TABLES; `allowed_scans` lists the ones a query reads in full by design.
+"""
+from dataclasses import dataclass
+from typing import Tuple
+
+# Large tables a hot query must reach through an index
+WATCHED_TABLES = ("assets", "imports", "moment_exports")
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    name: str
+    # Project-relative path and (possibly nested) function containing the SQL literal
+    path: str
+    function: str
+    # The literal contains all of these and none of `excludes`
+    contains: Tuple[str, ...]
+    excludes: Tuple[str, ...] = ()
+    # Watched tables this query scans on purpose (e.g. a report over every asset)
+    allowed_scans: Tuple[str, ...] = ()
+
+
+HOT_QUERIES = [
+    HotQuery(
+        "latest_import_and_month", "db/queries.py", "get_latest_import_and_month",
+        contains=("AS latest_import",),
+    ),
+    HotQuery(
+        "moment_album_candidates", "scripts/create_apple_moments_albums.py", "main",
+        contains=("FROM ranked_assets v", "LEFT JOIN moment_exports me"),
+    ),
+    HotQuery(
+        "moment_previously_curated", "scripts/create_apple_moments_albums.py", "main",
+        contains=("SELECT asset_id FROM moment_exports WHERE album_name = ?",),
+    ),
+    HotQuery(
+        "moment_curated_scores", "scripts/create_apple_moments_albums.py", "main",
+        contains=("SELECT score_normalized FROM ranked_assets WHERE asset_id IN",),
+    ),
+    HotQuery(
+        "favorites_count_local", "scripts/pipeline_planner.py", "check_favorites_count",
+        contains=("SELECT original_filename FROM assets WHERE month = ? AND google_favorite = 1",),
+    ),
+    HotQuery(
+        "batch_summary_favorites_mapping", "scripts/pipeline_planner.py", "display_summary",
+        contains=("SELECT original_filename, date_created_utc, month FROM assets",),
+        # Maps every asset's (filename, created) to its month; read from idx_assets_filename_created
+        allowed_scans=("assets",),
+    ),
+    HotQuery(
+        "sequencing_session_ranges", "scripts/pipeline_planner.py", "verify_sequencing_for_planned_month",
+        contains=("FROM assets WHERE import_id = ?",),
+    ),
+    HotQuery(
+        "favorites_reset_month", "scripts/pull_google_favorites.py", "main",
+        contains=("SET google_favorite = 0",),
+    ),
+    HotQuery(
+        "favorites_match", "scripts/pull_google_favorites.py", "main",
+        contains=("SET google_favorite = 1", "WHERE original_filename = ? AND date_created_utc = ?"),
+    ),
+    HotQuery(
+        "favorites_match_retroactive", "scripts/pull_google_favorites.py", "run_retroactive",
+        contains=("SET google_favorite = 1",),
+    ),
+    HotQuery(
+        "memory_cutoff_score", "scripts/pipeline_planner.py", "run_memory_publishing_flow",
+        contains=("ORDER BY v.score_normalized DESC LIMIT 1", "photos_db.Z_30ASSETS"),
+    ),
+    HotQuery(
+        "memory_cutoff_score_local", "scripts/pipeline_planner.py", "run_memory_publishing_flow",
+        contains=("ORDER BY v.score_normalized DESC LIMIT 1",), excludes=("photos_db",),
+    ),
+    HotQuery(
+        "memory_unassigned_high_rank", "scripts/pipeline_planner.py", "run_memory_publishing_flow",
+        contains=("v.score_normalized > 0.50", "photos_db.ZMOMENT"),
+    ),
+    HotQuery(
+        "memory_published_moment_stats", "scripts/pipeline_planner.py", "run_memory_publishing_flow",
+        contains=("AS camera_sources",),
+    ),
+    HotQuery(
+        "memory_qualified_assets", "scripts/pipeline_planner.py", "run_memory_publishing_flow",
+        contains=("as is_proposed", "photos_db.ZASSET"),
+    ),
+    HotQuery(
+        "memory_qualified_assets_local", "scripts/pipeline_planner.py", "run_memory_publishing_flow",
+        contains=("as is_proposed",), excludes=("photos_db",),
+    ),
+    HotQuery(
+        "memory_publication_scores", "scripts/pipeline_planner.py", "run_memory_publishing_flow",
+        contains=("AS pub_count",),
+    ),
+    HotQuery(
+        "memory_moment_timeline", "scripts/pipeline_planner.py", "run_memory_publishing_flow",
+        contains=("SELECT a.curated_album, v.MomentsAlbumName, a.date_created_utc",),
+        # Builds the capture-date timeline of every dated asset
+        allowed_scans=("assets",),
+    ),
+    HotQuery(
+        "memory_publish_curated_exports", "scripts/pipeline_planner.py", "run_memory_publishing_flow",
+        contains=("WHERE me.album_name = ? AND me.curation_stage = 'curated'",),
+    ),
+    HotQuery(
+        "memory_publish_already_published", "scripts/pipeline_planner.py", "run_memory_publishing_flow",
+        contains=("SELECT asset_id FROM publications WHERE moment_name = ?",),
+    ),
+    HotQuery(
+        "memory_moment_assets", "scripts/pipeline_planner.py", "run_memory_publishing_flow",
+        contains=("FROM ranked_assets", "WHERE MomentsAlbumName = ?"),
+    ),
+]
@@ -0,0 +1,291 @@
+# db/query_stats.py
+"""
+Opt-in query instrumentation (MEDIA_ORGANIZER_QUERY_STATS=1).
+
+db/connections.connect() then opens connections as InstrumentedConnection, whose cursors time
+every execute and fetch, count the rows returned (rows changed for DML) and read the SQLite VM
+instructions spent from a progress handler. executescript() is split into its statements with
+set_trace_callback. Calls are aggregated per statement fingerprint (SQL with literals and IN
+lists collapsed) and written to the query_stats table (migration 053) when the process exits;
+calls slower than QUERY_STATS_SLOW_MS are also appended to QUERY_SLOW_LOG_PATH as they finish.
+"""
+import atexit
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import threading
+import weakref
+from datetime import datetime, timezone
+from time import perf_counter
+from constants import QUERY_STATS_SLOW_MS, QUERY_STATS_PROGRESS_STEPS, QUERY_SLOW_LOG_PATH
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUE_ROWS = re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(sql):
+    """SQL text with comments dropped, literals as '?', '(?, ?, ...)' as '(...)' and whitespace collapsed."""
+    text = _COMMENTS.sub(" ", sql)
+    text = _STRINGS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _PLACEHOLDER_LISTS.sub("(...)", text)
+    text = _VALUE_ROWS.sub(r"\1", text)
+    return _WHITESPACE.sub(" ", text).strip().rstrip(";").strip()
+
+
+def fingerprint_statement(sql):
+    """Returns (fingerprint, normalized statement); equal for calls differing only in literals."""
+    statement = normalize_statement(sql)
+    return hashlib.sha1(statement.encode("utf-8")).hexdigest()[:16], statement
+
+
+class QueryStats:
+    """Process-wide per-fingerprint totals: [statement, calls, total_s, max_s, rows, vm_steps]."""
+
+    def __init__(self):
+        self.script = os.path.splitext(os.path.basename(sys.argv[0] or ""))[0] or "interactive"
+        self.run_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self.totals = {}
+        self.lock = threading.Lock()
+        self.open_cursors = weakref.WeakSet()
+
+    def record(self, sql, elapsed, rows, vm_steps):
+        fingerprint, statement = fingerprint_statement(sql)
+        with self.lock:
+            entry = self.totals.get(fingerprint)
+            if entry is None:
+                entry = self.totals[fingerprint] = [statement, 0, 0.0, 0.0, 0, 0]
+            entry[1] += 1
+            entry[2] += elapsed
+            entry[3] = max(entry[3], elapsed)
+            entry[4] += rows
+            entry[5] += vm_steps
+        if elapsed * 1000 >= QUERY_STATS_SLOW_MS:
+            self.log_slow(sql, elapsed, rows, vm_steps)
+
+    def log_slow(self, sql, elapsed, rows, vm_steps):
+        line = (
+            f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} [{self.script}] {elapsed * 1000:.1f} ms, "
+            f"{rows} rows, {vm_steps} VM steps: {_WHITESPACE.sub(' ', sql).strip()}\n"
+        )
+        try:
+            os.makedirs(os.path.dirname(QUERY_SLOW_LOG_PATH), exist_ok=True)
+            with self.lock, open(QUERY_SLOW_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError:
+            pass
+
+    def flush(self, db_path):
+        """Adds the totals collected so far to query_stats in `db_path` and resets them."""
+        for cursor in list(self.open_cursors):
+            cursor.finish_call()
+        with self.lock:
+            totals, self.totals = self.totals, {}
+        if not totals:
+            return
+        # A plain connection: the flush itself is not instrumented and never joins a caller's transaction
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'query_stats'").fetchone():
+                return
+            conn.executemany("""
+                INSERT INTO query_stats (
+                    run_id, script, fingerprint, statement, calls, total_ms, max_ms, rows, vm_steps, recorded_at_utc
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                ON CONFLICT(run_id, fingerprint) DO UPDATE SET
+                    calls = calls + excluded.calls,
+                    total_ms = total_ms + excluded.total_ms,
+                    max_ms = MAX(max_ms, excluded.max_ms),
+                    rows = rows + excluded.rows,
+                    vm_steps = vm_steps + excluded.vm_steps,
+                    recorded_at_utc = excluded.recorded_at_utc
+            """, [
+                (self.run_id, self.script, fingerprint, statement, calls, total * 1000, longest * 1000, rows, steps)
+                for fingerprint, (statement, calls, total, longest, rows, steps) in totals.items()
+            ])
+            conn.commit()
+        finally:
+            conn.close()
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_query_stats():
+    """Returns the process-wide QueryStats, creating it (and its flush at exit) on first use."""
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = QueryStats()
+            atexit.register(flush_query_stats)
+        return _stats
+
+
+def flush_query_stats(db_path=None):
+    """Writes the collected totals to query_stats of `db_path` (default: the Media Organizer DB)."""
+    if _stats is None:
+        return
+    if db_path is None:
+        from db import connections
+        db_path = connections.MEDIA_ORGANIZER_DB_PATH
+    try:
+        _stats.flush(db_path)
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not write query stats: {e}", file=sys.stderr)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Times its calls and counts their rows; one open call per cursor, recorded when it is done."""
+
+    call = None
+
+    def start_call(self, sql):
+        self.finish_call()
+        # [sql, elapsed seconds, rows, VM steps]
+        self.call = [sql, 0.0, 0, 0]
+        self.connection.stats.open_cursors.add(self)
+
+    def finish_call(self):
+        call, self.call = self.call, None
+        if call is not None:
+            self.connection.stats.open_cursors.discard(self)
+            self.connection.stats.record(*call)
+
+    def timed(self, method, *args):
+        conn = self.connection
+        steps = conn.vm_steps
+        start = perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self.call is not None:
+                self.call[1] += perf_counter() - start
+                self.call[3] += conn.vm_steps - steps
+
+    def run_call(self, method, sql, parameters):
+        self.start_call(sql)
+        try:
+            self.timed(method, sql, parameters)
+        except Exception:
+            self.finish_call()
+            raise
+        if self.description is None:
+            # DML and DDL return no rows: record what they changed, they are done
+            self.call[2] = max(self.rowcount, 0)
+            self.finish_call()
+
+    def execute(self, sql, parameters=()):
+        self.run_call(super().execute, sql, parameters)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self.run_call(super().executemany, sql, seq_of_parameters)
+        return self
+
+    def executescript(self, sql_script):
+        self.finish_call()
+        return self.connection.run_script(super().executescript, sql_script)
+
+    def fetchone(self):
+        row = self.timed(super().fetchone)
+        if self.call is not None:
+            if row is None:
+                self.finish_call()
+            else:
+                self.call[2] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self.timed(super().fetchmany, size)
+        if self.call is not None:
+            self.call[2] += len(rows)
+            if len(rows) < size:
+                self.finish_call()
+        return rows
+
+    def fetchall(self):
+        rows = self.timed(super().fetchall)
+        if self.call is not None:
+            self.call[2] += len(rows)
+            self.finish_call()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self.timed(super().__next__)
+        except StopIteration:
+            self.finish_call()
+            raise
+        if self.call is not None:
+            self.call[2] += 1
+        return row
+
+    def close(self):
+        self.finish_call()
+        super().close()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3.connect(factory=InstrumentedConnection): hands out InstrumentedCursors."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = get_query_stats()
+        self.vm_steps = 0
+        self.script_statement = None
+        self.set_progress_handler(self.count_vm_steps, QUERY_STATS_PROGRESS_STEPS)
+
+    def count_vm_steps(self):
+        self.vm_steps += QUERY_STATS_PROGRESS_STEPS
+        return 0
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def commit(self):
+        if not self.in_transaction:
+            return super().commit()
+        steps = self.vm_steps
+        start = perf_counter()
+        try:
+            super().commit()
+        finally:
+            # Writing out the transaction (WAL append, checkpoint) is often the costly part
+            self.stats.record("COMMIT", perf_counter() - start, 0, self.vm_steps - steps)
+
+    def run_script(self, executescript, sql_script):
+        """Runs executescript, recording each statement from one trace callback to the next."""
+        self.set_trace_callback(self.trace_script_statement)
+        try:
+            return executescript(sql_script)
+        finally:
+            self.set_trace_callback(None)
+            self.trace_script_statement(None)
+
+    def trace_script_statement(self, statement):
+        now = perf_counter()
+        if statement is not None and statement.startswith("-- TRIGGER"):
+            # Trigger bodies count towards the statement that fired them
+            return
+        if self.script_statement is not None:
+            sql, start, steps = self.script_statement
+            self.stats.record(sql, now - start, 0, self.vm_steps - steps)
+        self.script_statement = (statement, now, self.vm_steps) if statement is not None else None
@@ -0,0 +1,124 @@
+# db/ranked_assets.py
+"""
+Materialized ranking of the assets table.
+
+ranked_assets (migration 049) holds one row per asset that takes part in continuity checks,
+with score_normalized stored and indexed instead of being recomputed by a view on every read.
+Triggers on assets keep it current. The score weights from constants.py are baked into the
+trigger SQL, so ensure_ranked_assets() recreates the triggers and recomputes every score in
+bulk whenever the stored trigger SQL no longer matches the current weights.
+"""
+from constants import AESTHETIC_SCORE_WEIGHT, GOOGLE_FAVORITES_WEIGHT, APPLE_SELECTION_WEIGHT, APPLE_FEATURED_WEIGHT
+
+RANKED_ASSETS_TABLE = "ranked_assets"
+
+# Copied from assets; score_normalized is computed from them
+RANKED_ASSETS_COLUMNS = [
+    "asset_id",
+    "original_filename",
+    "month",
+    "aesthetic_score",
+    "google_favorite",
+    "apple_favorite",
+    "apple_photos_monthly_selection",
+    "mobile_apple_photos_featured_photos",
+    "date_created_utc",
+    "MomentsAlbumName",
+]
+
+# assets columns the ranking depends on; updates to other columns do not fire the trigger
+RANKED_SOURCE_COLUMNS = RANKED_ASSETS_COLUMNS + ["ignore_continuity_check"]
+
+
+def score_expression(prefix):
+    return f"""(
+        (COALESCE({prefix}aesthetic_score, 0) * {AESTHETIC_SCORE_WEIGHT}) +
+        ({prefix}google_favorite * {GOOGLE_FAVORITES_WEIGHT}) +
+        ({prefix}apple_photos_monthly_selection * {APPLE_SELECTION_WEIGHT}) +
+        ({prefix}mobile_apple_photos_featured_photos * {APPLE_FEATURED_WEIGHT})
+    )"""
+
+
+def _ranked_insert(prefix):
+    """INSERT of one assets row (`prefix` is 'NEW.' in triggers, 'a.' for bulk fills)."""
+    columns = ", ".join(RANKED_ASSETS_COLUMNS)
+    values = ", ".join(f"{prefix}{c}" for c in RANKED_ASSETS_COLUMNS)
+    return f"INSERT INTO {RANKED_ASSETS_TABLE} ({columns}, score_normalized) SELECT {values}, {score_expression(prefix)}"
+
+
+def _ranked_filter(prefix):
+    return f"({prefix}ignore_continuity_check = 0 OR {prefix}ignore_continuity_check IS NULL)"
+
+
+def get_trigger_definitions():
+    """Returns {trigger_name: CREATE TRIGGER sql} for the current weights."""
+    return {
+        "trg_ranked_assets_insert": f"""CREATE TRIGGER trg_ranked_assets_insert AFTER INSERT ON assets
+WHEN {_ranked_filter("NEW.")}
+BEGIN
+    DELETE FROM {RANKED_ASSETS_TABLE} WHERE asset_id = NEW.asset_id;
+    {_ranked_insert("NEW.")};
+END""",
+        "trg_ranked_assets_update": f"""CREATE TRIGGER trg_ranked_assets_update AFTER UPDATE OF {", ".join(RANKED_SOURCE_COLUMNS)} ON assets
+BEGIN
+    DELETE FROM {RANKED_ASSETS_TABLE} WHERE asset_id IN (OLD.asset_id, NEW.asset_id);
+    {_ranked_insert("NEW.")} WHERE {_ranked_filter("NEW.")};
+END""",
+        "trg_ranked_assets_delete": f"""CREATE TRIGGER trg_ranked_assets_delete AFTER DELETE ON assets
+BEGIN
+    DELETE FROM {RANKED_ASSETS_TABLE} WHERE asset_id = OLD.asset_id;
+END""",
+    }
+
+
+def recompute_ranked_assets(cursor):
+    """Rebuilds ranked_assets from assets in bulk. Returns the number of ranked rows."""
+    cursor.execute(f"DELETE FROM {RANKED_ASSETS_TABLE}")
+    cursor.execute(f"{_ranked_insert('a.')} FROM assets a WHERE {_ranked_filter('a.')}")
+    return cursor.rowcount
+
+
+def ensure_ranked_assets(cursor, logger):
+    """
+    Makes sure the ranked_assets triggers match the weights in constants.py. When they are
+    missing or were created with other weights, recreates them and recomputes every score.
+    Returns True when a bulk recompute ran. Does nothing before migration 049 is applied.
+    """
+    cursor.execute("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = ?", (RANKED_ASSETS_TABLE,))
+    if cursor.fetchone() is None:
+        logger.warning(f"⚠️ {RANKED_ASSETS_TABLE} table not found. Apply pending migrations first.")
+        return False
+
+    definitions = get_trigger_definitions()
+    cursor.execute("SELECT name, sql FROM main.sqlite_master WHERE type = 'trigger' AND tbl_name = 'assets'")
+    existing = {name: sql for name, sql in cursor.fetchall() if name in definitions}
+    if existing == definitions:
+        return False
+
+    for name, sql in definitions.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(sql)
+    ranked = recompute_ranked_assets(cursor)
+    logger.info(f"🔁 Score weights changed or ranking triggers missing. Recomputed {ranked} ranked assets.")
+    return True
+
+
+def create_ranked_assets_view(cursor):
+    """Recreates ranked_assets_view as a thin compatibility view over the ranked_assets table."""
+    cursor.execute("DROP VIEW IF EXISTS main.ranked_assets_view;")
+    cursor.execute(f"""
+        CREATE VIEW main.ranked_assets_view AS
+        SELECT
+            asset_id,
+            original_filename,
+            month,
+            aesthetic_score,
+            google_favorite,
+            apple_favorite,
+            apple_photos_monthly_selection,
+            mobile_apple_photos_featured_photos,
+            score_normalized,
+            date_created_utc,
+            MomentsAlbumName
+        FROM {RANKED_ASSETS_TABLE};
+    """)
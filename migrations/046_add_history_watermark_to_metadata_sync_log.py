@@ -0,0 +1,25 @@
+def run(conn):
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("PRAGMA table_info(metadata_sync_log)")
+        columns = [row[1] for row in cursor.fetchall()]
+
+        # Last Photos persistent-history transaction (ATRANSACTION.Z_PK) applied by the raw sync
+        if "history_transaction_pk" not in columns:
+            cursor.execute("ALTER TABLE metadata_sync_log ADD COLUMN history_transaction_pk INTEGER")
+            print("✅ Added 'history_transaction_pk' column to metadata_sync_log table")
+        else:
+            print("ℹ️ 'history_transaction_pk' column already exists in metadata_sync_log table")
+
+        # 'history' for watermark-based syncs, 'full' for full table diffs
+        if "sync_mode" not in columns:
+            cursor.execute("ALTER TABLE metadata_sync_log ADD COLUMN sync_mode TEXT")
+            print("✅ Added 'sync_mode' column to metadata_sync_log table")
+        else:
+            print("ℹ️ 'sync_mode' column already exists in metadata_sync_log table")
+
+        conn.commit()
+    except Exception as e:
+        print(f"⚠️ Migration 046 failed: {e}")
+        raise
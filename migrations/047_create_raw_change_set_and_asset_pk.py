@@ -0,0 +1,43 @@
+def run(conn):
+    cursor = conn.cursor()
+
+    try:
+        # PKs touched by raw sync since the last derived sync. asset_pk is the ZASSET.Z_PK the
+        # row belongs to, old_import_session the asset's import session before the change;
+        # pk IS NULL means the whole table was rebuilt.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS raw_change_set (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                pk INTEGER,
+                asset_pk INTEGER,
+                old_import_session INTEGER,
+                recorded_at_utc TEXT DEFAULT (datetime('now'))
+            )
+        """)
+        # Derived tables were built without a change set, so the next derived sync must be a full one
+        cursor.execute("INSERT INTO raw_change_set (table_name, pk, asset_pk) VALUES ('*', NULL, NULL)")
+        print("✅ Created 'raw_change_set' table")
+
+        # Z_OPT of every ZGENERICALBUM row as of the last derived sync
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS album_sync_state (
+                album_pk INTEGER PRIMARY KEY,
+                z_opt INTEGER NOT NULL
+            )
+        """)
+        print("✅ Created 'album_sync_state' table")
+
+        cursor.execute("PRAGMA table_info(assets)")
+        columns = [row[1] for row in cursor.fetchall()]
+        if "asset_pk" not in columns:
+            cursor.execute("ALTER TABLE assets ADD COLUMN asset_pk INTEGER")
+            print("✅ Added 'asset_pk' column to assets table")
+        else:
+            print("ℹ️ 'asset_pk' column already exists in assets table")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_asset_pk ON assets(asset_pk)")
+
+        conn.commit()
+    except Exception as e:
+        print(f"⚠️ Migration 047 failed: {e}")
+        raise
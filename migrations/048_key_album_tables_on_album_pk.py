@@ -0,0 +1,41 @@
+ALBUM_TABLES = ["smart_albums", "albums", "moments"]
+
+
+def run(conn):
+    cursor = conn.cursor()
+
+    try:
+        for table in ALBUM_TABLES:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,))
+            exists = cursor.fetchone() is not None
+            if exists:
+                cursor.execute(f"PRAGMA table_info({table})")
+                columns = {row[1]: row for row in cursor.fetchall()}
+                if columns.get("album_pk") and columns["album_pk"][5] == 1:
+                    print(f"ℹ️ '{table}' table is already keyed on album_pk")
+                    continue
+                cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+
+            # Derived sync upserts and deletes these tables row by row against ZGENERICALBUM
+            cursor.execute(f"""
+                CREATE TABLE {table} (
+                    album_pk INTEGER PRIMARY KEY,
+                    album_name TEXT,
+                    parent_folder_pk INTEGER,
+                    parent_folder_name TEXT
+                )
+            """)
+            if exists:
+                cursor.execute(f"""
+                    INSERT OR IGNORE INTO {table} (album_pk, album_name, parent_folder_pk, parent_folder_name)
+                    SELECT album_pk, album_name, parent_folder_pk, parent_folder_name
+                    FROM {table}_old
+                    WHERE album_pk IS NOT NULL
+                """)
+                cursor.execute(f"DROP TABLE {table}_old")
+            print(f"✅ Keyed '{table}' table on album_pk")
+
+        conn.commit()
+    except Exception as e:
+        print(f"⚠️ Migration 048 failed: {e}")
+        raise
@@ -0,0 +1,32 @@
+def run(conn):
+    cursor = conn.cursor()
+
+    try:
+        # Materialized replacement for ranked_assets_view. Rows and score_normalized are
+        # maintained by triggers on assets (db/ranked_assets.py), created on the next sync.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ranked_assets (
+                asset_id TEXT PRIMARY KEY,
+                original_filename TEXT,
+                month TEXT,
+                aesthetic_score REAL,
+                google_favorite INTEGER,
+                apple_favorite INTEGER,
+                apple_photos_monthly_selection INTEGER,
+                mobile_apple_photos_featured_photos INTEGER,
+                score_normalized REAL,
+                date_created_utc TEXT,
+                MomentsAlbumName TEXT
+            )
+        """)
+        print("✅ Created 'ranked_assets' table")
+
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_ranked_assets_score ON ranked_assets(score_normalized DESC)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_ranked_assets_month_score ON ranked_assets(month, score_normalized DESC)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_ranked_assets_moment_score ON ranked_assets(MomentsAlbumName, score_normalized DESC)")
+        print("✅ Created score indexes on 'ranked_assets'")
+
+        conn.commit()
+    except Exception as e:
+        print(f"⚠️ Migration 049 failed: {e}")
+        raise
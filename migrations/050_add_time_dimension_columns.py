@@ -0,0 +1,50 @@
+ASSET_COLUMNS = [
+    ("created_epoch", "INTEGER"),
+    ("created_local_datetime", "TEXT"),
+    ("created_local_date", "TEXT"),
+]
+
+IMPORT_COLUMNS = [
+    ("min_created_epoch", "INTEGER"),
+    ("max_created_epoch", "INTEGER"),
+]
+
+
+def add_columns(cursor, table, columns):
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, col_type in columns:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+            print(f"✅ Added '{name}' column to {table} table")
+        else:
+            print(f"ℹ️ '{name}' column already exists in {table} table")
+
+
+def run(conn):
+    cursor = conn.cursor()
+
+    try:
+        # Creation time converted once by derived sync in the pinned PIPELINE_TIMEZONE;
+        # assets.month is the matching local month
+        add_columns(cursor, "assets", ASSET_COLUMNS)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_month_created ON assets(month, created_epoch)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_created_epoch ON assets(created_epoch)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_created_local_date ON assets(created_local_date)")
+        print("✅ Created time dimension indexes on assets")
+
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='imports'")
+        if cursor.fetchone():
+            add_columns(cursor, "imports", IMPORT_COLUMNS)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_imports_model_dates ON imports(camera_model, min_date, max_date)")
+            print("✅ Created time dimension index on imports")
+
+        # Existing rows get the new columns from a full derived sync
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='raw_change_set'")
+        if cursor.fetchone():
+            cursor.execute("INSERT INTO raw_change_set (table_name, pk, asset_pk) VALUES ('*', NULL, NULL)")
+
+        conn.commit()
+    except Exception as e:
+        print(f"⚠️ Migration 050 failed: {e}")
+        raise
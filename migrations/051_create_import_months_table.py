@@ -0,0 +1,34 @@
+def run(conn):
+    cursor = conn.cursor()
+
+    try:
+        # One row per (import session, camera, local month) with the exact per-month ranges;
+        # replaces LIKE lookups on the comma-separated imports.months_detected
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS import_months (
+                import_uuid TEXT NOT NULL,
+                camera_model TEXT NOT NULL,
+                month TEXT NOT NULL,
+                asset_count INTEGER,
+                min_filename TEXT,
+                max_filename TEXT,
+                min_date TEXT,
+                max_date TEXT,
+                PRIMARY KEY (import_uuid, camera_model, month)
+            )
+        """)
+        print("✅ Created 'import_months' table")
+
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_import_months_model_month ON import_months(camera_model, month)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_import_months_month ON import_months(month, camera_model)")
+        print("✅ Created indexes on 'import_months'")
+
+        # Filled for every session by the next (full) derived sync
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='raw_change_set'")
+        if cursor.fetchone():
+            cursor.execute("INSERT INTO raw_change_set (table_name, pk, asset_pk) VALUES ('*', NULL, NULL)")
+
+        conn.commit()
+    except Exception as e:
+        print(f"⚠️ Migration 051 failed: {e}")
+        raise
@@ -0,0 +1,36 @@
+def run(conn):
+    cursor = conn.cursor()
+
+    try:
+        # Filename sequence number of every asset named <prefix><digits> (IMG_0042, DSC00042),
+        # maintained by derived sync for gap and neighbour lookups (db/camera_sequences.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS camera_sequences (
+                asset_pk INTEGER PRIMARY KEY,
+                asset_id TEXT NOT NULL,
+                camera_model TEXT NOT NULL,
+                prefix TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                seq_width INTEGER NOT NULL,
+                original_filename TEXT,
+                month TEXT,
+                created_local_datetime TEXT,
+                import_uuid TEXT
+            )
+        """)
+        print("✅ Created 'camera_sequences' table")
+
+        # Sorted runs of one camera's month, and nearest neighbours by date
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_camera_sequences_month_seq ON camera_sequences(camera_model, month, prefix, seq)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_camera_sequences_created ON camera_sequences(camera_model, prefix, created_local_datetime)")
+        print("✅ Created indexes on 'camera_sequences'")
+
+        # Filled for every asset by the next (full) derived sync
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='raw_change_set'")
+        if cursor.fetchone():
+            cursor.execute("INSERT INTO raw_change_set (table_name, pk, asset_pk) VALUES ('*', NULL, NULL)")
+
+        conn.commit()
+    except Exception as e:
+        print(f"⚠️ Migration 052 failed: {e}")
+        raise
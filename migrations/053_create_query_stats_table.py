@@ -0,0 +1,29 @@
+def run(conn):
+    cursor = conn.cursor()
+
+    try:
+        # Per-run statement totals written by the opt-in query instrumentation (db/query_stats.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS query_stats (
+                run_id TEXT NOT NULL,
+                script TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                statement TEXT NOT NULL,
+                calls INTEGER NOT NULL,
+                total_ms REAL NOT NULL,
+                max_ms REAL NOT NULL,
+                rows INTEGER NOT NULL,
+                vm_steps INTEGER NOT NULL,
+                recorded_at_utc TEXT NOT NULL,
+                PRIMARY KEY (run_id, fingerprint)
+            )
+        """)
+        print("✅ Created 'query_stats' table")
+
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_query_stats_script ON query_stats(script, recorded_at_utc)")
+        print("✅ Created index on 'query_stats'")
+
+        conn.commit()
+    except Exception as e:
+        print(f"⚠️ Migration 053 failed: {e}")
+        raise
@@ -0,0 +1,48 @@
+import sqlite3
+
+
+def run(conn):
+    cursor = conn.cursor()
+
+    try:
+        # Indexes behind the planner's and exporters' hot lookups (scripts/utils/check_query_plans.py
+        # plans them); trailing columns make the reads covering, so they never touch the table rows
+
+        # Favorites matching by Google filename + creation time; also covers the batch summary's
+        # (filename, created, month) mapping
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_filename_created ON assets(original_filename, date_created_utc, month)")
+        # Per-month favorites count and name list
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_month_favorite ON assets(month, google_favorite, original_filename)")
+        # Import session lookups (sequencing metadata, ignoring a session's assets)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_import_month ON assets(import_id, month)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_moment_album ON assets(MomentsAlbumName, month)")
+        print("✅ Created covering indexes on 'assets'")
+
+        # Curated / to-be-curated assets of one moment album
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_moment_exports_album_stage ON moment_exports(album_name, curation_stage, asset_id)")
+        print("✅ Created covering index on 'moment_exports'")
+
+        # Published assets of one moment, and the published flag of one asset
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_publications_moment_asset ON publications(moment_name, asset_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_publications_asset ON publications(asset_id)")
+        print("✅ Created indexes on 'publications'")
+
+        # Declared here rather than only by derived sync. A legacy imports table with duplicate
+        # (import_uuid, camera_model) rows gets it when derived sync rebuilds the table
+        try:
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_imports_uuid_model ON imports(import_uuid, camera_model)")
+            print("✅ Created unique index 'idx_imports_uuid_model' on 'imports'")
+        except sqlite3.IntegrityError:
+            print("ℹ️ 'imports' has duplicate (import_uuid, camera_model) rows. Derived sync will add idx_imports_uuid_model.")
+
+        # Row counts and index selectivity for the query planner, limited to the indexed tables:
+        # stats on ranked_assets make the planner read the mostly-NULL MomentsAlbumName index
+        # instead of the score index for the Memory flow's top-N queries
+        for table in ("assets", "imports", "moment_exports", "publications"):
+            cursor.execute(f"ANALYZE {table}")
+        print("✅ Analyzed 'assets', 'imports', 'moment_exports' and 'publications'")
+
+        conn.commit()
+    except Exception as e:
+        print(f"⚠️ Migration 054 failed: {e}")
+        raise
@@ -0,0 +1,20 @@
+def run(conn):
+    cursor = conn.cursor()
+
+    try:
+        # Single row read by the storage manager's fast path (scripts/storage_manager/storage_state.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS storage_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                schema_fingerprint TEXT,                      -- migration set hash + table/index/trigger definitions hash
+                last_integrity_check_utc TEXT,                -- last passed PRAGMA quick_check
+                clean_shutdown BOOLEAN NOT NULL DEFAULT 1     -- 0 while a storage manager session is open
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO storage_state (id) VALUES (1)")
+        print("✅ Created 'storage_state' table")
+
+        conn.commit()
+    except Exception as e:
+        print(f"⚠️ Migration 055 failed: {e}")
+        raise
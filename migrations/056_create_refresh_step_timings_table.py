@@ -0,0 +1,23 @@
+def run(conn):
+    cursor = conn.cursor()
+
+    try:
+        # Wall and CPU time of every background refresh step (scripts/refresh_step_runner.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS refresh_step_timings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_started_utc TEXT NOT NULL,
+                step_name TEXT NOT NULL,
+                mode TEXT NOT NULL,          -- 'in-process' or 'subprocess'
+                success INTEGER NOT NULL,
+                wall_seconds REAL,
+                cpu_seconds REAL,
+                error TEXT
+            )
+        """)
+        print("✅ Created 'refresh_step_timings' table")
+
+        conn.commit()
+    except Exception as e:
+        print(f"⚠️ Migration 056 failed: {e}")
+        raise
@@ -0,0 +1,45 @@
+def run(conn):
+    cursor = conn.cursor()
+
+    try:
+        # Assets excluded from continuity checks must not show up as gaps' neighbours or fill gaps
+        cursor.execute("PRAGMA table_info(camera_sequences)")
+        if "ignore_continuity_check" not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE camera_sequences ADD COLUMN ignore_continuity_check INTEGER NOT NULL DEFAULT 0")
+            print("✅ Added 'ignore_continuity_check' column to camera_sequences table")
+        else:
+            print("ℹ️ 'ignore_continuity_check' column already exists in camera_sequences table")
+
+        cursor.execute("""
+            UPDATE camera_sequences SET ignore_continuity_check = 1
+            WHERE asset_pk IN (SELECT asset_pk FROM assets WHERE ignore_continuity_check = 1)
+        """)
+        print(f"✅ Flagged {cursor.rowcount} ignored assets in camera_sequences")
+
+        # The planner flags assets directly on assets, between derived syncs
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_camera_sequences_ignore AFTER UPDATE OF ignore_continuity_check ON assets
+            BEGIN
+                UPDATE camera_sequences SET ignore_continuity_check = COALESCE(NEW.ignore_continuity_check, 0)
+                WHERE asset_pk = NEW.asset_pk;
+            END
+        """)
+        print("✅ Created trigger 'trg_camera_sequences_ignore'")
+
+        # Gap and neighbour lookups only read checked assets
+        cursor.execute("DROP INDEX IF EXISTS idx_camera_sequences_month_seq")
+        cursor.execute("DROP INDEX IF EXISTS idx_camera_sequences_created")
+        cursor.execute("""
+            CREATE INDEX idx_camera_sequences_month_seq ON camera_sequences(camera_model, month, prefix, seq)
+            WHERE ignore_continuity_check = 0
+        """)
+        cursor.execute("""
+            CREATE INDEX idx_camera_sequences_created ON camera_sequences(camera_model, prefix, created_local_datetime)
+            WHERE ignore_continuity_check = 0
+        """)
+        print("✅ Recreated 'camera_sequences' indexes over checked assets only")
+
+        conn.commit()
+    except Exception as e:
+        print(f"⚠️ Migration 057 failed: {e}")
+        raise
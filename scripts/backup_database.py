@@ -9,6 +9,7 @@ from datetime import datetime, timezone
 # Ensure project root is in path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from constants import BASE_DIR, MEDIA_ORGANIZER_DB_PATH
+from db.connections import connect
 
 BACKUPS_DIR = os.path.abspath(os.path.join(BASE_DIR, "../backups"))
 BACKUP_RETENTION_COUNT = 7
@@ -32,7 +33,7 @@ def perform_backup():
     dest_conn = None
     try:
         # 2. Open source database connection (in read-only mode to prevent any locks/writes)
-        src_conn = sqlite3.connect(f"file:{MEDIA_ORGANIZER_DB_PATH}?mode=ro", uri=True)
+        src_conn = connect(read_only=True)
         
         # 3. Open temporary destination connection
         dest_conn = sqlite3.connect(temp_backup_path)
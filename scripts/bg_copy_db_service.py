@@ -1,17 +1,22 @@
 import os
 import sys
-import json
-import socket
 import errno
-import subprocess
+import argparse
 import time
-from datetime import datetime, timezone
 
 # Setup script path imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from utils.logger import setup_logger
-from scripts.constants import APPLE_PHOTOS_DB_LOCK_PATH, APPLE_PHOTOS_DB_PATH, BG_SERVICE_LOG_PATH, BG_SERVICE_PID_PATH
+from utils.db_fingerprint import compute_fingerprint, describe_fingerprint_change, load_fingerprint, save_fingerprint
+from utils.file_watcher import create_watcher, wait_for_quiet, WatcherUnavailable
+from utils.locks import get_db_lock, describe_holder, EXCLUSIVE, LockTimeout
+from scripts.refresh_step_runner import get_refresh_steps, run_steps
+from scripts.constants import (
+    APPLE_PHOTOS_DB_LOCK_PATH, APPLE_PHOTOS_DB_PATH, BG_SERVICE_LOG_PATH, BG_SERVICE_PID_PATH, APPLE_PHOTOS_DB_FINGERPRINT_PATH,
+    BG_SERVICE_DEBOUNCE_SECONDS, BG_SERVICE_MAX_LATENCY_SECONDS, BG_SERVICE_POLL_INTERVAL_SECONDS,
+    BG_SERVICE_IDLE_RECHECK_SECONDS, BG_SERVICE_LOCK_RETRY_SECONDS
+)
 
 # Set up dedicated logger for the service
 logger = setup_logger(BG_SERVICE_LOG_PATH, "bg_copy_db_service")
@@ -48,9 +53,6 @@ def cleanup_service_pid():
     except Exception as e:
         logger.warning(f"Error cleaning up service PID file: {e}")
 
-def get_current_utc_str():
-    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-
 def is_pid_alive(pid):
     if pid is None:
         return False
@@ -63,171 +65,151 @@ def is_pid_alive(pid):
         # EPERM (Permission denied) means the process is alive but belongs to someone else
         return True
 
-def read_lock_file():
-    if not os.path.exists(APPLE_PHOTOS_DB_LOCK_PATH):
-        return None
-    try:
-        with open(APPLE_PHOTOS_DB_LOCK_PATH, "r") as f:
-            return json.load(f)
-    except Exception as e:
-        logger.warning(f"Error reading lock file: {e}")
-        return None
+def is_refresh_needed(source_db, last_fingerprint):
+    """
+    Returns (needed, reason, fingerprint). The fingerprint is taken before the refresh starts
+    and is only persisted once the refresh succeeds, so edits made mid-refresh trigger another one.
+    """
+    if not os.path.exists(source_db):
+        return False, "Source DB path not found (is the drive unmounted?)", None
 
-def write_lock_file(status, pid, started_at=None, latest_successful_refresh_utc="—"):
     try:
-        lock_data = {
-            "status": status,
-            "pid": pid,
-            "started_at": started_at,
-            "host": socket.gethostname(),
-            "latest_successful_refresh_utc": latest_successful_refresh_utc
-        }
-        with open(APPLE_PHOTOS_DB_LOCK_PATH, "w") as f:
-            json.dump(lock_data, f, indent=2)
+        fingerprint = compute_fingerprint(source_db)
     except Exception as e:
-        logger.error(f"Error writing lock file: {e}")
-
-def is_refresh_needed(last_refresh_str):
-    if not os.path.exists(APPLE_PHOTOS_DB_PATH):
-        return False, "Source DB path not found (is the drive unmounted?)"
-        
-    src_mod_time = os.path.getmtime(APPLE_PHOTOS_DB_PATH)
-    src_wal_path = APPLE_PHOTOS_DB_PATH + "-wal"
-    if os.path.exists(src_wal_path):
-        src_mod_time = max(src_mod_time, os.path.getmtime(src_wal_path))
-        
-    if not last_refresh_str or last_refresh_str == "—":
-        return True, "No prior successful refresh recorded."
-        
+        return True, f"Failed to fingerprint source DB: {e}", None
+
+    reason = describe_fingerprint_change(last_fingerprint, fingerprint)
+    if reason:
+        return True, reason, fingerprint
+    return False, "Database copy is up to date.", fingerprint
+
+def wait_for_source_change(watcher, args):
+    """
+    Blocks until the watcher reports a change to the source DB (then debounces it) or the idle
+    recheck interval passes. Returns the watcher to keep using, which is rebuilt if the
+    watched directory disappeared (e.g. the drive was unmounted).
+    """
+    source_paths = [args.source_db, args.source_db + "-wal"]
     try:
-        last_refresh_dt = datetime.strptime(last_refresh_str, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
-        last_refresh_ts = last_refresh_dt.timestamp()
-        
-        # 2.0-second tolerance threshold for filesystem comparison precision
-        if src_mod_time > (last_refresh_ts + 2.0):
-            src_utc_str = datetime.fromtimestamp(src_mod_time, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-            return True, f"Source DB modified time ({src_utc_str} UTC) is newer than last refresh ({last_refresh_str} UTC)."
-        else:
-            return False, "Database copy is up to date."
-    except Exception as e:
-        return True, f"Failed to parse last refresh time: {e}"
+        if watcher.wait(BG_SERVICE_IDLE_RECHECK_SECONDS):
+            absorbed = wait_for_quiet(watcher, args.debounce, args.max_latency)
+            logger.info(f"📝 Source DB changed ({absorbed} follow-up events coalesced).")
+        return watcher
+    except WatcherUnavailable as e:
+        logger.warning(f"⚠️ {e}. Re-creating watcher in {args.poll_interval}s...")
+        watcher.close()
+        time.sleep(args.poll_interval)
+        return create_watcher(source_paths, args.watcher, args.poll_interval, logger)
 
-def main():
+def main(args):
     logger.info("🔄 Background database copy & sync service started.")
     
     # Check if another service instance is already running
     check_and_write_service_pid()
 
-    loop_interval = 60 # Check every 60 seconds
+    source_paths = [args.source_db, args.source_db + "-wal"]
+    watcher = create_watcher(source_paths, args.watcher, args.poll_interval, logger)
+    logger.info(
+        f"👀 Watching {args.source_db} ({watcher.backend}, debounce {args.debounce}s, "
+        f"max latency {args.max_latency}s)."
+    )
+    last_fingerprint = load_fingerprint(APPLE_PHOTOS_DB_FINGERPRINT_PATH)
+    db_lock = get_db_lock()
+    # Check once at startup, then only when the watcher reports a change
+    check_now = True
     
     try:
         while True:
-            # 1. Read lock file to get latest state
-            lock = read_lock_file()
-            last_refresh_timestamp = "—"
-            status = "available"
-            lock_pid = None
-            
-            if lock:
-                last_refresh_timestamp = lock.get("latest_successful_refresh_utc", "—")
-                status = lock.get("status")
-                lock_pid = lock.get("pid")
+            if not check_now:
+                watcher = wait_for_source_change(watcher, args)
+            check_now = False
+
+            # 1. Read lock state to get the latest successful refresh
+            last_refresh_timestamp = db_lock.read_state().get("latest_successful_refresh_utc", "—")
                 
             # 2. Check if a refresh is needed
-            needed, reason = is_refresh_needed(last_refresh_timestamp)
+            needed, reason, fingerprint = is_refresh_needed(args.source_db, last_fingerprint)
             
             if needed:
-                # 3. Check if planner or executor is active
-                if status in ["planner_active", "executor_active"]:
-                    if is_pid_alive(lock_pid):
-                        friendly_name = "Planner" if status == "planner_active" else "Executor"
-                        logger.info(f"ℹ️ {friendly_name} is currently active (PID: {lock_pid}). Delaying database refresh...")
-                        time.sleep(loop_interval)
-                        continue
-                    else:
-                        logger.warning(f"⚠️ Found stale {status} lock from dead PID {lock_pid}. Overriding lock.")
-                
-                # 4. Acquire Lock
-                current_pid = os.getpid()
-                start_time_str = get_current_utc_str()
+                if args.dry_run:
+                    logger.info(f"🧪 Dry run: refresh needed ({reason}). Skipping lock and steps.")
+                    last_fingerprint = fingerprint
+                    continue
+
+                # 3. Acquire the exclusive lock, waiting for planner sessions and the executor to finish
                 logger.info(f"🔐 Refresh needed: {reason}")
                 logger.info("🔐 Acquiring lock...")
-                write_lock_file(
-                    status="refreshing",
-                    pid=current_pid,
-                    started_at=start_time_str,
-                    latest_successful_refresh_utc=last_refresh_timestamp
-                )
-                
-                # 5. Execute processing sequence
-                script_dir = os.path.dirname(os.path.abspath(__file__))
-                steps = [
-                    ("0.1 Storage Manager Migrations", ["storage_manager_main.py", "--migrate"]),
-                    ("0.2 Sync Raw Assets", ["sync_photos_raw.py"]),
-                    ("0.3 Sync Derived Metadata", ["sync_photos_derived.py", "--force"])
-                ]
-                
-                success = True
-                sync_start_time = time.time()
-                for step_name, args in steps:
-                    script_path = os.path.join(script_dir, args[0])
-                    logger.info(f"🚀 Running step: {step_name}")
-                    
-                    try:
-                        p = subprocess.Popen(
-                            [sys.executable, script_path] + args[1:],
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.STDOUT,
-                            text=True,
-                            bufsize=1
-                        )
-                        
-                        for line in p.stdout:
-                            logger.info(line.rstrip('\r\n'))
-                            
-                        p.wait()
-                        
-                        if p.returncode != 0:
-                            logger.error(f"❌ Step failed: {step_name} (Exit code {p.returncode})")
-                            success = False
-                            break
-                        logger.info(f"✅ Step completed successfully: {step_name}")
-                    except Exception as step_err:
-                        logger.error(f"❌ Execution exception in step {step_name}: {step_err}")
-                        success = False
-                        break
-
-                # 6. Release Lock
-                logger.info("🔓 Releasing lock...")
-                if success:
-                    last_refresh_timestamp = get_current_utc_str()
-                    elapsed = time.time() - sync_start_time
-                    logger.info(f"🎉 Database refresh and metadata sync completed successfully in {elapsed:.2f} seconds.")
-                else:
-                    logger.error("⚠️ Database copy and sync pipeline failed.")
+                try:
+                    db_lock.acquire(
+                        EXCLUSIVE, "refreshing",
+                        timeout=BG_SERVICE_LOCK_RETRY_SECONDS,
+                        on_wait=lambda state: logger.info(f"ℹ️ {describe_holder(state)} is currently active. Waiting for lock release...")
+                    )
+                except LockTimeout:
+                    logger.info(f"ℹ️ Lock still held after {BG_SERVICE_LOCK_RETRY_SECONDS}s. Delaying database refresh...")
+                    check_now = True
+                    continue
+                except OSError as e:
+                    logger.error(f"❌ Cannot open lock file {APPLE_PHOTOS_DB_LOCK_PATH}: {e}")
+                    time.sleep(BG_SERVICE_LOCK_RETRY_SECONDS)
+                    check_now = True
+                    continue
                 
-                write_lock_file(
-                    status="available",
-                    pid=None,
-                    latest_successful_refresh_utc=last_refresh_timestamp
-                )
+                success = False
+                try:
+                    # 4. Execute processing sequence
+                    sync_start_time = time.time()
+                    success, _ = run_steps(get_refresh_steps(), logger, mode=args.step_mode)
+
+                    if success:
+                        db_lock.record_successful_refresh()
+                        if fingerprint:
+                            last_fingerprint = fingerprint
+                            try:
+                                save_fingerprint(APPLE_PHOTOS_DB_FINGERPRINT_PATH, fingerprint)
+                            except Exception as e:
+                                logger.warning(f"⚠️ Failed to save source DB fingerprint: {e}")
+                        elapsed = time.time() - sync_start_time
+                        logger.info(f"🎉 Database refresh and metadata sync completed successfully in {elapsed:.2f} seconds.")
+                    else:
+                        logger.error(f"⚠️ Database copy and sync pipeline failed. Retrying in {BG_SERVICE_LOCK_RETRY_SECONDS}s...")
+                finally:
+                    # 5. Release Lock
+                    logger.info("🔓 Releasing lock...")
+                    db_lock.release()
+
+                # A failure can be transient (locked DB, drive unmounted mid-copy), so retry without
+                # waiting for Photos to write again
+                if not success:
+                    time.sleep(BG_SERVICE_LOCK_RETRY_SECONDS)
+                    check_now = True
             else:
-                logger.info(f"💤 Database copy is up to date (Last sync: {last_refresh_timestamp}). Sleeping {loop_interval}s...")
-                
-            time.sleep(loop_interval)
+                logger.info(f"💤 {reason} (Last sync: {last_refresh_timestamp}). Waiting for changes...")
             
     except KeyboardInterrupt:
         logger.info("🛑 Background service stopped by user.")
-        # Ensure we release lock if we hold it
-        lock = read_lock_file()
-        if lock and lock.get("pid") == os.getpid() and lock.get("status") == "refreshing":
+        # The OS drops the flock on exit; releasing here also resets the lock state
+        if db_lock.mode:
             logger.info("🔓 Releasing lock before exit...")
-            write_lock_file(
-                status="available",
-                pid=None,
-                latest_successful_refresh_utc=lock.get("latest_successful_refresh_utc", "—")
-            )
+            db_lock.release()
         return 0
+    finally:
+        watcher.close()
 
 if __name__ == "__main__":
-    sys.exit(main())
+    parser = argparse.ArgumentParser(description="Watch the Apple Photos DB and refresh the local copy and metadata when it changes.")
+    parser.add_argument("--debounce", type=float, default=BG_SERVICE_DEBOUNCE_SECONDS,
+                        help="Seconds of quiet required after a change before refreshing")
+    parser.add_argument("--max-latency", type=float, default=BG_SERVICE_MAX_LATENCY_SECONDS,
+                        help="Upper bound in seconds between the first change and the refresh, even if writes keep coming")
+    parser.add_argument("--poll-interval", type=float, default=BG_SERVICE_POLL_INTERVAL_SECONDS,
+                        help="Stat interval in seconds for the polling watcher")
+    parser.add_argument("--watcher", choices=["auto", "inotify", "polling"], default="auto",
+                        help="Change watcher backend (auto uses inotify where available)")
+    parser.add_argument("--source-db", default=APPLE_PHOTOS_DB_PATH,
+                        help="Database file to watch (defaults to the Apple Photos DB)")
+    parser.add_argument("--step-mode", choices=["in-process", "subprocess"], default="in-process",
+                        help="Run refresh steps in this process over one shared connection, or as isolated subprocesses")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Log detected refreshes without taking the lock or running the steps")
+    sys.exit(main(parser.parse_args()))
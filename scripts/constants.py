@@ -21,9 +21,23 @@ MOMENTS_EXPORT_DIR = TO_BE_CURATED_DIR
 
 APPLE_PHOTOS_DB_COPY_PATH = "/Volumes/Macintosh HD/Users/nickolaycohen/Photos Library DB/All-Media-Extreme/database/Photos.sqlite"
 APPLE_PHOTOS_DB_MARKER = APPLE_PHOTOS_DB_COPY_PATH + ".lastcopy"
+APPLE_PHOTOS_DB_BLOCK_MANIFEST = APPLE_PHOTOS_DB_COPY_PATH + ".blocks.json"
+APPLE_PHOTOS_DB_FINGERPRINT_PATH = APPLE_PHOTOS_DB_COPY_PATH + ".fingerprint"
 APPLE_PHOTOS_DB_LOCK_PATH = APPLE_PHOTOS_DB_COPY_PATH + ".lock"
+APPLE_PHOTOS_DB_LOCK_STATE_PATH = APPLE_PHOTOS_DB_COPY_PATH + ".lock.json"
+APPLE_PHOTOS_DB_PLANNER_LOCK_PATH = APPLE_PHOTOS_DB_COPY_PATH + ".planner.lock"
+APPLE_PHOTOS_DB_PLANNER_LOCK_STATE_PATH = APPLE_PHOTOS_DB_COPY_PATH + ".planner.lock.json"
 BG_SERVICE_PID_PATH = APPLE_PHOTOS_DB_COPY_PATH + ".service.pid"
 
+# Photos DB Copy Settings
+# Delta copies compare the source in fixed-size blocks. The block size must be a
+# multiple of the SQLite page size (any power of two up to 64 KiB divides 1 MiB).
+DELTA_COPY_BLOCK_SIZE = 1024 * 1024
+# Snapshot copies use the SQLite online backup API. Smaller steps release the source
+# read lock more often; -1 copies the whole database in a single step.
+SNAPSHOT_BACKUP_PAGES_PER_STEP = 4096
+SNAPSHOT_PROGRESS_LOG_INTERVAL = 5  # seconds between progress log lines
+
 
 # Scoring Weights
 AESTHETIC_SCORE_WEIGHT = 0.875
@@ -34,6 +48,48 @@ APPLE_FEATURED_WEIGHT = 0.15
 # Syncing Settings
 MAX_RETRIES = 5
 RETRY_DELAY = 30
+# Parallel raw sync: tables are diffed concurrently into per-table staging files,
+# then swapped into the Media Organizer DB in one transaction
+RAW_SYNC_PARALLEL_WORKERS = 4
+RAW_SYNC_STAGING_DIR = os.path.join(BASE_DIR, '../db/raw_sync_staging')
+# Rows per fetchmany() chunk when derived sync streams assets through Python
+DERIVED_SYNC_FETCH_CHUNK_SIZE = 5000
+# Time zone (IANA name, e.g. 'Europe/Sofia') that local dates and months of assets and imports
+# are computed in. None uses the zone of the machine running the sync.
+PIPELINE_TIMEZONE = None
+# PRAGMAs applied by db/connections.py to every Media Organizer DB connection. journal_mode is
+# skipped on read-only connections.
+DB_CONNECTION_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 30000,
+    "temp_store": "MEMORY",
+    "cache_size": -65536,        # KiB when negative: 64 MiB
+    "mmap_size": 268435456,      # 256 MiB of the file read through the page cache map
+}
+# mmap window of the attached Photos.sqlite (db/photos_snapshot.py). Read-only, so the whole
+# library database can be mapped; SQLite caps it at its compile-time SQLITE_MAX_MMAP_SIZE.
+PHOTOS_SNAPSHOT_MMAP_SIZE = 2147418112   # ~2 GiB
+
+# Query instrumentation (db/query_stats.py): opt-in with MEDIA_ORGANIZER_QUERY_STATS=1. Per-statement
+# totals go to the query_stats table (scripts/utils/query_stats_report.py ranks them); statements
+# slower than QUERY_STATS_SLOW_MS are also written to QUERY_SLOW_LOG_PATH.
+QUERY_STATS_ENABLED = os.environ.get("MEDIA_ORGANIZER_QUERY_STATS") == "1"
+QUERY_STATS_SLOW_MS = 500
+QUERY_STATS_PROGRESS_STEPS = 1000        # SQLite VM instructions between progress handler calls
+QUERY_SLOW_LOG_PATH = os.path.join(BASE_DIR, '../logs/slow_queries.log')
+
+# Storage manager (scripts/storage_manager/storage_state.py): PRAGMA quick_check runs when the
+# last passed check is older than this, after an unclean shutdown, or with --integrity-check
+STORAGE_INTEGRITY_CHECK_INTERVAL_HOURS = 24
+
+# Background Service Settings
+BG_SERVICE_DEBOUNCE_SECONDS = 5          # quiet period that coalesces a burst of WAL writes
+BG_SERVICE_MAX_LATENCY_SECONDS = 120     # refresh at most this long after the first change, even mid-burst
+BG_SERVICE_POLL_INTERVAL_SECONDS = 5     # stat interval when inotify is unavailable (e.g. macOS)
+BG_SERVICE_IDLE_RECHECK_SECONDS = 3600   # fingerprint check without any event, as a safety net
+BG_SERVICE_LOCK_RETRY_SECONDS = 60       # how long a refresh waits for planner/executor lock holders before re-checking
+DB_LOCK_WAIT_TIMEOUT_SECONDS = 4 * 3600   # how long the executor/uploader wait for the DB lock (a full refresh can take hours)
 
 # Upload Settings
 MAX_UPLOAD_FILE_SIZE_MB = 50
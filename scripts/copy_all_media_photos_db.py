@@ -1,27 +1,208 @@
 import os
+import json
 import shutil
+import hashlib
+import argparse
 import logging
 import sqlite3
 import sys
 import subprocess
 import time
 from datetime import datetime
+from urllib.parse import quote
 
-from constants import MEDIA_ORGANIZER_DB_PATH, APPLE_PHOTOS_DB_PATH, APPLE_PHOTOS_DB_COPY_PATH, APPLE_PHOTOS_DB_MARKER
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.db_fingerprint import compute_fingerprint, describe_fingerprint_change
+from constants import (
+    APPLE_PHOTOS_DB_PATH, APPLE_PHOTOS_DB_COPY_PATH, APPLE_PHOTOS_DB_MARKER,
+    APPLE_PHOTOS_DB_BLOCK_MANIFEST, DELTA_COPY_BLOCK_SIZE, SNAPSHOT_BACKUP_PAGES_PER_STEP,
+    SNAPSHOT_PROGRESS_LOG_INTERVAL
+)
+from db.connections import connect
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [copy_all_media_photos_db] - %(message)s")
 
 def read_marker():
+    """
+    Returns (src_time, fingerprint) recorded by the last successful copy.
+    Markers written before fingerprints were introduced only hold the source mtime.
+    """
     if not os.path.exists(APPLE_PHOTOS_DB_MARKER):
-        return 0
+        return 0, None
     with open(APPLE_PHOTOS_DB_MARKER, "r") as f:
-        return float(f.read().strip())
+        content = f.read().strip()
+    try:
+        marker = json.loads(content)
+    except ValueError:
+        marker = None
+    if isinstance(marker, dict):
+        return float(marker.get("src_time", 0)), marker.get("fingerprint")
+    try:
+        return float(content), None
+    except ValueError:
+        return 0, None
 
-def write_marker(src_time):
+def write_marker(src_time, fingerprint):
     with open(APPLE_PHOTOS_DB_MARKER, "w") as f:
-        f.write(str(src_time))
+        json.dump({"src_time": src_time, "fingerprint": fingerprint}, f, indent=2)
+
+def read_block_manifest(dest_path):
+    """
+    Loads the per-block digest manifest written by the last delta copy.
+    Returns None when the manifest is missing, was built with a different block size,
+    or the destination file was touched since the manifest was written.
+    """
+    if not os.path.exists(APPLE_PHOTOS_DB_BLOCK_MANIFEST) or not os.path.exists(dest_path):
+        return None
+    try:
+        with open(APPLE_PHOTOS_DB_BLOCK_MANIFEST, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"⚠️ Ignoring unreadable block manifest: {e}")
+        return None
+
+    dest_stat = os.stat(dest_path)
+    if (
+        manifest.get("block_size") != DELTA_COPY_BLOCK_SIZE
+        or manifest.get("dest_size") != dest_stat.st_size
+        or manifest.get("dest_mtime_ns") != dest_stat.st_mtime_ns
+    ):
+        logging.info("Block manifest does not match the current copy. All blocks will be rewritten.")
+        return None
+    return manifest
+
+def write_block_manifest(dest_path, source_size, digests):
+    dest_stat = os.stat(dest_path)
+    manifest = {
+        "block_size": DELTA_COPY_BLOCK_SIZE,
+        "source_size": source_size,
+        "dest_size": dest_stat.st_size,
+        "dest_mtime_ns": dest_stat.st_mtime_ns,
+        "blocks": digests,
+    }
+    tmp_path = APPLE_PHOTOS_DB_BLOCK_MANIFEST + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, APPLE_PHOTOS_DB_BLOCK_MANIFEST)
+
+def invalidate_block_manifest():
+    if os.path.exists(APPLE_PHOTOS_DB_BLOCK_MANIFEST):
+        try:
+            os.remove(APPLE_PHOTOS_DB_BLOCK_MANIFEST)
+        except OSError as e:
+            logging.warning(f"Could not remove block manifest {APPLE_PHOTOS_DB_BLOCK_MANIFEST}: {e}")
+
+def read_wal_dirty_blocks(wal_path):
+    """
+    Returns the indexes of the delta-copy blocks touched by the valid frames of a WAL file.
+    These are the blocks a checkpoint of the copy will rewrite in the main file.
+    """
+    blocks = set()
+    if not os.path.exists(wal_path):
+        return blocks
+    with open(wal_path, "rb") as f:
+        header = f.read(32)
+        if len(header) < 32:
+            return blocks
+        page_size = int.from_bytes(header[8:12], "big")
+        salt = header[16:24]
+        while True:
+            frame_header = f.read(24)
+            # Frames left over from before the last WAL reset carry stale salts
+            if len(frame_header) < 24 or frame_header[8:16] != salt:
+                break
+            page_number = int.from_bytes(frame_header[0:4], "big")
+            blocks.add((page_number - 1) * page_size // DELTA_COPY_BLOCK_SIZE)
+            f.seek(page_size, os.SEEK_CUR)
+    return blocks
+
+def delta_copy_db_file(src_path, dest_path, manifest):
+    """
+    Copies src_path onto dest_path in DELTA_COPY_BLOCK_SIZE blocks, only rewriting
+    blocks whose digest differs from the manifest of the previous copy.
+    Returns (digests, blocks_written).
+    """
+    previous = manifest["blocks"] if manifest else []
+    digests = []
+    blocks_written = 0
+    mode = "r+b" if os.path.exists(dest_path) else "w+b"
+
+    with open(src_path, "rb") as src, open(dest_path, mode) as dest:
+        index = 0
+        while True:
+            block = src.read(DELTA_COPY_BLOCK_SIZE)
+            if not block:
+                break
+            digest = hashlib.blake2b(block, digest_size=16).hexdigest()
+            if index >= len(previous) or previous[index] != digest:
+                dest.seek(index * DELTA_COPY_BLOCK_SIZE)
+                dest.write(block)
+                blocks_written += 1
+            digests.append(digest)
+            index += 1
+        dest.truncate(src.tell())
+        dest.flush()
+        os.fsync(dest.fileno())
+
+    return digests, blocks_written
+
+def perform_backup_snapshot(src_path, dest_path, pages_per_step=SNAPSHOT_BACKUP_PAGES_PER_STEP):
+    """
+    Writes a transactionally consistent snapshot of src_path to dest_path using the SQLite
+    online backup API. The source is opened read-only and the snapshot is switched to a
+    rollback journal, so the copy has no WAL and needs no integrity scan afterwards.
+    The snapshot is built next to the destination and moved into place once complete.
+    """
+    snapshot_path = dest_path + ".snapshot"
+    for suffix in ["", "-journal"]:
+        if os.path.exists(snapshot_path + suffix):
+            os.remove(snapshot_path + suffix)
+
+    start_time = time.time()
+    last_log_time = start_time
+
+    def report_progress(status, remaining, total):
+        nonlocal last_log_time
+        now = time.time()
+        if remaining and now - last_log_time < SNAPSHOT_PROGRESS_LOG_INTERVAL:
+            return
+        last_log_time = now
+        copied = total - remaining
+        elapsed = max(now - start_time, 1e-6)
+        percent = (copied / total * 100) if total else 100.0
+        logging.info(f"Snapshot progress: {copied}/{total} pages ({percent:.1f}%), {copied / elapsed:,.0f} pages/s")
+
+    src_conn = None
+    dest_conn = None
+    try:
+        src_conn = sqlite3.connect(f"file:{quote(src_path)}?mode=ro", uri=True)
+        dest_conn = sqlite3.connect(snapshot_path)
+        src_conn.backup(dest_conn, pages=pages_per_step, progress=report_progress)
+        # The backup carries over the source's WAL flag; the snapshot is a standalone file
+        dest_conn.execute("PRAGMA journal_mode = DELETE;")
+        page_count = dest_conn.execute("PRAGMA page_count;").fetchone()[0]
+    finally:
+        if dest_conn:
+            dest_conn.close()
+        if src_conn:
+            src_conn.close()
+
+    # Drop the previous copy's WAL/SHM before the swap so they are never applied to the new snapshot
+    for suffix in ["-wal", "-shm"]:
+        if os.path.exists(dest_path + suffix):
+            os.remove(dest_path + suffix)
+    os.replace(snapshot_path, dest_path)
+
+    elapsed = time.time() - start_time
+    logging.info(f"✅ Snapshot of {page_count} pages written in {elapsed:.1f}s ({page_count / max(elapsed, 1e-6):,.0f} pages/s).")
+    return page_count
 
 def perform_direct_copy_and_repair(dest_path):
+    """
+    Returns "clean" when the copy passed quick_check untouched, "repaired" when it had to be
+    reindexed or recovered, and False when it could not be made healthy.
+    """
     logging.info("Checking integrity of database copy...")
     conn = None
     try:
@@ -35,7 +216,7 @@ def perform_direct_copy_and_repair(dest_path):
         if len(errors) == 1 and errors[0] == "ok":
             logging.info("✅ Copy is clean. No repair needed.")
             conn.close()
-            return True
+            return "clean"
             
         logging.warning(f"Integrity check found {len(errors)} issues. Attempting to repair index issues...")
         reindexed = set()
@@ -64,7 +245,7 @@ def perform_direct_copy_and_repair(dest_path):
             if len(post_errors) == 1 and post_errors[0] == "ok":
                 logging.info("✅ Copy is now healthy after REINDEX.")
                 conn.close()
-                return True
+                return "repaired"
             else:
                 logging.error(f"❌ Copy still has integrity issues: {post_errors[:10]}")
                 conn.close()
@@ -129,7 +310,7 @@ def perform_direct_copy_and_repair(dest_path):
             # Move recovered DB to dest_path
             shutil.move(recovered_path, dest_path)
             logging.info("✅ Successfully replaced copied database with recovered database.")
-            return True
+            return "repaired"
         else:
             logging.error(f"❌ Recovered database still has integrity issues: {rec_errors[:10]}")
             return False
@@ -143,7 +324,7 @@ def perform_direct_copy_and_repair(dest_path):
                 pass
         return False
 
-def main():
+def main(mode="snapshot", pages_per_step=SNAPSHOT_BACKUP_PAGES_PER_STEP):
     if not os.path.exists(APPLE_PHOTOS_DB_PATH):
         logging.error(f"Source DB not found: {APPLE_PHOTOS_DB_PATH}")
         return 1
@@ -156,30 +337,54 @@ def main():
     if os.path.exists(src_wal_path):
         src_time = max(src_time, os.path.getmtime(src_wal_path))
 
-    # Check the modification time of the existing copy to be more resilient
+    # The copy's mtime is pinned to the source's after every copy, so a mismatch means the copy was modified or replaced
     dest_exists = os.path.exists(APPLE_PHOTOS_DB_COPY_PATH)
     dest_time = os.path.getmtime(APPLE_PHOTOS_DB_COPY_PATH) if dest_exists else 0
 
-    last_copied = read_marker()
-    
-    # We use a 2.0-second tolerance threshold for timestamp comparison to account
+    last_copied, last_fingerprint = read_marker()
+
+    # Fingerprint the source before copying so changes made while copying are picked up next run
+    src_fingerprint = compute_fingerprint(APPLE_PHOTOS_DB_PATH)
+    change_reason = describe_fingerprint_change(last_fingerprint, src_fingerprint)
+
+    # We use a 2.0-second tolerance threshold for the copy's timestamp to account
     # for different filesystem precisions (e.g. FAT32/exFAT vs APFS) and float representation.
     copy_needed = (
         not dest_exists
-        or last_copied == 0
-        or src_time > (last_copied + 2.0)
-        or abs(src_time - dest_time) > 2.0
+        or change_reason is not None
+        or abs(last_copied - dest_time) > 2.0
     )
 
     if copy_needed:
+        logging.info(f"Copy needed: {change_reason or 'destination copy is missing or was modified.'}")
         max_copy_attempts = 3
         copy_success = False
-        
+        manifest = read_block_manifest(APPLE_PHOTOS_DB_COPY_PATH) if mode == "delta" else None
+        # The manifest is only trusted again once a clean delta copy rewrites it
+        invalidate_block_manifest()
+        digests = None
+        source_size = 0
+
         for attempt in range(1, max_copy_attempts + 1):
-            logging.info(f"Copying DB from {APPLE_PHOTOS_DB_PATH} to {APPLE_PHOTOS_DB_COPY_PATH} (Attempt {attempt}/{max_copy_attempts})...")
+            logging.info(f"Copying DB from {APPLE_PHOTOS_DB_PATH} to {APPLE_PHOTOS_DB_COPY_PATH} ({mode} mode, Attempt {attempt}/{max_copy_attempts})...")
             
-            # Clean up any stale destination files to avoid conflict
-            for suffix in ["", "-wal", "-shm"]:
+            if mode == "snapshot":
+                # The backup API reads a consistent view of the source, so there is nothing to repair
+                try:
+                    perform_backup_snapshot(APPLE_PHOTOS_DB_PATH, APPLE_PHOTOS_DB_COPY_PATH, pages_per_step)
+                    copy_success = True
+                    break
+                except Exception as e:
+                    logging.warning(f"⚠️ Snapshot backup failed on attempt {attempt}: {e}")
+                if attempt < max_copy_attempts:
+                    logging.info("Waiting 5 seconds before retrying...")
+                    time.sleep(5)
+                continue
+
+            # Clean up any stale destination files to avoid conflict.
+            # Delta mode keeps the main file so unchanged blocks are not rewritten.
+            stale_suffixes = ["-wal", "-shm"] if mode == "delta" else ["", "-wal", "-shm"]
+            for suffix in stale_suffixes:
                 stale_file = APPLE_PHOTOS_DB_COPY_PATH + suffix
                 if os.path.exists(stale_file):
                     try:
@@ -189,24 +394,47 @@ def main():
 
             try:
                 # 1. Direct copy of main DB file (filesystem-level read only, no SQLite connections or locks)
-                shutil.copy2(APPLE_PHOTOS_DB_PATH, APPLE_PHOTOS_DB_COPY_PATH)
-                logging.info(f"Copied main DB file to {APPLE_PHOTOS_DB_COPY_PATH}")
+                if mode == "delta":
+                    copy_start = time.time()
+                    digests, blocks_written = delta_copy_db_file(APPLE_PHOTOS_DB_PATH, APPLE_PHOTOS_DB_COPY_PATH, manifest)
+                    source_size = os.path.getsize(APPLE_PHOTOS_DB_COPY_PATH)
+                    logging.info(
+                        f"Delta copy rewrote {blocks_written}/{len(digests)} blocks "
+                        f"({blocks_written * DELTA_COPY_BLOCK_SIZE / (1024 * 1024):.1f} MiB) in {time.time() - copy_start:.1f}s"
+                    )
+                else:
+                    shutil.copy2(APPLE_PHOTOS_DB_PATH, APPLE_PHOTOS_DB_COPY_PATH)
+                    logging.info(f"Copied main DB file to {APPLE_PHOTOS_DB_COPY_PATH}")
                 
                 # 2. Direct copy of WAL if present (avoid copying the -shm index as it is a memory-mapped index)
+                dest_wal_path = APPLE_PHOTOS_DB_COPY_PATH + "-wal"
                 if os.path.exists(src_wal_path):
-                    dest_wal_path = APPLE_PHOTOS_DB_COPY_PATH + "-wal"
                     shutil.copy2(src_wal_path, dest_wal_path)
                     logging.info(f"Copied WAL file to {dest_wal_path}")
 
+                if digests is not None:
+                    # Opening the copy checkpoints its WAL into the main file, so the blocks
+                    # holding WAL pages no longer match the source and must be rewritten next time.
+                    for block_index in read_wal_dirty_blocks(dest_wal_path):
+                        if block_index < len(digests):
+                            digests[block_index] = None
+
                 # 3. Verify physical integrity and repair index issues locally on the destination SSD copy
                 success = perform_direct_copy_and_repair(APPLE_PHOTOS_DB_COPY_PATH)
                 if success:
                     copy_success = True
+                    if success != "clean":
+                        # A repaired copy no longer mirrors the source block for block
+                        digests = None
                     break
                 else:
                     logging.warning(f"⚠️ Copy verification/repair failed on attempt {attempt}.")
             except Exception as e:
                 logging.warning(f"⚠️ Direct copy failed on attempt {attempt}: {e}")
+
+            # A failed attempt leaves the copy in an unknown state; rewrite every block on retry
+            manifest = None
+            digests = None
             
             if attempt < max_copy_attempts:
                 logging.info("Waiting 5 seconds before retrying...")
@@ -221,13 +449,18 @@ def main():
             os.utime(APPLE_PHOTOS_DB_COPY_PATH, (src_time, src_time))
         except Exception as utime_err:
             logging.warning(f"Failed to update modification time: {utime_err}")
-        write_marker(src_time)
+        if digests is not None:
+            try:
+                write_block_manifest(APPLE_PHOTOS_DB_COPY_PATH, source_size, digests)
+            except Exception as manifest_err:
+                logging.warning(f"Failed to write block manifest: {manifest_err}")
+        write_marker(src_time, src_fingerprint)
         logging.info("✅ Copy and verification complete.")
 
         # Record the update in the media organizer DB
         conn = None
         try:
-            conn = sqlite3.connect(MEDIA_ORGANIZER_DB_PATH)
+            conn = connect()
             cursor = conn.cursor()
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS db_updates (
@@ -249,8 +482,26 @@ def main():
             if conn:
                 conn.close()
     else:
-        logging.info("No copy needed. Destination DB is up-to-date.")
+        logging.info("No copy needed. Source content is unchanged since the last copy.")
     return 0
 
 if __name__ == "__main__":
-    exit(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Refresh the local copy of the Apple Photos database.")
+    parser.add_argument(
+        "--mode",
+        choices=["snapshot", "delta", "full"],
+        default="snapshot",
+        help=(
+            "snapshot: consistent copy through the SQLite backup API (default); "
+            "delta: rewrite only the file blocks that changed since the last copy; "
+            "full: copy the whole file"
+        )
+    )
+    parser.add_argument(
+        "--pages-per-step",
+        type=int,
+        default=SNAPSHOT_BACKUP_PAGES_PER_STEP,
+        help="Pages copied per backup step in snapshot mode (-1 copies everything in one step)"
+    )
+    args = parser.parse_args()
+    exit(main(mode=args.mode, pages_per_step=args.pages_per_step))
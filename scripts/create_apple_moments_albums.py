@@ -1,6 +1,5 @@
 import os
 import sys
-import sqlite3
 import subprocess
 from pathlib import Path
 
@@ -9,6 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from utils.logger import setup_logger
 from constants import MEDIA_ORGANIZER_DB_PATH, LOG_PATH, APPLE_SCRIPT_LOG_PATH, MOMENTS_EXPORT_DIR
+from db.connections import connect
 
 MODULE_TAG = "apple_moments_sync"
 logger = setup_logger(LOG_PATH, MODULE_TAG)
@@ -299,7 +299,7 @@ def main():
         logger.error(f"Database not found at {MEDIA_ORGANIZER_DB_PATH}")
         sys.exit(1)
 
-    conn = sqlite3.connect(MEDIA_ORGANIZER_DB_PATH)
+    conn = connect()
     cursor = conn.cursor()
 
     # Fetch all skipped asset IDs from the global SkipPublishing album
@@ -312,7 +312,7 @@ def main():
     # and have a suggested Moment name assigned by the pipeline.
     query = """
         SELECT v.asset_id, v.MomentsAlbumName, v.score_normalized, me.asset_id
-        FROM ranked_assets_view v
+        FROM ranked_assets v
         JOIN month_batches mb ON v.month = mb.month
         LEFT JOIN moment_exports me ON v.asset_id = me.asset_id AND me.curation_stage = 'to_be_curated'
         WHERE mb.status_code >= '600'
@@ -401,7 +401,7 @@ def main():
         min_curated_score = None
         if curated_uuids:
             placeholders = ",".join(["?"] * len(curated_uuids))
-            cursor.execute(f"SELECT score_normalized FROM ranked_assets_view WHERE asset_id IN ({placeholders})", list(curated_uuids))
+            cursor.execute(f"SELECT score_normalized FROM ranked_assets WHERE asset_id IN ({placeholders})", list(curated_uuids))
             scores = [row[0] for row in cursor.fetchall() if row[0] is not None]
             if scores:
                 min_curated_score = min(scores)
@@ -1,11 +1,11 @@
 import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-import sqlite3
 import logging
 from collections import defaultdict
 from pathlib import Path
-from constants import STAGING_ROOT as STAGING_ROOT_STR, MEDIA_ORGANIZER_DB_PATH, LOG_PATH
+from constants import STAGING_ROOT as STAGING_ROOT_STR, LOG_PATH
+from db.connections import connect
 from pathlib import Path
 STAGING_ROOT = Path(STAGING_ROOT_STR)
 #
@@ -66,8 +66,7 @@ def deduplicate_files(file_groups):
 
 def update_batch_asset_count(staging_path, retained_count):
     month = Path(staging_path).name
-    conn = sqlite3.connect(MEDIA_ORGANIZER_DB_PATH)
-    conn.execute("PRAGMA busy_timeout = 5000")
+    conn = connect(busy_timeout=5000)
     cursor = conn.cursor()
     cursor.execute("UPDATE month_batches SET assets_count = ? WHERE month = ?", (retained_count, month))
     conn.commit()
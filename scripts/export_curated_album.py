@@ -1,6 +1,5 @@
 import os
 import sys
-import sqlite3
 import subprocess
 import argparse
 
@@ -9,6 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from utils.logger import setup_logger
 from constants import MEDIA_ORGANIZER_DB_PATH, LOG_PATH, CURATED_LACIE_DIR
+from db.connections import connect
 
 MODULE_TAG = "export_curated_album"
 logger = setup_logger(LOG_PATH, MODULE_TAG)
@@ -165,7 +165,7 @@ def main():
         logger.error(f"Database not found at {MEDIA_ORGANIZER_DB_PATH}")
         sys.exit(1)
 
-    conn = sqlite3.connect(MEDIA_ORGANIZER_DB_PATH)
+    conn = connect()
     cursor = conn.cursor()
 
     try:
@@ -1,6 +1,5 @@
 import os
 import sys
-import sqlite3
 import shutil
 from pathlib import Path
 
@@ -9,6 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from utils.logger import setup_logger
 from constants import MEDIA_ORGANIZER_DB_PATH, TO_BE_CURATED_DIR, STAGING_ROOT, LOG_PATH
+from db.connections import connect
 
 MODULE_TAG = "export_moments"
 logger = setup_logger(LOG_PATH, MODULE_TAG)
@@ -20,14 +20,14 @@ def main():
         logger.error(f"Database not found at {MEDIA_ORGANIZER_DB_PATH}")
         sys.exit(1)
 
-    conn = sqlite3.connect(MEDIA_ORGANIZER_DB_PATH)
+    conn = connect()
     cursor = conn.cursor()
 
-    # Query from view, sorted by total score descending
-    # MomentName is mapped to MomentsAlbumName in the view
+    # Query ranked assets, sorted by the indexed total score descending
+    # MomentName is mapped to MomentsAlbumName in ranked_assets
     query = """
         SELECT v.original_filename, v.month, v.MomentsAlbumName, v.score_normalized
-        FROM ranked_assets_view v
+        FROM ranked_assets v
         JOIN month_batches mb ON v.month = mb.month
         WHERE mb.status_code >= '600'
         ORDER BY v.score_normalized DESC;
@@ -1,10 +1,10 @@
 import os
-import sqlite3
 import argparse
 import subprocess
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from constants import MEDIA_ORGANIZER_DB_PATH, LOG_PATH
+from constants import LOG_PATH
+from db.connections import connect
 from utils.logger import setup_logger, close_logger
 from utils.utils import set_batch_status
 
@@ -26,7 +26,7 @@ def run_applescript_export(month, logger, dry_run=False):
 
 def main(month, dry_run=False, session_id=None):
     logger = setup_logger(LOG_PATH, MODULE_TAG)
-    conn = sqlite3.connect(MEDIA_ORGANIZER_DB_PATH)
+    conn = connect()
     cursor = conn.cursor()
 
     try:
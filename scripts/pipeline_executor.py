@@ -9,20 +9,16 @@ import logging
 from db.queries import get_next_code
 from utils.utils import set_batch_status
 from utils.logger import setup_logger
-from constants import LOG_PATH, APPLE_PHOTOS_DB_COPY_PATH, APPLE_PHOTOS_DB_LOCK_PATH
-import json
-import socket
-import errno
+from constants import LOG_PATH, APPLE_PHOTOS_DB_COPY_PATH
 import sqlite3
 from uuid import uuid4
-import time
-from datetime import datetime, timedelta
+from datetime import timedelta
 import tzlocal
-from datetime import timezone
 from dataclasses import dataclass
 from typing import List
 import atexit
 from db.connections import get_connection, get_cursor, commit, close as close_conn
+from utils.locks import acquire_db_lock, release_db_lock
 
 LOCK_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), "../db/executor.lock"))
 
@@ -57,82 +53,6 @@ def release_lock():
     except Exception as e:
         logger.warning(f"Failed to release lock file: {e}")
 
-def read_lock_file():
-    if not os.path.exists(APPLE_PHOTOS_DB_LOCK_PATH):
-        return None
-    try:
-        with open(APPLE_PHOTOS_DB_LOCK_PATH, "r") as f:
-            return json.load(f)
-    except Exception:
-        return None
-
-def write_lock_file(status, pid, started_at=None, latest_successful_refresh_utc="—"):
-    try:
-        lock_data = {
-            "status": status,
-            "pid": pid,
-            "started_at": started_at,
-            "host": socket.gethostname(),
-            "latest_successful_refresh_utc": latest_successful_refresh_utc
-        }
-        with open(APPLE_PHOTOS_DB_LOCK_PATH, "w") as f:
-            json.dump(lock_data, f, indent=2)
-    except Exception as e:
-        logger.warning(f"Failed to write lock file: {e}")
-
-def is_pid_alive(pid):
-    if pid is None:
-        return False
-    try:
-        os.kill(pid, 0)
-        return True
-    except OSError as err:
-        if err.errno == errno.ESRCH:
-            return False
-        return True
-
-def acquire_db_lock():
-    while True:
-        lock = read_lock_file()
-        last_refresh = "—"
-        
-        if lock:
-            last_refresh = lock.get("latest_successful_refresh_utc", "—")
-            status = lock.get("status")
-            lock_pid = lock.get("pid")
-            
-            if status in ["refreshing", "planner_active"]:
-                if is_pid_alive(lock_pid):
-                    logger.info(f"ℹ️ Database copy is currently locked by {status} (PID: {lock_pid}). Waiting for lock release...")
-                    time.sleep(10)
-                    continue
-                else:
-                    logger.warning(f"⚠️ Found stale {status} lock file from dead PID {lock_pid}. Overriding lock.")
-            elif status == "executor_active" and lock_pid == os.getpid():
-                # Already own the lock
-                return
-        
-        # Lock is available, acquire it
-        logger.info(f"🔐 Acquiring executor database lock (PID: {os.getpid()}).")
-        write_lock_file(
-            status="executor_active",
-            pid=os.getpid(),
-            started_at=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-            latest_successful_refresh_utc=last_refresh
-        )
-        break
-
-def release_db_lock():
-    lock = read_lock_file()
-    if lock and lock.get("pid") == os.getpid() and lock.get("status") == "executor_active":
-        logger.info("🔓 Releasing executor database lock.")
-        write_lock_file(
-            status="available",
-            pid=None,
-            latest_successful_refresh_utc=lock.get("latest_successful_refresh_utc", "—")
-        )
-
-
 
 @dataclass
 class PipelineStep:
@@ -193,7 +113,7 @@ def run_regular_steps(bootstrap_steps, steps, from_index, to_index, dry_run, mon
         # --- Begin status check logic ---
         # For a planned month, we check its current status against what the step expects.
         if month and step.code:
-            acquire_db_lock()
+            acquire_db_lock("executor", logger)
             conn = get_connection()
             cur_status = conn.cursor()
             # Find the status of the month we are supposed to process
@@ -208,7 +128,7 @@ def run_regular_steps(bootstrap_steps, steps, from_index, to_index, dry_run, mon
                 expected_prev_code = expected_prev[0] if expected_prev else None
                 
             close_conn()
-            release_db_lock()
+            release_db_lock("executor", logger)
             
             if batch_status_code and expected_prev_code and batch_status_code != expected_prev_code:
                 # Allow retry if the batch is in the error state of the CURRENT step
@@ -255,7 +175,7 @@ def run_step(step: PipelineStep, dry_run=False, month=None, command=None):
     logger.info(f"▶️ Starting: {step.label}")
     batch_month_id = None
     if month is not None:
-        acquire_db_lock()
+        acquire_db_lock("executor", logger)
         conn = get_connection()
         cur_lookup = conn.cursor()
         cur_lookup.execute("SELECT id FROM month_batches WHERE month = ?", (month,))
@@ -263,16 +183,16 @@ def run_step(step: PipelineStep, dry_run=False, month=None, command=None):
         if row:
             batch_month_id = row[0]
         close_conn()
-        release_db_lock()
+        release_db_lock("executor", logger)
         
     if dry_run:
         cmd_str = ' '.join(command if command else step.command)
         logger.info(f"[Dry Run] Would run: {cmd_str}")
-        acquire_db_lock()
+        acquire_db_lock("executor", logger)
         conn = get_connection()
         log_execution(conn, step.label, "dry-run", batch_month_id)
         close_conn()
-        release_db_lock()
+        release_db_lock("executor", logger)
         return True
         
     try:
@@ -280,7 +200,7 @@ def run_step(step: PipelineStep, dry_run=False, month=None, command=None):
         subprocess.run(cmd_to_run, check=True)
         logger.info(f"✅ Completed: {step.label}")
         
-        acquire_db_lock()
+        acquire_db_lock("executor", logger)
         conn = get_connection()
         cursor = conn.cursor()
         log_execution(conn, step.label, "success", batch_month_id)
@@ -371,12 +291,12 @@ def run_step(step: PipelineStep, dry_run=False, month=None, command=None):
                 logger.info(f"🏁 Final step reached for month {month}; batch status set and imports updated with execution_id={session_id}, status_code={resolved_code}")
                 
         close_conn()
-        release_db_lock()
+        release_db_lock("executor", logger)
         return True
     except subprocess.CalledProcessError as e:
         logger.error(f"❌ Failed: {step.label} with error: {e}")
         
-        acquire_db_lock()
+        acquire_db_lock("executor", logger)
         conn = get_connection()
         cursor = conn.cursor()
         log_execution(conn, step.label, "failed", batch_month_id)
@@ -391,7 +311,7 @@ def run_step(step: PipelineStep, dry_run=False, month=None, command=None):
                 conn.commit()
                 logger.info(f"⚠️ Batch {month} moved to error state {error_code} due to failure in step {step.label}.")
         close_conn()
-        release_db_lock()
+        release_db_lock("executor", logger)
         return False
 
 def is_applescript_available():
@@ -427,7 +347,7 @@ def get_pipeline_steps(script_dir, use_mock_data=False):
 
     steps = []
     logger.info("Fetching pipeline steps from the database.")
-    acquire_db_lock()
+    acquire_db_lock("executor", logger)
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("""
@@ -448,7 +368,7 @@ def get_pipeline_steps(script_dir, use_mock_data=False):
                 cmd.append("{month}")
         steps.append(PipelineStep(label, code, cmd))
     close_conn()
-    release_db_lock()
+    release_db_lock("executor", logger)
     return [step for step, (_, _, _, _, ttype) in zip(steps, rows) if ttype in ['pipeline', 'retryable']]
 
 
@@ -470,13 +390,13 @@ def main(args):
     all_steps.extend(steps)
 
     # Check for active planned executions in queue
-    acquire_db_lock()
+    acquire_db_lock("executor", logger)
     conn = get_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT id, planned_month FROM planned_execution WHERE active = 1 ORDER BY id ASC")
     planned_rows = cursor.fetchall()
     close_conn()
-    release_db_lock()
+    release_db_lock("executor", logger)
 
     if not planned_rows:
         if args.cron:
@@ -499,13 +419,13 @@ def main(args):
 
         # Mark this specific planned execution as inactive upon successful completion
         if not args.dry_run:
-            acquire_db_lock()
+            acquire_db_lock("executor", logger)
             conn = get_connection()
             cursor = conn.cursor()
             cursor.execute("UPDATE planned_execution SET active = 0 WHERE id = ?", (plan_id,))
             conn.commit()
             close_conn()
-            release_db_lock()
+            release_db_lock("executor", logger)
             logger.info(f"✅ Planned execution for {month} (Queue ID: {plan_id}) completed and marked as inactive.")
 
     logger.info(f"🎉 Completed all {total_plans} queued planned execution(s).")
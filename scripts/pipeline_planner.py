@@ -3,23 +3,26 @@ import os
 import subprocess
 import re
 import time
-import json
-import socket
 import errno
 import atexit
+from contextlib import ExitStack
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import logging
 from utils.logger import setup_logger
 from constants import LOG_PATH, STAGING_ROOT
 from utils.utils import get_full_transition_path, human_readable_size
+from utils.db_fingerprint import compute_fingerprint, describe_fingerprint_change, load_fingerprint
+from utils.locks import get_db_lock, get_planner_write_lock, describe_holder, SHARED, EXCLUSIVE
 from google_photos import check_google_quota, authenticate, get_all_favorites
 import argparse
-import sqlite3
-from constants import MEDIA_ORGANIZER_DB_PATH, APPLE_PHOTOS_DB_LOCK_PATH, APPLE_PHOTOS_DB_PATH, LOG_PATH, GOOGLE_PHOTOS_READONLY_SCOPES, GOOGLE_DRIVE_READ_ONLY_SCOPES, PLANNER_REQUIRED_SCOPES, CURATION_THRESHOLD_LOG_PATH, SCORING_BREAKDOWN_LOG_PATH, MEDIA_CLEANUP_LOG_PATH, MAX_UPLOAD_FILE_SIZE_BYTES, MAX_UPLOAD_FILE_SIZE_MB, BG_SERVICE_PID_PATH
+from constants import APPLE_PHOTOS_DB_PATH, LOG_PATH, GOOGLE_PHOTOS_READONLY_SCOPES, GOOGLE_DRIVE_READ_ONLY_SCOPES, PLANNER_REQUIRED_SCOPES, CURATION_THRESHOLD_LOG_PATH, SCORING_BREAKDOWN_LOG_PATH, MEDIA_CLEANUP_LOG_PATH, MAX_UPLOAD_FILE_SIZE_BYTES, MAX_UPLOAD_FILE_SIZE_MB, BG_SERVICE_PID_PATH, APPLE_PHOTOS_DB_FINGERPRINT_PATH
 from constants import ACTIVE_CAMERA_MODELS, DEVICE_OWNER_MAPPING
-from db.connections import get_connection, get_cursor, commit, close as close_conn
+from db.connections import connect, get_connection, get_cursor, commit, close as close_conn
 from db.queries import get_stage_transitions, get_batch_statuses, get_latest_import_and_month
+from utils.time_dims import shift_month, local_month_core_data_bounds
+from db.camera_sequences import parse_sequence, find_sequence_gaps, describe_sequence_gaps, get_sequence_neighbours
+from db.photos_snapshot import photos_snapshot
 import requests
 from datetime import timezone, datetime, timedelta
  
@@ -51,75 +54,35 @@ def is_pid_alive(pid):
             return False
         return True
 
-def read_lock_file():
-    if not os.path.exists(APPLE_PHOTOS_DB_LOCK_PATH):
-        return None
-    try:
-        with open(APPLE_PHOTOS_DB_LOCK_PATH, "r") as f:
-            return json.load(f)
-    except Exception:
-        return None
-
-def write_lock_file(status, pid, started_at=None, latest_successful_refresh_utc="—"):
-    try:
-        lock_data = {
-            "status": status,
-            "pid": pid,
-            "started_at": started_at,
-            "host": socket.gethostname(),
-            "latest_successful_refresh_utc": latest_successful_refresh_utc
-        }
-        with open(APPLE_PHOTOS_DB_LOCK_PATH, "w") as f:
-            json.dump(lock_data, f, indent=2)
-    except Exception as e:
-        logger.warning(f"Failed to write lock file: {e}")
-
 def release_planner_lock():
-    lock = read_lock_file()
-    if lock and lock.get("pid") == os.getpid() and lock.get("status") == "planner_active":
-        logger.info("🔓 Releasing planner active lock.")
-        write_lock_file(
-            status="available",
-            pid=None,
-            latest_successful_refresh_utc=lock.get("latest_successful_refresh_utc", "—")
-        )
+    write_lock = get_planner_write_lock()
+    if write_lock.mode == EXCLUSIVE:
+        write_lock.release()
+    db_lock = get_db_lock()
+    if db_lock.mode == SHARED:
+        logger.info("🔓 Releasing planner lock.")
+        db_lock.release()
+
+def acquire_planner_lock(write=False):
+    """
+    Takes the shared lock: planner sessions run side by side and only wait while the
+    background refresh (or the executor) holds the lock exclusively. Phases that write
+    (write=True) also take the planner write lock, so only one planner writes at a time.
+    """
+    def report_wait(state):
+        print(f"\rℹ️  Waiting for {describe_holder(state)} to release the database lock...", end="", flush=True)
 
-def acquire_planner_lock():
-    while True:
-        lock = read_lock_file()
-        last_refresh = "—"
-        
-        if lock:
-            last_refresh = lock.get("latest_successful_refresh_utc", "—")
-            status = lock.get("status")
-            lock_pid = lock.get("pid")
-            
-            if status == "refreshing":
-                if is_pid_alive(lock_pid):
-                    print(f"\rℹ️  Apple Photos database copy is currently being refreshed in the background (PID: {lock_pid}). Waiting for lock release...", end="", flush=True)
-                    time.sleep(10)
-                    continue
-                else:
-                    print(f"\n⚠️ Found stale refreshing lock file from dead PID {lock_pid}. Overriding lock.")
-            elif status == "planner_active":
-                if is_pid_alive(lock_pid) and lock_pid != os.getpid():
-                    logger.error(f"❌ Another instance of the pipeline planner is currently active (PID: {lock_pid}). Exiting to prevent DB write contention.")
-                    sys.exit(1)
-                elif lock_pid == os.getpid():
-                    return
-                else:
-                    print(f"\n⚠️ Found stale planner active lock file from dead PID {lock_pid}. Overriding lock.")
-        
-        # Lock is available, acquire it
-        print(f"\n🔐 Acquiring planner lock (PID: {os.getpid()}).")
-        write_lock_file(
-            status="planner_active",
-            pid=os.getpid(),
-            started_at=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-            latest_successful_refresh_utc=last_refresh
-        )
-        atexit.register(release_planner_lock)
-        break
+    db_lock = get_db_lock()
+    write_lock = get_planner_write_lock()
+    try:
+        if db_lock.mode != SHARED:
+            db_lock.acquire(SHARED, "planner_active", on_wait=report_wait)
+            print(f"\n🔐 Acquired planner lock (PID: {os.getpid()}).")
+            atexit.register(release_planner_lock)
+        if write and write_lock.mode != EXCLUSIVE:
+            write_lock.acquire(EXCLUSIVE, "planner_writing", on_wait=report_wait)
+    except OSError as e:
+        logger.warning(f"Failed to open lock file: {e}")
 
 def ensure_bg_service_running():
     service_running = False
@@ -171,30 +134,22 @@ def ensure_bg_service_running():
 def check_if_refresh_needed():
     if not os.path.exists(APPLE_PHOTOS_DB_PATH):
         return
-        
-    src_mod_time = os.path.getmtime(APPLE_PHOTOS_DB_PATH)
-    src_wal_path = APPLE_PHOTOS_DB_PATH + "-wal"
-    if os.path.exists(src_wal_path):
-        src_mod_time = max(src_mod_time, os.path.getmtime(src_wal_path))
-        
-    lock = read_lock_file()
-    last_refresh_timestamp = 0
-    last_refresh_str = "—"
-    if lock and lock.get("latest_successful_refresh_utc") and lock.get("latest_successful_refresh_utc") != "—":
-        try:
-            last_refresh_str = lock.get("latest_successful_refresh_utc")
-            last_refresh_dt = datetime.strptime(last_refresh_str, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
-            last_refresh_timestamp = last_refresh_dt.timestamp()
-        except Exception:
-            pass
-            
-    # Check if src_mod_time is newer than last successful refresh with a 2.0 second tolerance
-    if src_mod_time > (last_refresh_timestamp + 2.0):
-        src_utc_str = datetime.fromtimestamp(src_mod_time, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+    try:
+        reason = describe_fingerprint_change(
+            load_fingerprint(APPLE_PHOTOS_DB_FINGERPRINT_PATH),
+            compute_fingerprint(APPLE_PHOTOS_DB_PATH)
+        )
+    except Exception as e:
+        reason = f"Could not fingerprint the source DB ({e})."
+
+    last_refresh_str = get_db_lock().read_state().get("latest_successful_refresh_utc", "—")
+
+    if reason:
         print("\n" + "!" * 100)
         print("⚠️  WARNING: Apple Photos database has new changes since the last sync.")
         print(f"   • Last Sync Time: {last_refresh_str} UTC")
-        print(f"   • Source DB Time: {src_utc_str} UTC")
+        print(f"   • Change Detected: {reason}")
         
         service_pid = None
         if os.path.exists(BG_SERVICE_PID_PATH):
@@ -229,6 +184,21 @@ def run_bootstrap_steps(auto_apply, logger):
             logger.error(f"❌ Error in bootstrap step {step_name}: {e}")
             sys.exit(1)
 
+def describe_sequence_neighbours(cursor, camera_model, f_min, month):
+    """
+    Before/After lines for a sequencing prompt: the camera's nearest files with the same
+    filename prefix as `f_min` created before and after `month`.
+    """
+    parsed = parse_sequence(f_min)
+    if not parsed:
+        return "  Before:  None", "  After:   None"
+    before, after = get_sequence_neighbours(
+        cursor, camera_model, parsed[0], f"{month}-01 00:00:00", f"{shift_month(month, 1)}-01 00:00:00"
+    )
+    before_str = f"  Before:  {before[0]} ({before[1]})" if before else "  Before:  None"
+    after_str = f"  After:   {after[0]} ({after[1]})" if after else "  After:   None"
+    return before_str, after_str
+
 def print_assets_table(assets):
     """
     Prints a list of assets as a formatted table.
@@ -367,8 +337,7 @@ def check_active_sources_import_status(cursor, conn, month, auto_apply):
 
     months_to_check = [month]
 
-    try:
-        cursor.execute(f"ATTACH DATABASE 'file:{APPLE_PHOTOS_DB_PATH}?mode=ro' AS photos_db;")
+    with photos_snapshot(cursor):
         logger.debug("Attached Photos.sqlite database read-only for active source check.")
 
         for month_str in months_to_check:
@@ -379,63 +348,58 @@ def check_active_sources_import_status(cursor, conn, month, auto_apply):
                 SELECT 
                     xa.ZCAMERAMODEL,
                     xa.ZCAMERAMAKE,
-                    COUNT(CASE WHEN strftime('%Y-%m', datetime(a.ZDATECREATED + 978307200, 'unixepoch', 'localtime')) = ? THEN 1 END) AS assets_in_month,
-                    MIN(CASE WHEN strftime('%Y-%m', datetime(a.ZDATECREATED + 978307200, 'unixepoch', 'localtime')) = ? THEN aaa.ZORIGINALFILENAME END) AS min_filename,
-                    MAX(CASE WHEN strftime('%Y-%m', datetime(a.ZDATECREATED + 978307200, 'unixepoch', 'localtime')) = ? THEN aaa.ZORIGINALFILENAME END) AS max_filename,
-                    MIN(CASE WHEN strftime('%Y-%m', datetime(a.ZDATECREATED + 978307200, 'unixepoch', 'localtime')) = ? THEN datetime(a.ZDATECREATED + 978307200, 'unixepoch', 'localtime') END) AS min_date,
-                    MAX(CASE WHEN strftime('%Y-%m', datetime(a.ZDATECREATED + 978307200, 'unixepoch', 'localtime')) = ? THEN datetime(a.ZDATECREATED + 978307200, 'unixepoch', 'localtime') END) AS max_date,
-                    GROUP_CONCAT(DISTINCT CASE WHEN strftime('%Y-%m', datetime(a.ZDATECREATED + 978307200, 'unixepoch', 'localtime')) = ? 
+                    COUNT(CASE WHEN loc.month = ? THEN 1 END) AS assets_in_month,
+                    MIN(CASE WHEN loc.month = ? THEN aaa.ZORIGINALFILENAME END) AS min_filename,
+                    MAX(CASE WHEN loc.month = ? THEN aaa.ZORIGINALFILENAME END) AS max_filename,
+                    MIN(CASE WHEN loc.month = ? THEN loc.created_local_datetime END) AS min_date,
+                    MAX(CASE WHEN loc.month = ? THEN loc.created_local_datetime END) AS max_date,
+                    GROUP_CONCAT(DISTINCT CASE WHEN loc.month = ? 
                                                THEN a.ZIMPORTSESSION END) AS involved_import_ids
-                FROM photos_db.ZASSET a
+                FROM assets loc
+                JOIN photos_db.ZASSET a ON a.Z_PK = loc.asset_pk
                 JOIN photos_db.ZEXTENDEDATTRIBUTES xa ON xa.ZASSET = a.Z_PK
                 JOIN photos_db.ZADDITIONALASSETATTRIBUTES aaa ON aaa.ZASSET = a.Z_PK
                 JOIN imports i ON i.import_uuid = a.ZIMPORTSESSION 
                               AND i.camera_model = xa.ZCAMERAMODEL
-                LEFT JOIN assets loc ON loc.asset_id = a.ZUUID
                 WHERE a.ZTRASHEDSTATE = 0
                   AND (loc.ignore_continuity_check = 0 OR loc.ignore_continuity_check IS NULL)
                   AND xa.ZCAMERAMODEL IN ({})
-                  AND a.ZDATECREATED >= (strftime('%s', date(?, 'start of month', '-12 month')) - 978307200)
-                  AND a.ZDATECREATED < (strftime('%s', date(?, 'start of month', '+2 month')) - 978307200)
+                  AND loc.month >= ?
+                  AND loc.month < ?
                 GROUP BY xa.ZCAMERAMODEL, xa.ZCAMERAMAKE
             """.format(','.join(['?' for _ in ACTIVE_CAMERA_MODELS]))
 
-            cursor.execute(query, [month_str] * 6 + ACTIVE_CAMERA_MODELS + [month_str + "-01", month_str + "-01"])
+            # assets.month is indexed, so the 14-month window is a range scan
+            cursor.execute(query, [month_str] * 6 + ACTIVE_CAMERA_MODELS + [shift_month(month_str, -12), shift_month(month_str, 2)])
             results = cursor.fetchall()
             found_models = set()
 
             for row in results:
                 model, make, count, f_min, f_max, d_min, d_max, involved_import_ids = row
                 num_min = None
-                num_max = None
                 gap_info = ""
                 if count > 0:
                     found_models.add(model)
 
-                    # Reasonability check: parse numeric part from filenames (ignoring extensions)
-                    # We only attempt this if the filename looks like a standard sequential pattern (Prefix + Digits)
-                    seq_pattern = r'^([a-zA-Z_-]+)(\d+)$'
-                    if f_min:
-                        m = re.match(seq_pattern, os.path.splitext(f_min)[0])
-                        if m: num_min = int(m.group(2))
-                    if f_max:
-                        m = re.match(seq_pattern, os.path.splitext(f_max)[0])
-                        if m: num_max = int(m.group(2))
-
-                    if num_min is not None and num_max is not None:
-                        # We use abs because string MIN/MAX might flip if sequence is not zero-padded
-                        expected_range = abs(num_max - num_min) + 1
-                        if expected_range > count:
-                            gap_info = f" | ⚠️ Reasonability: {expected_range} expected vs {count} found (gap of {expected_range - count})"
+                    first_seq = parse_sequence(f_min)
+                    if first_seq:
+                        num_min = first_seq[1]
+
+                    # Reasonability check: exact missing filename numbers of the month
+                    gaps = find_sequence_gaps(cursor, model, month_str)
+                    if gaps:
+                        gap_info = f" | ⚠️ Reasonability: {describe_sequence_gaps(gaps)}"
 
                 # Continuity check with previous month's confirmed imports
                 continuity_info = ""
                 previous_month = (datetime.strptime(month_str, '%Y-%m').replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
+                # Exact ranges of the previous month only, not of whole imports that touched it
                 cursor.execute("""
-                    SELECT MAX(max_filename), MAX(max_date)
-                    FROM imports
-                    WHERE camera_model = ? AND months_detected LIKE ? AND sequencing_confirmed = 1
-                """, (model, f'%{previous_month}%')) # Use LIKE for months_detected as it's comma-separated
+                    SELECT MAX(im.max_filename), MAX(im.max_date)
+                    FROM import_months im
+                    JOIN imports i ON i.import_uuid = im.import_uuid AND i.camera_model = im.camera_model
+                    WHERE im.camera_model = ? AND im.month = ? AND i.sequencing_confirmed = 1
+                """, (model, previous_month))
                 prev_month_data = cursor.fetchone()
                 prev_max_filename, prev_max_date = prev_month_data if prev_month_data else (None, None)
 
@@ -443,6 +407,9 @@ def check_active_sources_import_status(cursor, conn, month, auto_apply):
                     prev_num_max = None
                     prev_nums = re.findall(r'(\d+)', os.path.splitext(prev_max_filename)[0])
                     if prev_nums: prev_num_max = int(prev_nums[-1])
+                    # Counter rollover (IMG_9999 -> IMG_0001) continues the sequence
+                    if prev_nums and prev_num_max == 10 ** len(prev_nums[-1]) - 1 and num_min == 1:
+                        prev_num_max = 0
 
                     if prev_num_max is not None and num_min > prev_num_max + 1:
                         continuity_info += f" | ⚠️ Filename gap from {previous_month}: {prev_max_filename} -> {f_min}"
@@ -499,42 +466,19 @@ def check_active_sources_import_status(cursor, conn, month, auto_apply):
 
                     #   TODO: Before the promt we should check confirmed months for each source in comparison to months in the past or in the future relative to the proposed month
                     if unconfirmed_count > 0:
-                        # Determine naming pattern to filter context to relevant conventions
-                        pattern = "*"
-                        if f_min:
-                            # Only use a prefix filter if it looks like a standard sequence (Prefix + Digits)
-                            stem = os.path.splitext(f_min)[0]
-                            m = re.match(r'^([a-zA-Z_-]+)\d+$', stem)
-                            if m:
-                                pattern = m.group(1) + "*"
-
-                        # Fetch global boundaries for this model before and after the current month
-                        cursor.execute("""
-                            SELECT MIN(min_filename), MAX(max_filename), MIN(min_date), MAX(max_date)
-                            FROM imports
-                            WHERE camera_model = ? AND max_date < ? AND min_filename GLOB ?
-                        """, (model, f"{month_str}-01 00:00:00", pattern))
-                        b = cursor.fetchone()
-                        before_str = f"  Before:  {b[0]} -> {b[1]} ({b[2]} to {b[3]})" if b and b[1] else "  Before:  None"
-
-                        cursor.execute("""
-                            SELECT MIN(min_filename), MAX(max_filename), MIN(min_date), MAX(max_date)
-                            FROM imports
-                            WHERE camera_model = ? AND min_date >= date(?, 'start of month', '+1 month') AND min_filename GLOB ?
-                        """, (model, f"{month_str}-01", pattern))
-                        a = cursor.fetchone()
-                        after_str = f"  After:   {a[0]} -> {a[1]} ({a[2]} to {a[3]})" if a and a[0] else "  After:   None"
+                        before_str, after_str = describe_sequence_neighbours(cursor, model, f_min, month_str)
 
                         # Fetch involved assets to print table before prompt
                         cursor.execute(f"""
-                            SELECT aaa.ZORIGINALFILENAME, datetime(a.ZDATECREATED + 978307200, 'unixepoch', 'localtime'), a.ZUUID
+                            SELECT aaa.ZORIGINALFILENAME, loc.created_local_datetime, a.ZUUID
                             FROM photos_db.ZASSET a
+                            JOIN assets loc ON loc.asset_pk = a.Z_PK
                             JOIN photos_db.ZADDITIONALASSETATTRIBUTES aaa ON aaa.ZASSET = a.Z_PK
                             LEFT JOIN photos_db.ZEXTENDEDATTRIBUTES ea ON ea.ZASSET = a.Z_PK
                             WHERE a.ZIMPORTSESSION IN ({placeholders})
                               AND COALESCE(ea.ZCAMERAMODEL, 'Unknown') = ?
                               AND COALESCE(ea.ZCAMERAMAKE, 'Unknown') = ?
-                              AND strftime('%Y-%m', datetime(a.ZDATECREATED + 978307200, 'unixepoch', 'localtime')) = ?
+                              AND loc.month = ?
                             ORDER BY aaa.ZORIGINALFILENAME
                         """, import_id_list + [model, make or "Unknown", month_str])
                         involved_assets = cursor.fetchall()
@@ -557,15 +501,15 @@ def check_active_sources_import_status(cursor, conn, month, auto_apply):
                                     SELECT 
                                         MIN(aaa.ZORIGINALFILENAME),
                                         MAX(aaa.ZORIGINALFILENAME),
-                                        MIN(datetime(a.ZDATECREATED + 978307200, 'unixepoch', 'localtime')),
-                                        MAX(datetime(a.ZDATECREATED + 978307200, 'unixepoch', 'localtime'))
+                                        MIN(loc.created_local_datetime),
+                                        MAX(loc.created_local_datetime)
                                     FROM photos_db.ZASSET a
+                                    JOIN assets loc ON loc.asset_pk = a.Z_PK
                                     JOIN photos_db.ZADDITIONALASSETATTRIBUTES aaa ON aaa.ZASSET = a.Z_PK
                                     LEFT JOIN ZEXTENDEDATTRIBUTES ea ON ea.ZASSET = a.Z_PK
-                                    LEFT JOIN assets loc ON loc.asset_id = a.ZUUID
                                     WHERE a.ZIMPORTSESSION = ?
                                       AND (loc.ignore_continuity_check = 0 OR loc.ignore_continuity_check IS NULL)
-                                      AND strftime('%Y-%m', datetime(a.ZDATECREATED + 978307200, 'unixepoch', 'localtime')) = ?
+                                      AND loc.month = ?
                                       AND COALESCE(ea.ZCAMERAMODEL, 'Unknown') = ?
                                       AND COALESCE(ea.ZCAMERAMAKE, 'Unknown') = ?
                                 """, (import_uuid, month_str, model, make or "Unknown"))
@@ -587,9 +531,7 @@ def check_active_sources_import_status(cursor, conn, month, auto_apply):
                             handle_reasonability_rejection(
                                 cursor, conn, import_id_list, model, make or "Unknown", month_str, label=f"month {month_str}"
                             )
-    finally:
-        cursor.execute("DETACH DATABASE photos_db;")
-        logger.debug("Detached Photos.sqlite database.")
+    logger.debug("Detached Photos.sqlite database.")
     return True
 
 def check_favorites_count(cursor, month, check_remote=False, all_favs=None, creds=None, verbose=True):
@@ -649,10 +591,10 @@ def verify_sequencing_for_planned_month(cursor, conn, month, auto_apply):
     """
     cursor.execute("""
         SELECT DISTINCT i.import_uuid, i.camera_model, i.camera_make
-        FROM imports i
-        JOIN ZASSET za ON za.ZIMPORTSESSION = i.import_uuid
+        FROM assets a
+        JOIN ZASSET za ON za.Z_PK = a.asset_pk
+        JOIN imports i ON i.import_uuid = za.ZIMPORTSESSION
         LEFT JOIN ZEXTENDEDATTRIBUTES zea ON zea.ZASSET = za.Z_PK
-        LEFT JOIN assets a ON a.asset_id = za.ZUUID
         WHERE a.month = ?
           AND COALESCE(zea.ZCAMERAMODEL, 'Unknown') = COALESCE(i.camera_model, 'Unknown')
           AND COALESCE(zea.ZCAMERAMAKE, 'Unknown') = COALESCE(i.camera_make, 'Unknown')
@@ -669,12 +611,12 @@ def verify_sequencing_for_planned_month(cursor, conn, month, auto_apply):
         # Recalculate metrics based on non-ignored assets matching this specific import row's camera
         cursor.execute("""
             SELECT MIN(aaa.ZORIGINALFILENAME), MAX(aaa.ZORIGINALFILENAME), COUNT(za.Z_PK),
-                   MIN(datetime(za.ZDATECREATED + 978307200, 'unixepoch', 'localtime')),
-                   MAX(datetime(za.ZDATECREATED + 978307200, 'unixepoch', 'localtime'))
+                   MIN(a.created_local_datetime),
+                   MAX(a.created_local_datetime)
             FROM ZASSET za
+            JOIN assets a ON a.asset_pk = za.Z_PK
             JOIN ZADDITIONALASSETATTRIBUTES aaa ON aaa.ZASSET = za.Z_PK
             LEFT JOIN ZEXTENDEDATTRIBUTES zea ON zea.ZASSET = za.Z_PK
-            LEFT JOIN assets a ON a.asset_id = za.ZUUID
             WHERE za.ZIMPORTSESSION = ?
               AND a.month = ?
               AND COALESCE(zea.ZCAMERAMODEL, 'Unknown') = COALESCE(?, 'Unknown')
@@ -690,62 +632,23 @@ def verify_sequencing_for_planned_month(cursor, conn, month, auto_apply):
         if not model:
             model = "Unknown Model"
 
-        # Reasonability check: parse numeric part from filenames
-        seq_pattern = r'^([a-zA-Z_-]+)(\d+)$'
-        num_min = None
-        if f_min:
-            m = re.match(seq_pattern, os.path.splitext(f_min)[0])
-            if m: num_min = int(m.group(2))
-            
-        num_max = None
-        if f_max:
-            m = re.match(seq_pattern, os.path.splitext(f_max)[0])
-            if m: num_max = int(m.group(2))
-
-        gap_str = ""
-        if num_min is not None and num_max is not None:
-            expected = abs(num_max - num_min) + 1
-            gap = expected - count if expected > count else 0
-            if gap > 0:
-                gap_str = f" | ⚠️ Gap detected: {gap} items"
+        # Reasonability check: exact missing filename numbers of this session's month
+        gaps = find_sequence_gaps(cursor, model, month, import_uuid=uuid)
+        gap_str = f" | ⚠️ Gap detected: {describe_sequence_gaps(gaps)}" if gaps else ""
         logger.info(f"   - Session {uuid} ({model}): {f_min} -> {f_max} ({d_min} to {d_max}) ({count} files){gap_str}")
 
         if auto_apply:
             continue
 
-        # Determine naming pattern to filter context to relevant conventions
-        pattern = "*"
-        if f_min:
-            # Only use a prefix filter if it looks like a standard sequence (Prefix + Digits)
-            stem = os.path.splitext(f_min)[0]
-            m = re.match(r'^([a-zA-Z_-]+)\d+$', stem)
-            if m:
-                pattern = m.group(1) + "*"
-
-        # Fetch global boundaries for this model before and after the current month
-        cursor.execute("""
-            SELECT MIN(min_filename), MAX(max_filename), MIN(min_date), MAX(max_date)
-            FROM imports
-            WHERE camera_model = ? AND max_date < ? AND min_filename GLOB ?
-        """, (model, f"{month}-01 00:00:00", pattern))
-        b = cursor.fetchone()
-        before_str = f"  Before:  {b[0]} -> {b[1]} ({b[2]} to {b[3]})" if b and b[1] else "  Before:  None"
-
-        cursor.execute("""
-            SELECT MIN(min_filename), MAX(max_filename), MIN(min_date), MAX(max_date)
-            FROM imports
-            WHERE camera_model = ? AND min_date >= date(?, 'start of month', '+1 month') AND min_filename GLOB ?
-        """, (model, f"{month}-01", pattern))
-        a = cursor.fetchone()
-        after_str = f"  After:   {a[0]} -> {a[1]} ({a[2]} to {a[3]})" if a and a[0] else "  After:   None"
+        before_str, after_str = describe_sequence_neighbours(cursor, model, f_min, month)
 
         # Fetch involved assets to print table before prompt
         cursor.execute("""
-            SELECT aaa.ZORIGINALFILENAME, datetime(za.ZDATECREATED + 978307200, 'unixepoch', 'localtime'), za.ZUUID
+            SELECT aaa.ZORIGINALFILENAME, a.created_local_datetime, za.ZUUID
             FROM ZASSET za
+            JOIN assets a ON a.asset_pk = za.Z_PK
             JOIN ZADDITIONALASSETATTRIBUTES aaa ON aaa.ZASSET = za.Z_PK
             LEFT JOIN ZEXTENDEDATTRIBUTES zea ON zea.ZASSET = za.Z_PK
-            LEFT JOIN assets a ON a.asset_id = za.ZUUID
             WHERE za.ZIMPORTSESSION = ?
               AND COALESCE(zea.ZCAMERAMODEL, 'Unknown') = COALESCE(?, 'Unknown')
               AND COALESCE(zea.ZCAMERAMAKE, 'Unknown') = COALESCE(?, 'Unknown')
@@ -848,9 +751,8 @@ def run_memory_publishing_flow(cursor=None, conn=None):
     import math
 
     # Acquire lock and get connection for initialization
-    acquire_planner_lock()
+    acquire_planner_lock(write=True)
     init_conn = get_connection()
-    init_conn.execute("PRAGMA busy_timeout = 30000")
     init_cursor = get_cursor()
 
     # Create threshold_history table if it doesn't exist
@@ -883,9 +785,8 @@ def run_memory_publishing_flow(cursor=None, conn=None):
     release_planner_lock()
     
     while True:
-        acquire_planner_lock()
+        acquire_planner_lock(write=True)
         conn = get_connection()
-        conn.execute("PRAGMA busy_timeout = 30000")
         cursor = get_cursor()
 
         displayed_moments_map = {}
@@ -895,23 +796,102 @@ def run_memory_publishing_flow(cursor=None, conn=None):
         except Exception:
             pass
 
-        # Try attaching Apple Photos DB copy to fetch Apple's auto-generated moments and filter ignored items
-        photos_db_attached = False
-        try:
-            cursor.execute(f"ATTACH DATABASE 'file:{APPLE_PHOTOS_DB_PATH}?mode=ro' AS photos_db;")
-            photos_db_attached = True
-        except Exception as e:
-            logger.warning(f"Could not attach Photos.sqlite for Apple moment lookup: {e}")
-
-        # Fetch the cutoff threshold score (dynamically on each loop iteration, excluding Ignore folder items)
-        cutoff_score = 0.0
-        if photos_db_attached:
+        with ExitStack() as photos_stack:
+            # Try attaching Apple Photos DB copy to fetch Apple's auto-generated moments and filter ignored items
+            photos_db_attached = False
             try:
+                photos_stack.enter_context(photos_snapshot(cursor))
+                photos_db_attached = True
+            except Exception as e:
+                logger.warning(f"Could not attach Photos.sqlite for Apple moment lookup: {e}")
+
+            # Fetch the cutoff threshold score (dynamically on each loop iteration, excluding Ignore folder items)
+            cutoff_score = 0.0
+            if photos_db_attached:
+                try:
+                    cursor.execute("""
+                        SELECT v.score_normalized FROM ranked_assets v
+                        JOIN month_batches mb ON v.month = mb.month
+                        LEFT JOIN photos_db.ZASSET a ON a.ZUUID = v.asset_id
+                        WHERE mb.status_code >= '600' AND (v.MomentsAlbumName IS NULL OR v.MomentsAlbumName = '') 
+                          AND (a.Z_PK IS NULL OR NOT EXISTS (
+                              SELECT 1 FROM photos_db.Z_30ASSETS aa
+                              JOIN photos_db.ZGENERICALBUM ga ON aa.Z_30ALBUMS = ga.Z_PK
+                              WHERE aa.Z_3ASSETS = a.Z_PK
+                                AND LOWER(ga.ZTITLE) IN ('ignore', 'skippublishing')
+                                AND ga.ZTRASHEDSTATE = 0
+                          ))
+                        ORDER BY v.score_normalized DESC LIMIT 1
+                    """)
+                    row = cursor.fetchone()
+                    cutoff_score = row[0] if row and row[0] is not None else 0.0
+                except Exception as e:
+                    logger.warning(f"Error querying cutoff score with photos_db: {e}")
+        
+            if cutoff_score == 0.0:
+                try:
+                    cursor.execute("""
+                        SELECT v.score_normalized FROM ranked_assets v
+                        JOIN month_batches mb ON v.month = mb.month
+                        WHERE mb.status_code >= '600' AND (v.MomentsAlbumName IS NULL OR v.MomentsAlbumName = '') 
+                        ORDER BY v.score_normalized DESC LIMIT 1
+                    """)
+                    row = cursor.fetchone()
+                    cutoff_score = row[0] if row and row[0] is not None else 0.0
+                except Exception:
+                    pass
+                
+            logger.info(f"Cutoff threshold score: {cutoff_score:.4f}")
+
+            # Record cutoff score in threshold_history if it is a valid positive value
+            if cutoff_score > 0.0:
+                try:
+                    cursor.execute("INSERT INTO threshold_history (threshold_score) VALUES (?)", (cutoff_score,))
+                    conn.commit()
+                    # Update running historical_min if this is the first recorded threshold or it is smaller
+                    if historical_min == 0.0 or cutoff_score < historical_min:
+                        historical_min = cutoff_score
+                except Exception as e:
+                    logger.warning(f"Could not record threshold in history: {e}")
+
+            # Build and write Curation Threshold Status & Unassigned High-Rank Assets report to dedicated log
+            threshold_report = []
+            threshold_report.append("==================================================")
+            threshold_report.append("📊 Curation Threshold Status")
+            threshold_report.append("==================================================")
+            threshold_report.append(f" - Current dynamic threshold:  {cutoff_score:.4f}")
+            if historical_min > 0.0:
+                threshold_report.append(f" - Historical minimum target:  {historical_min:.4f}")
+                if cutoff_score > historical_min:
+                    threshold_report.append(f"👉 Note: Please assign moments to assets in new batches until the threshold reaches {historical_min:.4f} again.")
+                else:
+                    threshold_report.append("🎉 Threshold aligned! Current threshold matches or is below historical minimum.")
+            else:
+                threshold_report.append(" - Historical minimum target:  None (No history recorded yet)")
+                threshold_report.append("👉 Note: Once you begin assigning moments, the lowest dynamic threshold reached will be tracked.")
+            threshold_report.append("==================================================\n")
+
+            # Determine effective cutoff threshold to use for selecting qualified moments in the table
+            effective_threshold = cutoff_score
+            if historical_min > 0.0:
+                effective_threshold = min(cutoff_score, historical_min) if cutoff_score > 0.0 else historical_min
+
+            # Check for highly ranked assets that do not belong to any Moment in Apple Photos (excluding Ignore items)
+            if photos_db_attached:
                 cursor.execute("""
-                    SELECT v.score_normalized FROM ranked_assets_view v
+                    SELECT 
+                        v.original_filename, 
+                        v.score_normalized, 
+                        v.month, 
+                        v.date_created_utc,
+                        m.ZTITLE,
+                        m.ZSUBTITLE
+                    FROM ranked_assets v
                     JOIN month_batches mb ON v.month = mb.month
                     LEFT JOIN photos_db.ZASSET a ON a.ZUUID = v.asset_id
-                    WHERE mb.status_code >= '600' AND (v.MomentsAlbumName IS NULL OR v.MomentsAlbumName = '') 
+                    LEFT JOIN photos_db.ZMOMENT m ON a.ZMOMENT = m.Z_PK
+                    WHERE mb.status_code >= '600' AND (v.MomentsAlbumName IS NULL OR v.MomentsAlbumName = '')
+                      AND v.score_normalized > 0.50
                       AND (a.Z_PK IS NULL OR NOT EXISTS (
                           SELECT 1 FROM photos_db.Z_30ASSETS aa
                           JOIN photos_db.ZGENERICALBUM ga ON aa.Z_30ALBUMS = ga.Z_PK
@@ -919,583 +899,498 @@ def run_memory_publishing_flow(cursor=None, conn=None):
                             AND LOWER(ga.ZTITLE) IN ('ignore', 'skippublishing')
                             AND ga.ZTRASHEDSTATE = 0
                       ))
-                    ORDER BY v.score_normalized DESC LIMIT 1
+                    ORDER BY v.score_normalized DESC
+                    LIMIT 10
                 """)
-                row = cursor.fetchone()
-                cutoff_score = row[0] if row and row[0] is not None else 0.0
-            except Exception as e:
-                logger.warning(f"Error querying cutoff score with photos_db: {e}")
-        
-        if cutoff_score == 0.0:
-            try:
+            else:
                 cursor.execute("""
-                    SELECT v.score_normalized FROM ranked_assets_view v
+                    SELECT v.original_filename, v.score_normalized, v.month, v.date_created_utc, NULL, NULL
+                    FROM ranked_assets v
                     JOIN month_batches mb ON v.month = mb.month
-                    WHERE mb.status_code >= '600' AND (v.MomentsAlbumName IS NULL OR v.MomentsAlbumName = '') 
-                    ORDER BY v.score_normalized DESC LIMIT 1
+                    WHERE mb.status_code >= '600' AND (v.MomentsAlbumName IS NULL OR v.MomentsAlbumName = '')
+                      AND v.score_normalized > 0.50
+                    ORDER BY v.score_normalized DESC
+                    LIMIT 10
                 """)
-                row = cursor.fetchone()
-                cutoff_score = row[0] if row and row[0] is not None else 0.0
-            except Exception:
-                pass
-                
-        logger.info(f"Cutoff threshold score: {cutoff_score:.4f}")
 
-        # Record cutoff score in threshold_history if it is a valid positive value
-        if cutoff_score > 0.0:
-            try:
-                cursor.execute("INSERT INTO threshold_history (threshold_score) VALUES (?)", (cutoff_score,))
-                conn.commit()
-                # Update running historical_min if this is the first recorded threshold or it is smaller
-                if historical_min == 0.0 or cutoff_score < historical_min:
-                    historical_min = cutoff_score
-            except Exception as e:
-                logger.warning(f"Could not record threshold in history: {e}")
-
-        # Build and write Curation Threshold Status & Unassigned High-Rank Assets report to dedicated log
-        threshold_report = []
-        threshold_report.append("==================================================")
-        threshold_report.append("📊 Curation Threshold Status")
-        threshold_report.append("==================================================")
-        threshold_report.append(f" - Current dynamic threshold:  {cutoff_score:.4f}")
-        if historical_min > 0.0:
-            threshold_report.append(f" - Historical minimum target:  {historical_min:.4f}")
-            if cutoff_score > historical_min:
-                threshold_report.append(f"👉 Note: Please assign moments to assets in new batches until the threshold reaches {historical_min:.4f} again.")
-            else:
-                threshold_report.append("🎉 Threshold aligned! Current threshold matches or is below historical minimum.")
-        else:
-            threshold_report.append(" - Historical minimum target:  None (No history recorded yet)")
-            threshold_report.append("👉 Note: Once you begin assigning moments, the lowest dynamic threshold reached will be tracked.")
-        threshold_report.append("==================================================\n")
+            unassigned = cursor.fetchall()
 
-        # Determine effective cutoff threshold to use for selecting qualified moments in the table
-        effective_threshold = cutoff_score
-        if historical_min > 0.0:
-            effective_threshold = min(cutoff_score, historical_min) if cutoff_score > 0.0 else historical_min
-
-        # Check for highly ranked assets that do not belong to any Moment in Apple Photos (excluding Ignore items)
-        if photos_db_attached:
-            cursor.execute("""
-                SELECT 
-                    v.original_filename, 
-                    v.score_normalized, 
-                    v.month, 
-                    v.date_created_utc,
-                    m.ZTITLE,
-                    m.ZSUBTITLE
-                FROM ranked_assets_view v
-                JOIN month_batches mb ON v.month = mb.month
-                LEFT JOIN photos_db.ZASSET a ON a.ZUUID = v.asset_id
-                LEFT JOIN photos_db.ZMOMENT m ON a.ZMOMENT = m.Z_PK
-                WHERE mb.status_code >= '600' AND (v.MomentsAlbumName IS NULL OR v.MomentsAlbumName = '')
-                  AND v.score_normalized > 0.50
-                  AND (a.Z_PK IS NULL OR NOT EXISTS (
-                      SELECT 1 FROM photos_db.Z_30ASSETS aa
-                      JOIN photos_db.ZGENERICALBUM ga ON aa.Z_30ALBUMS = ga.Z_PK
-                      WHERE aa.Z_3ASSETS = a.Z_PK
-                        AND LOWER(ga.ZTITLE) IN ('ignore', 'skippublishing')
-                        AND ga.ZTRASHEDSTATE = 0
-                  ))
-                ORDER BY v.score_normalized DESC
-                LIMIT 10
-            """)
-        else:
-            cursor.execute("""
-                SELECT v.original_filename, v.score_normalized, v.month, v.date_created_utc, NULL, NULL
-                FROM ranked_assets_view v
-                JOIN month_batches mb ON v.month = mb.month
-                WHERE mb.status_code >= '600' AND (v.MomentsAlbumName IS NULL OR v.MomentsAlbumName = '')
-                  AND v.score_normalized > 0.50
-                ORDER BY v.score_normalized DESC
-                LIMIT 10
-            """)
-
-        unassigned = cursor.fetchall()
-
-        if unassigned:
-            threshold_report.append("==================================================")
-            threshold_report.append("⚠️  Unassigned High-Rank Assets (Need Moment Naming Decision)")
-            threshold_report.append("==================================================")
-            threshold_report.append("The following highly-ranked assets are not assigned to any Moment album in Apple Photos:")
-            for fname, score, month, date_created, moment_title, moment_subtitle in unassigned:
-                captured_str = "—"
-                if date_created:
-                    try:
-                        dt_utc = None
-                        for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
-                            try:
-                                dt_utc = datetime.strptime(date_created, fmt)
-                                break
-                            except ValueError:
-                                continue
-                        if dt_utc:
-                            dt_utc = dt_utc.replace(tzinfo=timezone.utc)
-                            dt_local = dt_utc.astimezone()
-                            captured_str = dt_local.strftime("%Y-%m-%d %H:%M:%S")
-                        else:
+            if unassigned:
+                threshold_report.append("==================================================")
+                threshold_report.append("⚠️  Unassigned High-Rank Assets (Need Moment Naming Decision)")
+                threshold_report.append("==================================================")
+                threshold_report.append("The following highly-ranked assets are not assigned to any Moment album in Apple Photos:")
+                for fname, score, month, date_created, moment_title, moment_subtitle in unassigned:
+                    captured_str = "—"
+                    if date_created:
+                        try:
+                            dt_utc = None
+                            for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+                                try:
+                                    dt_utc = datetime.strptime(date_created, fmt)
+                                    break
+                                except ValueError:
+                                    continue
+                            if dt_utc:
+                                dt_utc = dt_utc.replace(tzinfo=timezone.utc)
+                                dt_local = dt_utc.astimezone()
+                                captured_str = dt_local.strftime("%Y-%m-%d %H:%M:%S")
+                            else:
+                                captured_str = date_created[:19]
+                        except Exception:
                             captured_str = date_created[:19]
-                    except Exception:
-                        captured_str = date_created[:19]
 
-                moment_parts = []
-                if moment_title:
-                    moment_parts.append(moment_title.replace('\xa0', ' ').strip())
-                if moment_subtitle:
-                    moment_parts.append(moment_subtitle.replace('\xa0', ' ').strip())
+                    moment_parts = []
+                    if moment_title:
+                        moment_parts.append(moment_title.replace('\xa0', ' ').strip())
+                    if moment_subtitle:
+                        moment_parts.append(moment_subtitle.replace('\xa0', ' ').strip())
 
-                suggested_info = ""
-                if moment_parts:
-                    captured_date = captured_str[:10] if captured_str != "—" else (date_created[:10] if date_created else month)
-                    suggested_name = f"{captured_date} - {' - '.join(moment_parts)}"
-                    suggested_info = f", Suggested Album: {suggested_name}"
+                    suggested_info = ""
+                    if moment_parts:
+                        captured_date = captured_str[:10] if captured_str != "—" else (date_created[:10] if date_created else month)
+                        suggested_name = f"{captured_date} - {' - '.join(moment_parts)}"
+                        suggested_info = f", Suggested Album: {suggested_name}"
 
-                threshold_report.append(f" - {fname:<25} (Score: {score:.4f}, Captured: {captured_str}, Month: {month}{suggested_info})")
-            threshold_report.append("👉 Please consider creating a corresponding album under 'Media Organizer on LaCie / Moments' in Apple Photos (creating the album is sufficient, no need to place the files inside).\n")
+                    threshold_report.append(f" - {fname:<25} (Score: {score:.4f}, Captured: {captured_str}, Month: {month}{suggested_info})")
+                threshold_report.append("👉 Please consider creating a corresponding album under 'Media Organizer on LaCie / Moments' in Apple Photos (creating the album is sufficient, no need to place the files inside).\n")
 
-        # Query published moments / folders with stats
-        cursor.execute("""
-            SELECT 
-                p.moment_name,
-                MAX(p.published_at_utc) AS last_published_at,
-                COUNT(DISTINCT p.asset_id) AS published_count,
-                AVG(v.score_normalized) AS avg_score,
-                MIN(v.score_normalized) AS min_score,
-                MAX(v.score_normalized) AS max_score,
-                MIN(a.date_created_utc) AS min_captured,
-                MAX(a.date_created_utc) AS max_captured,
-                GROUP_CONCAT(DISTINCT COALESCE(zea.ZCAMERAMODEL, i.camera_model, 'Unknown')) AS camera_sources,
-                GROUP_CONCAT(DISTINCT p.platform) AS platforms
-            FROM publications p
-            JOIN assets a ON p.asset_id = a.asset_id
-            LEFT JOIN ranked_assets_view v ON v.asset_id = a.asset_id
-            LEFT JOIN imports i ON a.import_id = i.import_uuid
-            LEFT JOIN ZASSET za ON za.ZUUID = a.asset_id
-            LEFT JOIN ZEXTENDEDATTRIBUTES zea ON zea.ZASSET = za.Z_PK
-            GROUP BY p.moment_name
-            ORDER BY MAX(p.published_at_utc) DESC, p.moment_name ASC
-        """)
-        published_folders = cursor.fetchall()
+            # Query published moments / folders with stats
+            cursor.execute("""
+                SELECT 
+                    p.moment_name,
+                    MAX(p.published_at_utc) AS last_published_at,
+                    COUNT(DISTINCT p.asset_id) AS published_count,
+                    AVG(v.score_normalized) AS avg_score,
+                    MIN(v.score_normalized) AS min_score,
+                    MAX(v.score_normalized) AS max_score,
+                    MIN(a.date_created_utc) AS min_captured,
+                    MAX(a.date_created_utc) AS max_captured,
+                    GROUP_CONCAT(DISTINCT COALESCE(zea.ZCAMERAMODEL, i.camera_model, 'Unknown')) AS camera_sources,
+                    GROUP_CONCAT(DISTINCT p.platform) AS platforms
+                FROM publications p
+                JOIN assets a ON p.asset_id = a.asset_id
+                LEFT JOIN ranked_assets v ON v.asset_id = a.asset_id
+                LEFT JOIN imports i ON a.import_id = i.import_uuid
+                LEFT JOIN ZASSET za ON za.ZUUID = a.asset_id
+                LEFT JOIN ZEXTENDEDATTRIBUTES zea ON zea.ZASSET = za.Z_PK
+                GROUP BY p.moment_name
+                ORDER BY MAX(p.published_at_utc) DESC, p.moment_name ASC
+            """)
+            published_folders = cursor.fetchall()
 
-        threshold_report.append("==================================================================================================================================")
-        threshold_report.append("🌟 Published Moments / Folders & Stats")
-        threshold_report.append("==================================================================================================================================")
-        if not published_folders:
-            threshold_report.append("ℹ️  No published moments recorded yet in database.\n")
-        else:
-            threshold_report.append("The following moments have been curated and published:")
-            pub_header = f"{'No.':<4} {'Moment Name':<30} {'Published At (Local)':<22} {'Assets':<8} {'Avg Score':<11} {'Score Range':<17} {'Capture Dates':<24} {'Camera Sources'}"
-            threshold_report.append(pub_header)
-            threshold_report.append("-" * len(pub_header))
-            for idx, p_row in enumerate(published_folders, 1):
-                p_name = p_row[0] or "—"
-                p_date_raw = p_row[1]
-                p_date_str = "—"
-                if p_date_raw:
-                    try:
-                        dt_utc = None
-                        for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
-                            try:
-                                dt_utc = datetime.strptime(p_date_raw, fmt)
-                                break
-                            except ValueError:
-                                continue
-                        if dt_utc:
-                            dt_utc = dt_utc.replace(tzinfo=timezone.utc)
-                            dt_local = dt_utc.astimezone()
-                            p_date_str = dt_local.strftime("%Y-%m-%d %H:%M:%S")
-                        else:
+            threshold_report.append("==================================================================================================================================")
+            threshold_report.append("🌟 Published Moments / Folders & Stats")
+            threshold_report.append("==================================================================================================================================")
+            if not published_folders:
+                threshold_report.append("ℹ️  No published moments recorded yet in database.\n")
+            else:
+                threshold_report.append("The following moments have been curated and published:")
+                pub_header = f"{'No.':<4} {'Moment Name':<30} {'Published At (Local)':<22} {'Assets':<8} {'Avg Score':<11} {'Score Range':<17} {'Capture Dates':<24} {'Camera Sources'}"
+                threshold_report.append(pub_header)
+                threshold_report.append("-" * len(pub_header))
+                for idx, p_row in enumerate(published_folders, 1):
+                    p_name = p_row[0] or "—"
+                    p_date_raw = p_row[1]
+                    p_date_str = "—"
+                    if p_date_raw:
+                        try:
+                            dt_utc = None
+                            for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+                                try:
+                                    dt_utc = datetime.strptime(p_date_raw, fmt)
+                                    break
+                                except ValueError:
+                                    continue
+                            if dt_utc:
+                                dt_utc = dt_utc.replace(tzinfo=timezone.utc)
+                                dt_local = dt_utc.astimezone()
+                                p_date_str = dt_local.strftime("%Y-%m-%d %H:%M:%S")
+                            else:
+                                p_date_str = p_date_raw[:19]
+                        except Exception:
                             p_date_str = p_date_raw[:19]
-                    except Exception:
-                        p_date_str = p_date_raw[:19]
-
-                p_count = str(p_row[2])
-                p_avg = f"{p_row[3]:.4f}" if p_row[3] is not None else "—"
-                p_min = f"{p_row[4]:.4f}" if p_row[4] is not None else "—"
-                p_max = f"{p_row[5]:.4f}" if p_row[5] is not None else "—"
-                score_rng = f"{p_min} - {p_max}" if p_row[4] is not None else "—"
-                d_min = (p_row[6][:10] if p_row[6] else "—")
-                d_max = (p_row[7][:10] if p_row[7] else "—")
-                date_rng = f"{d_min} to {d_max}" if d_min != d_max else d_min
-                c_srcs = (p_row[8] or "Unknown").replace(',', ', ')
-                threshold_report.append(f"{idx:<4} {p_name:<30} {p_date_str:<22} {p_count:<8} {p_avg:<11} {score_rng:<17} {date_rng:<24} {c_srcs}")
-            threshold_report.append("==================================================================================================================================\n")
-
-        # Save to logs/curation_threshold_status.log and print to console
-        try:
-            with open(CURATION_THRESHOLD_LOG_PATH, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(threshold_report) + '\n')
-        except Exception as e:
-            logger.warning(f"Could not write curation threshold log: {e}")
-
-        print('\n' + '\n'.join(threshold_report))
-
-        # 2. Query assets that have Moments and are in status >= 600
-        if photos_db_attached:
-            query = """
-                SELECT v.asset_id, v.MomentsAlbumName, v.score_normalized, v.original_filename,
-                       v.aesthetic_score, v.google_favorite, v.mobile_apple_photos_featured_photos, v.apple_photos_monthly_selection,
-                       (SELECT 1 FROM moment_exports me WHERE me.asset_id = v.asset_id AND me.curation_stage = 'to_be_curated') as is_proposed,
-                       (SELECT 1 FROM moment_exports me WHERE me.asset_id = v.asset_id AND me.curation_stage = 'curated') as is_curated,
-                       (SELECT album_name FROM moment_exports me WHERE me.asset_id = v.asset_id ORDER BY exported_at_utc DESC LIMIT 1) as exported_album_name,
-                       ast.curated_album,
-                       (SELECT 1 FROM publications p WHERE p.asset_id = v.asset_id LIMIT 1) as is_published
-                FROM ranked_assets_view v
-                JOIN assets ast ON v.asset_id = ast.asset_id
-                JOIN month_batches mb ON v.month = mb.month
-                LEFT JOIN photos_db.ZASSET a ON a.ZUUID = v.asset_id
-                WHERE mb.status_code >= '600' AND v.MomentsAlbumName IS NOT NULL AND v.MomentsAlbumName != ''
-                  AND LOWER(v.MomentsAlbumName) NOT IN ('skippublishing', 'ignore')
-                  AND v.score_normalized > ?
-                  AND (a.Z_PK IS NULL OR NOT EXISTS (
-                      SELECT 1 FROM photos_db.Z_30ASSETS aa
-                      JOIN photos_db.ZGENERICALBUM ga ON aa.Z_30ALBUMS = ga.Z_PK
-                      WHERE aa.Z_3ASSETS = a.Z_PK
-                        AND LOWER(ga.ZTITLE) IN ('ignore', 'skippublishing')
-                        AND ga.ZTRASHEDSTATE = 0
-                  ))
-                ORDER BY v.score_normalized DESC
-            """
-        else:
-            query = """
-                SELECT v.asset_id, v.MomentsAlbumName, v.score_normalized, v.original_filename,
-                       v.aesthetic_score, v.google_favorite, v.mobile_apple_photos_featured_photos, v.apple_photos_monthly_selection,
-                       (SELECT 1 FROM moment_exports me WHERE me.asset_id = v.asset_id AND me.curation_stage = 'to_be_curated') as is_proposed,
-                       (SELECT 1 FROM moment_exports me WHERE me.asset_id = v.asset_id AND me.curation_stage = 'curated') as is_curated,
-                       (SELECT album_name FROM moment_exports me WHERE me.asset_id = v.asset_id ORDER BY exported_at_utc DESC LIMIT 1) as exported_album_name,
-                       ast.curated_album,
-                       (SELECT 1 FROM publications p WHERE p.asset_id = v.asset_id LIMIT 1) as is_published
-                FROM ranked_assets_view v
-                JOIN assets ast ON v.asset_id = ast.asset_id
-                JOIN month_batches mb ON v.month = mb.month
-                WHERE mb.status_code >= '600' AND v.MomentsAlbumName IS NOT NULL AND v.MomentsAlbumName != ''
-                  AND LOWER(v.MomentsAlbumName) NOT IN ('skippublishing', 'ignore')
-                  AND v.score_normalized > ?
-                ORDER BY v.score_normalized DESC
-            """
-        cursor.execute(query, (effective_threshold,))
-        rows = cursor.fetchall()
 
-        # Calculate counts of assets in each assigned album
-        album_counts = {}
-        processed_rows = []
-        for row in rows:
-            assigned_album = row[10] if row[10] else (row[11] if row[11] else "—")
-            processed_rows.append((row, assigned_album))
-            album_counts[assigned_album] = album_counts.get(assigned_album, 0) + 1
+                    p_count = str(p_row[2])
+                    p_avg = f"{p_row[3]:.4f}" if p_row[3] is not None else "—"
+                    p_min = f"{p_row[4]:.4f}" if p_row[4] is not None else "—"
+                    p_max = f"{p_row[5]:.4f}" if p_row[5] is not None else "—"
+                    score_rng = f"{p_min} - {p_max}" if p_row[4] is not None else "—"
+                    d_min = (p_row[6][:10] if p_row[6] else "—")
+                    d_max = (p_row[7][:10] if p_row[7] else "—")
+                    date_rng = f"{d_min} to {d_max}" if d_min != d_max else d_min
+                    c_srcs = (p_row[8] or "Unknown").replace(',', ', ')
+                    threshold_report.append(f"{idx:<4} {p_name:<30} {p_date_str:<22} {p_count:<8} {p_avg:<11} {score_rng:<17} {date_rng:<24} {c_srcs}")
+                threshold_report.append("==================================================================================================================================\n")
+
+            # Save to logs/curation_threshold_status.log and print to console
+            try:
+                with open(CURATION_THRESHOLD_LOG_PATH, 'w', encoding='utf-8') as f:
+                    f.write('\n'.join(threshold_report) + '\n')
+            except Exception as e:
+                logger.warning(f"Could not write curation threshold log: {e}")
+
+            print('\n' + '\n'.join(threshold_report))
+
+            # 2. Query assets that have Moments and are in status >= 600
+            if photos_db_attached:
+                query = """
+                    SELECT v.asset_id, v.MomentsAlbumName, v.score_normalized, v.original_filename,
+                           v.aesthetic_score, v.google_favorite, v.mobile_apple_photos_featured_photos, v.apple_photos_monthly_selection,
+                           (SELECT 1 FROM moment_exports me WHERE me.asset_id = v.asset_id AND me.curation_stage = 'to_be_curated') as is_proposed,
+                           (SELECT 1 FROM moment_exports me WHERE me.asset_id = v.asset_id AND me.curation_stage = 'curated') as is_curated,
+                           (SELECT album_name FROM moment_exports me WHERE me.asset_id = v.asset_id ORDER BY exported_at_utc DESC LIMIT 1) as exported_album_name,
+                           ast.curated_album,
+                           (SELECT 1 FROM publications p WHERE p.asset_id = v.asset_id LIMIT 1) as is_published
+                    FROM ranked_assets v
+                    JOIN assets ast ON v.asset_id = ast.asset_id
+                    JOIN month_batches mb ON v.month = mb.month
+                    LEFT JOIN photos_db.ZASSET a ON a.ZUUID = v.asset_id
+                    WHERE mb.status_code >= '600' AND v.MomentsAlbumName IS NOT NULL AND v.MomentsAlbumName != ''
+                      AND LOWER(v.MomentsAlbumName) NOT IN ('skippublishing', 'ignore')
+                      AND v.score_normalized > ?
+                      AND (a.Z_PK IS NULL OR NOT EXISTS (
+                          SELECT 1 FROM photos_db.Z_30ASSETS aa
+                          JOIN photos_db.ZGENERICALBUM ga ON aa.Z_30ALBUMS = ga.Z_PK
+                          WHERE aa.Z_3ASSETS = a.Z_PK
+                            AND LOWER(ga.ZTITLE) IN ('ignore', 'skippublishing')
+                            AND ga.ZTRASHEDSTATE = 0
+                      ))
+                    ORDER BY v.score_normalized DESC
+                """
+            else:
+                query = """
+                    SELECT v.asset_id, v.MomentsAlbumName, v.score_normalized, v.original_filename,
+                           v.aesthetic_score, v.google_favorite, v.mobile_apple_photos_featured_photos, v.apple_photos_monthly_selection,
+                           (SELECT 1 FROM moment_exports me WHERE me.asset_id = v.asset_id AND me.curation_stage = 'to_be_curated') as is_proposed,
+                           (SELECT 1 FROM moment_exports me WHERE me.asset_id = v.asset_id AND me.curation_stage = 'curated') as is_curated,
+                           (SELECT album_name FROM moment_exports me WHERE me.asset_id = v.asset_id ORDER BY exported_at_utc DESC LIMIT 1) as exported_album_name,
+                           ast.curated_album,
+                           (SELECT 1 FROM publications p WHERE p.asset_id = v.asset_id LIMIT 1) as is_published
+                    FROM ranked_assets v
+                    JOIN assets ast ON v.asset_id = ast.asset_id
+                    JOIN month_batches mb ON v.month = mb.month
+                    WHERE mb.status_code >= '600' AND v.MomentsAlbumName IS NOT NULL AND v.MomentsAlbumName != ''
+                      AND LOWER(v.MomentsAlbumName) NOT IN ('skippublishing', 'ignore')
+                      AND v.score_normalized > ?
+                    ORDER BY v.score_normalized DESC
+                """
+            cursor.execute(query, (effective_threshold,))
+            rows = cursor.fetchall()
+
+            # Calculate counts of assets in each assigned album
+            album_counts = {}
+            processed_rows = []
+            for row in rows:
+                assigned_album = row[10] if row[10] else (row[11] if row[11] else "—")
+                processed_rows.append((row, assigned_album))
+                album_counts[assigned_album] = album_counts.get(assigned_album, 0) + 1
             
-        # Sort by: 1. not unassigned ('—' at bottom), 2. album size descending, 3. album name ascending, 4. normalized score descending
-        processed_rows.sort(
-            key=lambda x: (
-                x[1] == "—",
-                -album_counts[x[1]],
-                x[1],
-                -(x[0][2] if x[0][2] is not None else 0.0)
+            # Sort by: 1. not unassigned ('—' at bottom), 2. album size descending, 3. album name ascending, 4. normalized score descending
+            processed_rows.sort(
+                key=lambda x: (
+                    x[1] == "—",
+                    -album_counts[x[1]],
+                    x[1],
+                    -(x[0][2] if x[0][2] is not None else 0.0)
+                )
             )
-        )
 
-        # Build Qualified Assets Scoring Breakdown report for file logging only (not printed to console)
-        scoring_report = []
-        scoring_report.append("=========================================================================================================================")
-        scoring_report.append("📸 Qualified Assets Scoring Breakdown")
-        scoring_report.append("=========================================================================================================================")
-        scoring_report.append(f"{'No.':<4} {'Filename':<25} {'Assigned Album':<30} {'Norm Score':<12} {'Aesthetic':<12} {'Google Fav':<12} {'Apple Feat':<12} {'Monthly Sel':<12}")
-        scoring_report.append("-" * 125)
+            # Build Qualified Assets Scoring Breakdown report for file logging only (not printed to console)
+            scoring_report = []
+            scoring_report.append("=========================================================================================================================")
+            scoring_report.append("📸 Qualified Assets Scoring Breakdown")
+            scoring_report.append("=========================================================================================================================")
+            scoring_report.append(f"{'No.':<4} {'Filename':<25} {'Assigned Album':<30} {'Norm Score':<12} {'Aesthetic':<12} {'Google Fav':<12} {'Apple Feat':<12} {'Monthly Sel':<12}")
+            scoring_report.append("-" * 125)
         
-        for idx, (row, assigned_album) in enumerate(processed_rows, 1):
-            filename = row[3] if row[3] else "—"
-            score_normalized_val = row[2]
-            score_normalized_str = f"{score_normalized_val:.4f}" if score_normalized_val is not None else "—"
-            aesthetic_score_val = row[4]
-            aesthetic_score_str = f"{aesthetic_score_val:.4f}" if aesthetic_score_val is not None else "—"
-            google_fav = "✅ Yes" if row[5] else "❌ No"
-            apple_feat = "✅ Yes" if row[6] else "❌ No"
-            monthly_sel = "✅ Yes" if row[7] else "❌ No"
-            scoring_report.append(f"{idx:<4} {filename:<25} {assigned_album:<30} {score_normalized_str:<12} {aesthetic_score_str:<12} {google_fav:<12} {apple_feat:<12} {monthly_sel:<12}")
-        scoring_report.append("=========================================================================================================================\n")
+            for idx, (row, assigned_album) in enumerate(processed_rows, 1):
+                filename = row[3] if row[3] else "—"
+                score_normalized_val = row[2]
+                score_normalized_str = f"{score_normalized_val:.4f}" if score_normalized_val is not None else "—"
+                aesthetic_score_val = row[4]
+                aesthetic_score_str = f"{aesthetic_score_val:.4f}" if aesthetic_score_val is not None else "—"
+                google_fav = "✅ Yes" if row[5] else "❌ No"
+                apple_feat = "✅ Yes" if row[6] else "❌ No"
+                monthly_sel = "✅ Yes" if row[7] else "❌ No"
+                scoring_report.append(f"{idx:<4} {filename:<25} {assigned_album:<30} {score_normalized_str:<12} {aesthetic_score_str:<12} {google_fav:<12} {apple_feat:<12} {monthly_sel:<12}")
+            scoring_report.append("=========================================================================================================================\n")
 
-        try:
-            with open(SCORING_BREAKDOWN_LOG_PATH, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(scoring_report) + '\n')
-            print(f"📄 Qualified Assets Scoring Breakdown ({len(processed_rows)} assets) saved to: {SCORING_BREAKDOWN_LOG_PATH}\n")
-        except Exception as e:
-            logger.warning(f"Could not write scoring breakdown log: {e}")
+            try:
+                with open(SCORING_BREAKDOWN_LOG_PATH, 'w', encoding='utf-8') as f:
+                    f.write('\n'.join(scoring_report) + '\n')
+                print(f"📄 Qualified Assets Scoring Breakdown ({len(processed_rows)} assets) saved to: {SCORING_BREAKDOWN_LOG_PATH}\n")
+            except Exception as e:
+                logger.warning(f"Could not write scoring breakdown log: {e}")
         
-        # Group by moment name
-        moments_data = {}
-        for row in rows:
-            asset_id, moment_name, score, filename = row[0], row[1], row[2], row[3]
-            is_proposed, is_curated = row[8], row[9]
-            is_published = row[12] if len(row) > 12 else None
-            if moment_name not in moments_data:
-                moments_data[moment_name] = {
-                    'total_qualified': 0,
-                    'proposed_count': 0,
-                    'curated_count': 0,
-                    'scores': [],
-                    'unpublished_scores': []
-                }
-            moments_data[moment_name]['total_qualified'] += 1
-            if is_proposed:
-                moments_data[moment_name]['proposed_count'] += 1
-            if is_curated:
-                moments_data[moment_name]['curated_count'] += 1
-            moments_data[moment_name]['scores'].append(score)
-            if not is_published:
-                moments_data[moment_name]['unpublished_scores'].append(score)
-
-        # 3. Query Apple Photos albums and folders inside Curated and ToBeCurated (to match existence and get counts)
-        applescript_code = """
-        tell application "Photos"
-            set results to {}
-            set parentFolderNames to {"Curated", "ToBeCurated"}
-            repeat with fName in parentFolderNames
-                if exists folder fName of folder "Media Organizer on LaCie" then
-                    set subFolder to folder fName of folder "Media Organizer on LaCie"
-                    set subAlbums to albums of subFolder
-                    repeat with anAlbum in subAlbums
-                        set aName to name of anAlbum
-                        try
-                            set aCount to count of media items of anAlbum
-                        on error
-                            set aCount to 0
-                        end try
-                        copy (fName & "|" & aName & "|" & (aCount as string)) to end of results
-                    end repeat
-                    set subFolders to folders of subFolder
-                    repeat with aFolder in subFolders
-                        set aName to name of aFolder
-                        copy (fName & "|" & aName & "|0") to end of results
-                    end repeat
-                end if
-            end repeat
+            # Group by moment name
+            moments_data = {}
+            for row in rows:
+                asset_id, moment_name, score, filename = row[0], row[1], row[2], row[3]
+                is_proposed, is_curated = row[8], row[9]
+                is_published = row[12] if len(row) > 12 else None
+                if moment_name not in moments_data:
+                    moments_data[moment_name] = {
+                        'total_qualified': 0,
+                        'proposed_count': 0,
+                        'curated_count': 0,
+                        'scores': [],
+                        'unpublished_scores': []
+                    }
+                moments_data[moment_name]['total_qualified'] += 1
+                if is_proposed:
+                    moments_data[moment_name]['proposed_count'] += 1
+                if is_curated:
+                    moments_data[moment_name]['curated_count'] += 1
+                moments_data[moment_name]['scores'].append(score)
+                if not is_published:
+                    moments_data[moment_name]['unpublished_scores'].append(score)
+
+            # 3. Query Apple Photos albums and folders inside Curated and ToBeCurated (to match existence and get counts)
+            applescript_code = """
+            tell application "Photos"
+                set results to {}
+                set parentFolderNames to {"Curated", "ToBeCurated"}
+                repeat with fName in parentFolderNames
+                    if exists folder fName of folder "Media Organizer on LaCie" then
+                        set subFolder to folder fName of folder "Media Organizer on LaCie"
+                        set subAlbums to albums of subFolder
+                        repeat with anAlbum in subAlbums
+                            set aName to name of anAlbum
+                            try
+                                set aCount to count of media items of anAlbum
+                            on error
+                                set aCount to 0
+                            end try
+                            copy (fName & "|" & aName & "|" & (aCount as string)) to end of results
+                        end repeat
+                        set subFolders to folders of subFolder
+                        repeat with aFolder in subFolders
+                            set aName to name of aFolder
+                            copy (fName & "|" & aName & "|0") to end of results
+                        end repeat
+                    end if
+                end repeat
             
-            set oldDelims to AppleScript's text item delimiters
-            set AppleScript's text item delimiters to "\\n"
-            set resultsString to results as string
-            set AppleScript's text item delimiters to oldDelims
-            return resultsString
-        end tell
-        """
-        to_be_curated_albums = {}
-        curated_albums = {}
-        try:
-            process = subprocess.Popen(['osascript', '-e', applescript_code], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            stdout, stderr = process.communicate()
-            if stdout:
-                parts = [p.strip() for p in stdout.strip().split('\n')]
-                for p in parts:
-                    if '|' in p:
-                        subparts = p.split('|')
-                        if len(subparts) >= 2:
-                            folder_name_clean = subparts[0].strip()
-                            album_name_clean = subparts[1].strip()
-                            item_count = 0
-                            if len(subparts) >= 3:
-                                try:
-                                    item_count = int(subparts[2].strip())
-                                except ValueError:
-                                    pass
+                set oldDelims to AppleScript's text item delimiters
+                set AppleScript's text item delimiters to "\\n"
+                set resultsString to results as string
+                set AppleScript's text item delimiters to oldDelims
+                return resultsString
+            end tell
+            """
+            to_be_curated_albums = {}
+            curated_albums = {}
+            try:
+                process = subprocess.Popen(['osascript', '-e', applescript_code], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+                stdout, stderr = process.communicate()
+                if stdout:
+                    parts = [p.strip() for p in stdout.strip().split('\n')]
+                    for p in parts:
+                        if '|' in p:
+                            subparts = p.split('|')
+                            if len(subparts) >= 2:
+                                folder_name_clean = subparts[0].strip()
+                                album_name_clean = subparts[1].strip()
+                                item_count = 0
+                                if len(subparts) >= 3:
+                                    try:
+                                        item_count = int(subparts[2].strip())
+                                    except ValueError:
+                                        pass
                             
-                            if folder_name_clean == 'ToBeCurated':
-                                to_be_curated_albums[album_name_clean] = item_count
-                            elif folder_name_clean == 'Curated':
-                                curated_albums[album_name_clean] = item_count
-        except Exception as e:
-            logger.warning(f"Could not list Apple Photos albums: {e}")
+                                if folder_name_clean == 'ToBeCurated':
+                                    to_be_curated_albums[album_name_clean] = item_count
+                                elif folder_name_clean == 'Curated':
+                                    curated_albums[album_name_clean] = item_count
+            except Exception as e:
+                logger.warning(f"Could not list Apple Photos albums: {e}")
 
-        # 4. Fetch memory_stage from curated_moments table
-        cursor.execute("SELECT moment_name, memory_stage FROM curated_moments")
-        stages = dict(cursor.fetchall())
+            # 4. Fetch memory_stage from curated_moments table
+            cursor.execute("SELECT moment_name, memory_stage FROM curated_moments")
+            stages = dict(cursor.fetchall())
 
-        # 4.5 Fetch publication information with score stats
-        cursor.execute("""
-            SELECT 
-                p.moment_name,
-                MAX(p.published_at_utc) AS last_published_at,
-                COUNT(DISTINCT p.asset_id) AS pub_count,
-                AVG(v.score_normalized) AS pub_avg_score,
-                MIN(v.score_normalized) AS pub_min_score,
-                MAX(v.score_normalized) AS pub_max_score
-            FROM publications p
-            JOIN assets a ON p.asset_id = a.asset_id
-            LEFT JOIN ranked_assets_view v ON v.asset_id = a.asset_id
-            GROUP BY p.moment_name
-        """)
-        pub_info = {
-            row[0]: {
-                'last_pub_utc': row[1],
-                'pub_count': row[2],
-                'pub_avg': row[3],
-                'pub_min': row[4],
-                'pub_max': row[5]
+            # 4.5 Fetch publication information with score stats
+            cursor.execute("""
+                SELECT 
+                    p.moment_name,
+                    MAX(p.published_at_utc) AS last_published_at,
+                    COUNT(DISTINCT p.asset_id) AS pub_count,
+                    AVG(v.score_normalized) AS pub_avg_score,
+                    MIN(v.score_normalized) AS pub_min_score,
+                    MAX(v.score_normalized) AS pub_max_score
+                FROM publications p
+                JOIN assets a ON p.asset_id = a.asset_id
+                LEFT JOIN ranked_assets v ON v.asset_id = a.asset_id
+                GROUP BY p.moment_name
+            """)
+            pub_info = {
+                row[0]: {
+                    'last_pub_utc': row[1],
+                    'pub_count': row[2],
+                    'pub_avg': row[3],
+                    'pub_min': row[4],
+                    'pub_max': row[5]
+                }
+                for row in cursor.fetchall()
             }
-            for row in cursor.fetchall()
-        }
 
-        # 5. Format and display status report
-        print("\n==================================================")
-        print("🌟 Weekly Memory Feature & Publishing (Mode [M])")
-        print("==================================================")
+            # 5. Format and display status report
+            print("\n==================================================")
+            print("🌟 Weekly Memory Feature & Publishing (Mode [M])")
+            print("==================================================")
         
-        ranked_moments = []
-        for name, data in moments_data.items():
-            target_scores = data['unpublished_scores']
-            avg_score = sum(target_scores) / len(target_scores) if target_scores else 0.0
-            stage = stages.get(name, 'M100')
+            ranked_moments = []
+            for name, data in moments_data.items():
+                target_scores = data['unpublished_scores']
+                avg_score = sum(target_scores) / len(target_scores) if target_scores else 0.0
+                stage = stages.get(name, 'M100')
             
-            # Check Apple Photos existence
-            to_be_curated_exists = (name in to_be_curated_albums)
-            curated_exists = (name in curated_albums)
+                # Check Apple Photos existence
+                to_be_curated_exists = (name in to_be_curated_albums)
+                curated_exists = (name in curated_albums)
             
-            # Check filesystem curated directory existence
-            fs_curated_exists = os.path.exists(os.path.join(CURATED_LACIE_DIR, name))
+                # Check filesystem curated directory existence
+                fs_curated_exists = os.path.exists(os.path.join(CURATED_LACIE_DIR, name))
             
-            # Count-weighted rank score to prevent small/single-asset moments from dominating
-            rank_score = avg_score * math.log(data['total_qualified'] + 1)
+                # Count-weighted rank score to prevent small/single-asset moments from dominating
+                rank_score = avg_score * math.log(data['total_qualified'] + 1)
             
-            p_data = pub_info.get(name, {})
-            last_pub_raw = p_data.get('last_pub_utc')
-            pub_count = p_data.get('pub_count', 0)
-            pub_avg = p_data.get('pub_avg')
-            pub_min = p_data.get('pub_min')
-            pub_max = p_data.get('pub_max')
-
-            last_pub_str = "—"
-            if last_pub_raw:
-                try:
-                    dt_utc = None
-                    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
-                        try:
-                            dt_utc = datetime.strptime(last_pub_raw, fmt)
-                            break
-                        except ValueError:
-                            continue
-                    if dt_utc:
-                        dt_utc = dt_utc.replace(tzinfo=timezone.utc)
-                        dt_local = dt_utc.astimezone()
-                        last_pub_str = dt_local.strftime("%Y-%m-%d %H:%M")
-                    else:
+                p_data = pub_info.get(name, {})
+                last_pub_raw = p_data.get('last_pub_utc')
+                pub_count = p_data.get('pub_count', 0)
+                pub_avg = p_data.get('pub_avg')
+                pub_min = p_data.get('pub_min')
+                pub_max = p_data.get('pub_max')
+
+                last_pub_str = "—"
+                if last_pub_raw:
+                    try:
+                        dt_utc = None
+                        for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
+                            try:
+                                dt_utc = datetime.strptime(last_pub_raw, fmt)
+                                break
+                            except ValueError:
+                                continue
+                        if dt_utc:
+                            dt_utc = dt_utc.replace(tzinfo=timezone.utc)
+                            dt_local = dt_utc.astimezone()
+                            last_pub_str = dt_local.strftime("%Y-%m-%d %H:%M")
+                        else:
+                            last_pub_str = last_pub_raw[:16]
+                    except Exception:
                         last_pub_str = last_pub_raw[:16]
-                except Exception:
-                    last_pub_str = last_pub_raw[:16]
             
-            # Check if featured/published in less than a month (30 days)
-            too_recent = False
-            if last_pub_raw:
-                try:
-                    pub_dt = datetime.strptime(last_pub_raw.split('.')[0], "%Y-%m-%d %H:%M:%S")
-                except ValueError:
+                # Check if featured/published in less than a month (30 days)
+                too_recent = False
+                if last_pub_raw:
                     try:
-                        pub_dt = datetime.strptime(last_pub_raw, "%Y-%m-%d")
+                        pub_dt = datetime.strptime(last_pub_raw.split('.')[0], "%Y-%m-%d %H:%M:%S")
                     except ValueError:
-                        pub_dt = None
+                        try:
+                            pub_dt = datetime.strptime(last_pub_raw, "%Y-%m-%d")
+                        except ValueError:
+                            pub_dt = None
                 
-                if pub_dt:
-                    diff = datetime.now() - pub_dt
-                    if diff.days < 30:
-                        too_recent = True
+                    if pub_dt:
+                        diff = datetime.now() - pub_dt
+                        if diff.days < 30:
+                            too_recent = True
             
-            has_unpublished = (fs_curated_exists and data['curated_count'] > 0 and data['curated_count'] > pub_count)
-            if not has_unpublished:
-                can_publish_str = "❌ No"
-            elif too_recent:
-                can_publish_str = "❌ Recent (<30d)"
-            else:
-                can_publish_str = "✅ Yes"
+                has_unpublished = (fs_curated_exists and data['curated_count'] > 0 and data['curated_count'] > pub_count)
+                if not has_unpublished:
+                    can_publish_str = "❌ No"
+                elif too_recent:
+                    can_publish_str = "❌ Recent (<30d)"
+                else:
+                    can_publish_str = "✅ Yes"
             
-            # Determine asset count to display (use filesystem count if curated folder exists,
-            # fallback to database curated count if present, otherwise total qualified proposed assets)
-            fs_curated_path = os.path.join(CURATED_LACIE_DIR, name)
-            fs_count = 0
-            fs_bases = set()
-            if os.path.exists(fs_curated_path):
-                try:
-                    all_files = [f for f in os.listdir(fs_curated_path) 
-                                 if os.path.isfile(os.path.join(fs_curated_path, f)) 
-                                 and not f.startswith('.')]
-                    # Group by base name to treat Live Photos (HEIC + MOV) as a single asset
-                    fs_bases = set(os.path.splitext(f)[0].lower() for f in all_files)
-                    fs_count = len(fs_bases)
-                except Exception:
-                    pass
-
-            if fs_count > 0:
-                assets_display = str(fs_count)
-            elif name in curated_albums:
-                # Use count from Apple Photos Curated album if available (before filesystem export)
-                assets_display = str(curated_albums[name])
-            elif data['curated_count'] > 0:
-                assets_display = str(data['curated_count'])
-            else:
-                assets_display = str(data['total_qualified'])
-
-            # Compare Apple Photos Curated album assets with local filesystem folder contents
-            curated_str = "❌ No"
-            if curated_exists and fs_curated_exists:
-                # Retrieve Apple Photos Curated album asset base names from Photos DB
-                photos_bases = set()
-                if photos_db_attached:
+                # Determine asset count to display (use filesystem count if curated folder exists,
+                # fallback to database curated count if present, otherwise total qualified proposed assets)
+                fs_curated_path = os.path.join(CURATED_LACIE_DIR, name)
+                fs_count = 0
+                fs_bases = set()
+                if os.path.exists(fs_curated_path):
                     try:
-                        cursor.execute("""
-                            SELECT DISTINCT aaa.ZORIGINALFILENAME
-                            FROM photos_db.ZGENERICALBUM ga
-                            JOIN photos_db.Z_30ASSETS aa ON aa.Z_30ALBUMS = ga.Z_PK
-                            JOIN photos_db.ZASSET a ON aa.Z_3ASSETS = a.Z_PK
-                            JOIN photos_db.ZADDITIONALASSETATTRIBUTES aaa ON aaa.ZASSET = a.Z_PK
-                            LEFT JOIN photos_db.ZGENERICALBUM p ON ga.ZPARENTFOLDER = p.Z_PK
-                            WHERE ga.ZTITLE = ? AND ga.ZTRASHEDSTATE = 0 AND ga.ZKIND <> 1507
-                              AND p.ZTITLE = 'Curated'
-                        """, (name,))
-                        photos_bases = set(os.path.splitext(row[0])[0].lower() for row in cursor.fetchall() if row[0])
-                    except Exception as e:
-                        logger.warning(f"Error querying Photos curated album assets for {name}: {e}")
-
-                if photos_db_attached and photos_bases:
-                    if photos_bases == fs_bases:
-                        curated_str = "✅ Yes"
-                    else:
-                        curated_str = "⚠️  Mismatch"
+                        all_files = [f for f in os.listdir(fs_curated_path) 
+                                     if os.path.isfile(os.path.join(fs_curated_path, f)) 
+                                     and not f.startswith('.')]
+                        # Group by base name to treat Live Photos (HEIC + MOV) as a single asset
+                        fs_bases = set(os.path.splitext(f)[0].lower() for f in all_files)
+                        fs_count = len(fs_bases)
+                    except Exception:
+                        pass
+
+                if fs_count > 0:
+                    assets_display = str(fs_count)
+                elif name in curated_albums:
+                    # Use count from Apple Photos Curated album if available (before filesystem export)
+                    assets_display = str(curated_albums[name])
+                elif data['curated_count'] > 0:
+                    assets_display = str(data['curated_count'])
                 else:
-                    curated_str = "✅ Yes"
-            elif curated_exists and not fs_curated_exists:
-                curated_str = "📁 Needs Folder"
-            elif not curated_exists and fs_curated_exists:
-                curated_str = "📁 Local Only"
+                    assets_display = str(data['total_qualified'])
+
+                # Compare Apple Photos Curated album assets with local filesystem folder contents
+                curated_str = "❌ No"
+                if curated_exists and fs_curated_exists:
+                    # Retrieve Apple Photos Curated album asset base names from Photos DB
+                    photos_bases = set()
+                    if photos_db_attached:
+                        try:
+                            cursor.execute("""
+                                SELECT DISTINCT aaa.ZORIGINALFILENAME
+                                FROM photos_db.ZGENERICALBUM ga
+                                JOIN photos_db.Z_30ASSETS aa ON aa.Z_30ALBUMS = ga.Z_PK
+                                JOIN photos_db.ZASSET a ON aa.Z_3ASSETS = a.Z_PK
+                                JOIN photos_db.ZADDITIONALASSETATTRIBUTES aaa ON aaa.ZASSET = a.Z_PK
+                                LEFT JOIN photos_db.ZGENERICALBUM p ON ga.ZPARENTFOLDER = p.Z_PK
+                                WHERE ga.ZTITLE = ? AND ga.ZTRASHEDSTATE = 0 AND ga.ZKIND <> 1507
+                                  AND p.ZTITLE = 'Curated'
+                            """, (name,))
+                            photos_bases = set(os.path.splitext(row[0])[0].lower() for row in cursor.fetchall() if row[0])
+                        except Exception as e:
+                            logger.warning(f"Error querying Photos curated album assets for {name}: {e}")
 
-            pub_display = str(pub_count) if pub_count > 0 else "—"
-            pub_avg_str = f"{pub_avg:.4f}" if pub_avg is not None else "—"
-            pub_range_str = f"{pub_min:.4f} - {pub_max:.4f}" if pub_min is not None else "—"
+                    if photos_db_attached and photos_bases:
+                        if photos_bases == fs_bases:
+                            curated_str = "✅ Yes"
+                        else:
+                            curated_str = "⚠️  Mismatch"
+                    else:
+                        curated_str = "✅ Yes"
+                elif curated_exists and not fs_curated_exists:
+                    curated_str = "📁 Needs Folder"
+                elif not curated_exists and fs_curated_exists:
+                    curated_str = "📁 Local Only"
 
-            ranked_moments.append({
-                'name': name,
-                'total_qualified': data['total_qualified'],
-                'proposed_count': data['proposed_count'],
-                'curated_count': data['curated_count'],
-                'avg_score': avg_score,
-                'min_score': min(target_scores) if target_scores else 0.0,
-                'max_score': max(target_scores) if target_scores else 0.0,
-                'rank_score': rank_score,
-                'stage': stage,
-                'to_be_curated_exists': to_be_curated_exists,
-                'curated_exists': curated_exists,
-                'fs_curated_exists': fs_curated_exists,
-                'pub_count': pub_count,
-                'pub_display': pub_display,
-                'pub_avg_str': pub_avg_str,
-                'pub_range_str': pub_range_str,
-                'last_pub_str': last_pub_str,
-                'can_publish_str': can_publish_str,
-                'assets_display': assets_display,
-                'curated_str': curated_str
-            })
+                pub_display = str(pub_count) if pub_count > 0 else "—"
+                pub_avg_str = f"{pub_avg:.4f}" if pub_avg is not None else "—"
+                pub_range_str = f"{pub_min:.4f} - {pub_max:.4f}" if pub_min is not None else "—"
 
-        # Detach photos_db now that we are done querying it for moments list
-        if photos_db_attached:
-            try:
-                cursor.execute("DETACH DATABASE photos_db;")
-            except Exception as e:
-                logger.warning(f"Could not detach Photos.sqlite: {e}")
+                ranked_moments.append({
+                    'name': name,
+                    'total_qualified': data['total_qualified'],
+                    'proposed_count': data['proposed_count'],
+                    'curated_count': data['curated_count'],
+                    'avg_score': avg_score,
+                    'min_score': min(target_scores) if target_scores else 0.0,
+                    'max_score': max(target_scores) if target_scores else 0.0,
+                    'rank_score': rank_score,
+                    'stage': stage,
+                    'to_be_curated_exists': to_be_curated_exists,
+                    'curated_exists': curated_exists,
+                    'fs_curated_exists': fs_curated_exists,
+                    'pub_count': pub_count,
+                    'pub_display': pub_display,
+                    'pub_avg_str': pub_avg_str,
+                    'pub_range_str': pub_range_str,
+                    'last_pub_str': last_pub_str,
+                    'can_publish_str': can_publish_str,
+                    'assets_display': assets_display,
+                    'curated_str': curated_str
+                })
 
         # Sort by: 
         # 1. Needs update (proposed + curated < total_qualified)
@@ -1537,7 +1432,7 @@ def run_memory_publishing_flow(cursor=None, conn=None):
         cursor.execute("""
             SELECT a.curated_album, v.MomentsAlbumName, a.date_created_utc
             FROM assets a
-            LEFT JOIN ranked_assets_view v ON v.asset_id = a.asset_id
+            LEFT JOIN ranked_assets v ON v.asset_id = a.asset_id
             WHERE a.date_created_utc IS NOT NULL
         """)
         all_asset_dates = cursor.fetchall()
@@ -1696,7 +1591,7 @@ def run_memory_publishing_flow(cursor=None, conn=None):
             # Query database scores for all assets strictly assigned to this moment under Moments
             cursor.execute("""
                 SELECT original_filename, score_normalized, asset_id 
-                FROM ranked_assets_view 
+                FROM ranked_assets 
                 WHERE MomentsAlbumName = ?
             """, (name,))
             db_assets = cursor.fetchall()
@@ -1867,11 +1762,6 @@ def run_memory_publishing_flow(cursor=None, conn=None):
             print("✅ 'Publishing Recommendation' folder is up to date!")
 
         # Close database connection and release lock before action prompt
-        if photos_db_attached:
-            try:
-                cursor.execute("DETACH DATABASE photos_db")
-            except Exception:
-                pass
         close_conn()
         release_planner_lock()
 
@@ -1893,7 +1783,7 @@ def run_memory_publishing_flow(cursor=None, conn=None):
             release_planner_lock()
             os.execv(sys.executable, [sys.executable] + sys.argv)
         elif choice == '1':
-            acquire_planner_lock()
+            acquire_planner_lock(write=True)
             script_dir = os.path.dirname(os.path.abspath(__file__))
             logger.info("Syncing proposed assets to Apple Photos...")
             try:
@@ -1922,7 +1812,7 @@ def run_memory_publishing_flow(cursor=None, conn=None):
                     logger.warning("Aborted export.")
                     continue
                     
-            acquire_planner_lock()
+            acquire_planner_lock(write=True)
             script_dir = os.path.dirname(os.path.abspath(__file__))
             try:
                 subprocess.run([sys.executable, os.path.join(script_dir, "export_curated_album.py"), moment_name], check=True)
@@ -1947,9 +1837,8 @@ def run_memory_publishing_flow(cursor=None, conn=None):
                 print(f"⚠️ Cannot publish '{moment_name}': {selected_rec['action']}")
                 continue
 
-            acquire_planner_lock()
+            acquire_planner_lock(write=True)
             conn = get_connection()
-            conn.execute("PRAGMA busy_timeout = 30000")
             cursor = get_cursor()
 
             cursor.execute("""
@@ -2047,144 +1936,139 @@ def manage_device_owners_flow(cursor=None, conn=None):
     while True:
         acquire_planner_lock()
         conn = get_connection()
-        conn.execute("PRAGMA busy_timeout = 30000")
         cursor = get_cursor()
 
-        # Attach photos_db for counting assets by camera model
-        photos_db_attached = False
-        try:
-            cursor.execute(f"ATTACH DATABASE 'file:{APPLE_PHOTOS_DB_PATH}?mode=ro' AS photos_db")
-            photos_db_attached = True
-        except Exception:
-            pass
+        with ExitStack() as photos_stack:
+            # Attach photos_db for counting assets by camera model
+            photos_db_attached = False
+            try:
+                photos_stack.enter_context(photos_snapshot(cursor))
+                photos_db_attached = True
+            except Exception:
+                pass
 
-        # Get all distinct camera models from imports/assets and count/timestamp them
-        counts_dict = {}
-        try:
-            cursor.execute("""
-                WITH model_stats AS (
-                    SELECT 
-                        zea.ZCAMERAMODEL AS model,
-                        COUNT(a.asset_id) AS total_count
-                    FROM assets a
-                    JOIN photos_db.ZASSET za ON za.ZUUID = a.asset_id
-                    JOIN photos_db.ZEXTENDEDATTRIBUTES zea ON zea.ZASSET = za.Z_PK
-                    WHERE zea.ZCAMERAMODEL IS NOT NULL AND zea.ZCAMERAMODEL != ''
-                    GROUP BY model
-                ),
-                ranked_assets AS (
+            # Get all distinct camera models from imports/assets and count/timestamp them
+            counts_dict = {}
+            try:
+                cursor.execute("""
+                    WITH model_stats AS (
+                        SELECT 
+                            zea.ZCAMERAMODEL AS model,
+                            COUNT(a.asset_id) AS total_count
+                        FROM assets a
+                        JOIN photos_db.ZASSET za ON za.ZUUID = a.asset_id
+                        JOIN photos_db.ZEXTENDEDATTRIBUTES zea ON zea.ZASSET = za.Z_PK
+                        WHERE zea.ZCAMERAMODEL IS NOT NULL AND zea.ZCAMERAMODEL != ''
+                        GROUP BY model
+                    ),
+                    ranked_assets AS (
+                        SELECT 
+                            zea.ZCAMERAMODEL AS model,
+                            a.original_filename,
+                            date(za.ZDATECREATED + 978307200, 'unixepoch') AS created_time,
+                            ROW_NUMBER() OVER(PARTITION BY zea.ZCAMERAMODEL ORDER BY za.ZDATECREATED ASC, a.original_filename ASC) as rn_asc,
+                            ROW_NUMBER() OVER(PARTITION BY zea.ZCAMERAMODEL ORDER BY za.ZDATECREATED DESC, a.original_filename DESC) as rn_desc
+                        FROM assets a
+                        JOIN photos_db.ZASSET za ON za.ZUUID = a.asset_id
+                        JOIN photos_db.ZEXTENDEDATTRIBUTES zea ON zea.ZASSET = za.Z_PK
+                        WHERE zea.ZCAMERAMODEL IS NOT NULL AND zea.ZCAMERAMODEL != ''
+                          AND date(za.ZDATECREATED + 978307200, 'unixepoch') > '1970-01-01'
+                          AND date(za.ZDATECREATED + 978307200, 'unixepoch') NOT LIKE '0001-%'
+                    )
                     SELECT 
-                        zea.ZCAMERAMODEL AS model,
-                        a.original_filename,
-                        date(za.ZDATECREATED + 978307200, 'unixepoch') AS created_time,
-                        ROW_NUMBER() OVER(PARTITION BY zea.ZCAMERAMODEL ORDER BY za.ZDATECREATED ASC, a.original_filename ASC) as rn_asc,
-                        ROW_NUMBER() OVER(PARTITION BY zea.ZCAMERAMODEL ORDER BY za.ZDATECREATED DESC, a.original_filename DESC) as rn_desc
-                    FROM assets a
-                    JOIN photos_db.ZASSET za ON za.ZUUID = a.asset_id
-                    JOIN photos_db.ZEXTENDEDATTRIBUTES zea ON zea.ZASSET = za.Z_PK
-                    WHERE zea.ZCAMERAMODEL IS NOT NULL AND zea.ZCAMERAMODEL != ''
-                      AND date(za.ZDATECREATED + 978307200, 'unixepoch') > '1970-01-01'
-                      AND date(za.ZDATECREATED + 978307200, 'unixepoch') NOT LIKE '0001-%'
-                )
-                SELECT 
-                    ms.model,
-                    ms.total_count,
-                    MAX(case when ra.rn_asc = 1 then ra.original_filename end) as min_filename,
-                    MAX(case when ra.rn_asc = 1 then ra.created_time end) as min_created,
-                    MAX(case when ra.rn_desc = 1 then ra.original_filename end) as max_filename,
-                    MAX(case when ra.rn_desc = 1 then ra.created_time end) as max_created
-                FROM model_stats ms
-                LEFT JOIN ranked_assets ra ON ms.model = ra.model AND (ra.rn_asc = 1 OR ra.rn_desc = 1)
-                GROUP BY ms.model, ms.total_count
-            """)
-            for r in cursor.fetchall():
-                counts_dict[r[0]] = {
-                    'count': r[1],
-                    'min_filename': r[2],
-                    'min_created': r[3],
-                    'max_filename': r[4],
-                    'max_created': r[5]
-                }
-        except Exception as e:
-            logger.debug(f"Could not count assets by device model: {e}")
+                        ms.model,
+                        ms.total_count,
+                        MAX(case when ra.rn_asc = 1 then ra.original_filename end) as min_filename,
+                        MAX(case when ra.rn_asc = 1 then ra.created_time end) as min_created,
+                        MAX(case when ra.rn_desc = 1 then ra.original_filename end) as max_filename,
+                        MAX(case when ra.rn_desc = 1 then ra.created_time end) as max_created
+                    FROM model_stats ms
+                    LEFT JOIN ranked_assets ra ON ms.model = ra.model AND (ra.rn_asc = 1 OR ra.rn_desc = 1)
+                    GROUP BY ms.model, ms.total_count
+                """)
+                for r in cursor.fetchall():
+                    counts_dict[r[0]] = {
+                        'count': r[1],
+                        'min_filename': r[2],
+                        'min_created': r[3],
+                        'max_filename': r[4],
+                        'max_created': r[5]
+                    }
+            except Exception as e:
+                logger.debug(f"Could not count assets by device model: {e}")
 
-        # Merge with constants DEVICE_OWNER_MAPPING
-        db_models = list(counts_dict.keys())
-        all_unique_models = list(set(db_models + list(DEVICE_OWNER_MAPPING.keys())))
+            # Merge with constants DEVICE_OWNER_MAPPING
+            db_models = list(counts_dict.keys())
+            all_unique_models = list(set(db_models + list(DEVICE_OWNER_MAPPING.keys())))
         
-        models_list = []
-        for model in all_unique_models:
-            if model == 'Unknown' or not model:
-                continue
-            item_data = counts_dict.get(model, {})
-            count = item_data.get('count', 0)
-            min_filename = item_data.get('min_filename', '—') or '—'
-            min_created = item_data.get('min_created', '—') or '—'
-            max_filename = item_data.get('max_filename', '—') or '—'
-            max_created = item_data.get('max_created', '—') or '—'
-            owner, src_type = resolve_device_owner(cursor, model)
-            models_list.append({
-                'model': model,
-                'count': count,
-                'min_filename': min_filename,
-                'min_created': min_created,
-                'max_filename': max_filename,
-                'max_created': max_created,
-                'owner': owner,
-                'src_type': src_type
-            })
+            models_list = []
+            for model in all_unique_models:
+                if model == 'Unknown' or not model:
+                    continue
+                item_data = counts_dict.get(model, {})
+                count = item_data.get('count', 0)
+                min_filename = item_data.get('min_filename', '—') or '—'
+                min_created = item_data.get('min_created', '—') or '—'
+                max_filename = item_data.get('max_filename', '—') or '—'
+                max_created = item_data.get('max_created', '—') or '—'
+                owner, src_type = resolve_device_owner(cursor, model)
+                models_list.append({
+                    'model': model,
+                    'count': count,
+                    'min_filename': min_filename,
+                    'min_created': min_created,
+                    'max_filename': max_filename,
+                    'max_created': max_created,
+                    'owner': owner,
+                    'src_type': src_type
+                })
 
-        # Sort by asset count ascending, then model name ascending to keep most-used at the bottom
-        models_list.sort(key=lambda x: (x['count'], x['model']))
-
-        print("\n" + "=" * 161)
-        print("👤  MANAGE DEVICE PRIMARY OWNERS")
-        print("=" * 161)
-        print(f"{'No.':<4} {'Device Camera Model':<36} {'Asset Count':<13} {'Earliest Created Asset (Filename & Date)':<38} {'Latest Created Asset (Filename & Date)':<38} {'Current Owner':<16} {'Source Type':<16}")
-        print("-" * 161)
-
-        model_owners = []
-        for idx, item in enumerate(models_list, 1):
-            earliest_str = f"{item['min_filename']} ({item['min_created']})" if item['min_filename'] != '—' else '—'
-            latest_str = f"{item['max_filename']} ({item['max_created']})" if item['max_filename'] != '—' else '—'
-            print(f"{idx:<4} {item['model']:<36} {item['count']:<13,} {earliest_str:<38} {latest_str:<38} {item['owner']:<16} {item['src_type']:<16}")
-            model_owners.append((item['model'], item['owner']))
-
-        print("-" * 185)
-
-        # Filter and group overrides
-        overrides_by_owner = {}
-        for item in models_list:
-            if item['src_type'] == 'Database Override':
-                owner = item['owner']
-                if owner not in overrides_by_owner:
-                    overrides_by_owner[owner] = []
-                overrides_by_owner[owner].append(item)
-
-        if overrides_by_owner:
-            print("\n" + "=" * 100)
-            print("👤  DEVICE TIMELINE BY OWNER (DATABASE OVERRIDES ONLY)")
-            print("=" * 100)
-            print(f"{'Primary Owner':<16} {'Device Camera Model':<36} {'Asset Count':<14} {'Earliest Date':<15} {'Latest Date':<15}")
-            print("-" * 100)
-
-            for owner in sorted(overrides_by_owner.keys()):
-                devices = overrides_by_owner[owner]
-                devices.sort(key=lambda x: x['min_created'] if x['min_created'] != '—' else '9999-12-31')
+            # Sort by asset count ascending, then model name ascending to keep most-used at the bottom
+            models_list.sort(key=lambda x: (x['count'], x['model']))
+
+            print("\n" + "=" * 161)
+            print("👤  MANAGE DEVICE PRIMARY OWNERS")
+            print("=" * 161)
+            print(f"{'No.':<4} {'Device Camera Model':<36} {'Asset Count':<13} {'Earliest Created Asset (Filename & Date)':<38} {'Latest Created Asset (Filename & Date)':<38} {'Current Owner':<16} {'Source Type':<16}")
+            print("-" * 161)
+
+            model_owners = []
+            for idx, item in enumerate(models_list, 1):
+                earliest_str = f"{item['min_filename']} ({item['min_created']})" if item['min_filename'] != '—' else '—'
+                latest_str = f"{item['max_filename']} ({item['max_created']})" if item['max_filename'] != '—' else '—'
+                print(f"{idx:<4} {item['model']:<36} {item['count']:<13,} {earliest_str:<38} {latest_str:<38} {item['owner']:<16} {item['src_type']:<16}")
+                model_owners.append((item['model'], item['owner']))
+
+            print("-" * 185)
+
+            # Filter and group overrides
+            overrides_by_owner = {}
+            for item in models_list:
+                if item['src_type'] == 'Database Override':
+                    owner = item['owner']
+                    if owner not in overrides_by_owner:
+                        overrides_by_owner[owner] = []
+                    overrides_by_owner[owner].append(item)
+
+            if overrides_by_owner:
+                print("\n" + "=" * 100)
+                print("👤  DEVICE TIMELINE BY OWNER (DATABASE OVERRIDES ONLY)")
+                print("=" * 100)
+                print(f"{'Primary Owner':<16} {'Device Camera Model':<36} {'Asset Count':<14} {'Earliest Date':<15} {'Latest Date':<15}")
+                print("-" * 100)
+
+                for owner in sorted(overrides_by_owner.keys()):
+                    devices = overrides_by_owner[owner]
+                    devices.sort(key=lambda x: x['min_created'] if x['min_created'] != '—' else '9999-12-31')
                 
-                first_row = True
-                for dev in devices:
-                    owner_col = owner if first_row else ""
-                    print(f"{owner_col:<16} {dev['model']:<36} {dev['count']:<14,} {dev['min_created']:<15} {dev['max_created']:<15}")
-                    first_row = False
-            print("-" * 100)
-
-        # Detach and release before waiting for user action prompts
-        if photos_db_attached:
-            try:
-                cursor.execute("DETACH DATABASE photos_db")
-            except Exception:
-                pass
+                    first_row = True
+                    for dev in devices:
+                        owner_col = owner if first_row else ""
+                        print(f"{owner_col:<16} {dev['model']:<36} {dev['count']:<14,} {dev['min_created']:<15} {dev['max_created']:<15}")
+                        first_row = False
+                print("-" * 100)
+
+        # Release before waiting for user action prompts
         close_conn()
         release_planner_lock()
 
@@ -2204,9 +2088,8 @@ def manage_device_owners_flow(cursor=None, conn=None):
                 new_owner = input(f"Enter new owner name for '{selected_model}' (leave empty to reset to default): ").strip()
                 
                 # Now perform the update, acquire lock and connect
-                acquire_planner_lock()
+                acquire_planner_lock(write=True)
                 conn = get_connection()
-                conn.execute("PRAGMA busy_timeout = 30000")
                 cursor = get_cursor()
                 
                 # Check if empty, then delete override
@@ -2234,25 +2117,39 @@ def manage_device_owners_flow(cursor=None, conn=None):
                     pass
                 release_planner_lock()
 
-    # Detach database safely at exit of flow
-    try:
-        cursor.execute("DETACH DATABASE photos_db")
-    except Exception:
-        pass
-
 def display_media_cleanup_recommendations(cursor, verbose=True):
     """
     Generates and displays media cleanup recommendations for source cameras based on published albums.
     Groups recommendations by device model. For each recommendation row, queries Apple Photos DB copy
     for the total asset count and size within the corresponding date range to quantify storage gains.
     """
-    # First, attach photos_db to query full camera/source libraries
+    # First, attach photos_db to query full camera/source libraries; detached again when the report is built
+    with ExitStack() as photos_stack:
+        try:
+            photos_stack.enter_context(photos_snapshot(cursor))
+            logger.debug("Attached Photos.sqlite database read-only for cleanup scan.")
+        except Exception as e:
+            logger.warning(f"Could not attach Photos.sqlite: {e}")
+        cleanup_report = build_media_cleanup_report(cursor)
+    logger.debug("Detached Photos.sqlite database after cleanup scan.")
+
+    # Write to dedicated log file
     try:
-        cursor.execute(f"ATTACH DATABASE 'file:{APPLE_PHOTOS_DB_PATH}?mode=ro' AS photos_db")
-        logger.debug("Attached Photos.sqlite database read-only for cleanup scan.")
+        with open(MEDIA_CLEANUP_LOG_PATH, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(cleanup_report) + '\n')
+        if verbose:
+            logger.info(f"📄 Media cleanup recommendations written to {MEDIA_CLEANUP_LOG_PATH}")
     except Exception as e:
-        logger.warning(f"Could not attach Photos.sqlite: {e}")
+        logger.warning(f"Could not write media cleanup log: {e}")
+
+    # Print to console
+    print('\n' + '\n'.join(cleanup_report))
 
+def build_media_cleanup_report(cursor):
+    """
+    Returns the lines of the media cleanup report of display_media_cleanup_recommendations().
+    Scans photos_db for the per-month file counts and sizes when it is attached.
+    """
     # Query published moments and their camera/file metrics grouped by calendar month
     cursor.execute("""
         SELECT 
@@ -2347,14 +2244,17 @@ def display_media_cleanup_recommendations(cursor, verbose=True):
                     total_scan_bytes = 0
                     if row[0] and device_name != "Unknown":
                         try:
+                            # Same pinned-zone month as assets.month, as a ZDATECREATED range
+                            month_start, month_end = local_month_core_data_bounds(month_val)
                             cursor.execute("""
                                 SELECT COUNT(a.Z_PK), SUM(r.ZDATALENGTH)
                                 FROM photos_db.ZASSET a
                                 JOIN photos_db.ZEXTENDEDATTRIBUTES ea ON ea.ZASSET = a.Z_PK
                                 LEFT JOIN photos_db.ZINTERNALRESOURCE r ON r.ZASSET = a.Z_PK AND r.ZRESOURCETYPE = 0
                                 WHERE COALESCE(ea.ZCAMERAMODEL, 'Unknown') = ?
-                                  AND strftime('%Y-%m', datetime(a.ZDATECREATED + 978307200, 'unixepoch')) = ?
-                            """, (c_model, month_val))
+                                  AND a.ZDATECREATED >= ?
+                                  AND a.ZDATECREATED < ?
+                            """, (c_model, month_start, month_end))
                             res = cursor.fetchone()
                             if res:
                                 total_scan_count = res[0] or 0
@@ -2395,24 +2295,7 @@ def display_media_cleanup_recommendations(cursor, verbose=True):
             cleanup_report.append(f"💰 Total reclaimable space for owner {owner_name}: {owner_total_files} files ({human_readable_size(owner_total_bytes)})")
             cleanup_report.append("==================================================================================================================================\n")
 
-    # Detach database safely
-    try:
-        cursor.execute("DETACH DATABASE photos_db")
-        logger.debug("Detached Photos.sqlite database after cleanup scan.")
-    except Exception:
-        pass
-
-    # Write to dedicated log file
-    try:
-        with open(MEDIA_CLEANUP_LOG_PATH, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(cleanup_report) + '\n')
-        if verbose:
-            logger.info(f"📄 Media cleanup recommendations written to {MEDIA_CLEANUP_LOG_PATH}")
-    except Exception as e:
-        logger.warning(f"Could not write media cleanup log: {e}")
-
-    # Print to console
-    print('\n' + '\n'.join(cleanup_report))
+    return cleanup_report
 
 def main(auto_apply, no_sync=False):
     # Set up logger with line number in format
@@ -2421,7 +2304,7 @@ def main(auto_apply, no_sync=False):
     check_if_refresh_needed()
 
     # Check for active planned executions in queue
-    check_conn = sqlite3.connect(MEDIA_ORGANIZER_DB_PATH)
+    check_conn = connect(read_only=True)
     check_cursor = check_conn.cursor()
     check_cursor.execute("SELECT id, planned_month, set_at_utc FROM planned_execution WHERE active = 1 ORDER BY id ASC")
     active_plans = check_cursor.fetchall()
@@ -2443,7 +2326,7 @@ def main(auto_apply, no_sync=False):
                 logger.info(f"🚀 Launching pipeline_executor for queued batches: {executor_path}")
                 os.execv(sys.executable, [sys.executable, executor_path])
             elif queue_choice == 'r':
-                reset_conn = sqlite3.connect(MEDIA_ORGANIZER_DB_PATH)
+                reset_conn = connect()
                 reset_cursor = reset_conn.cursor()
                 reset_cursor.execute("UPDATE planned_execution SET active = 0 WHERE active = 1")
                 reset_conn.commit()
@@ -2458,7 +2341,7 @@ def main(auto_apply, no_sync=False):
 
     # Run bootstrap steps before proceeding
     if not no_sync:
-        acquire_planner_lock()
+        acquire_planner_lock(write=True)
         run_bootstrap_steps(auto_apply, logger)
         release_planner_lock()
     else:
@@ -2474,7 +2357,6 @@ def main(auto_apply, no_sync=False):
         elif mode == 'c':
             acquire_planner_lock()
             conn = get_connection()
-            conn.execute("PRAGMA busy_timeout = 30000")
             cursor = get_cursor()
             display_media_cleanup_recommendations(cursor, verbose=True)
             close_conn()
@@ -2485,9 +2367,8 @@ def main(auto_apply, no_sync=False):
             # Restart the script to return to the main menu clean
             os.execv(sys.executable, [sys.executable] + sys.argv)
 
-    acquire_planner_lock()
+    acquire_planner_lock(write=True)
     conn = get_connection()
-    conn.execute("PRAGMA busy_timeout = 30000")
     cursor = get_cursor()
 
     # Check for completed batches that have new assets imported since their last update
@@ -2868,9 +2749,8 @@ def main(auto_apply, no_sync=False):
                         release_planner_lock()
                         ans = input("\nPress [Enter] once created to resync and restart the planner (or [Q] to quit): ").strip().lower()
                         if ans != 'q':
-                            acquire_planner_lock()
+                            acquire_planner_lock(write=True)
                             conn = get_connection()
-                            conn.execute("PRAGMA busy_timeout = 30000")
                             cursor = get_cursor()
                             logger.info("🔄 Forcing metadata resync and restarting planner...")
                             cursor.execute("UPDATE db_updates SET raw_synced = 0, derived_synced = 0")
@@ -1,6 +1,5 @@
 import os
 import sys
-import sqlite3
 from shutil import copy2
 
 # Add project root to sys.path
@@ -8,6 +7,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from utils.logger import setup_logger
 from constants import MEDIA_ORGANIZER_DB_PATH, CURATED_EXPORT_DIR, STAGING_ROOT, LOG_PATH
+from db.connections import connect
 
 MODULE_TAG = "rank_assets"
 logger = setup_logger(LOG_PATH, MODULE_TAG)
@@ -17,15 +17,15 @@ def export_ranked_assets(month, threshold_score=0.6):
         logger.error(f"Database not found at {MEDIA_ORGANIZER_DB_PATH}")
         return
 
-    conn = sqlite3.connect(MEDIA_ORGANIZER_DB_PATH)
+    conn = connect()
     cursor = conn.cursor()
 
     logger.info(f"📊 Ranking assets for batch: {month}")
 
-    # Query from view
+    # Query ranked assets (indexed on month, score)
     query = """
         SELECT original_filename, score_normalized, google_favorite, aesthetic_score, apple_photos_monthly_selection, mobile_apple_photos_featured_photos
-        FROM ranked_assets_view
+        FROM ranked_assets
         WHERE month = ? AND (score_normalized >= ? OR google_favorite = 1 OR apple_photos_monthly_selection = 1 OR mobile_apple_photos_featured_photos = 1)
         ORDER BY score_normalized DESC;
     """
@@ -0,0 +1,173 @@
+"""
+Step runner for the background refresh pipeline.
+
+Each refresh step is importable and can run either in-process, sharing one tuned connection to
+the Media Organizer DB (no interpreter startup, import cost or cold page cache per step), or as
+a separate Python subprocess for isolation. Wall and CPU time of every step are logged and
+recorded in the refresh_step_timings table.
+"""
+import os
+import sys
+import time
+import sqlite3
+import resource
+import subprocess
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+from db.connections import connect
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@dataclass
+class RefreshStep:
+    name: str
+    script_args: List[str]
+    # Called as func(conn, logger). Steps without a callable always run as a subprocess.
+    func: Optional[Callable] = None
+
+
+@dataclass
+class StepResult:
+    name: str
+    mode: str
+    success: bool
+    wall_seconds: float
+    cpu_seconds: float
+    error: Optional[str] = field(default=None)
+
+
+def _run_storage_manager(conn, logger):
+    from storage_manager_main import run_storage_manager
+    run_storage_manager(conn, migrate=True)
+
+
+def _run_raw_sync(conn, logger):
+    from sync_photos_raw import sync_metadata
+    sync_metadata(logger, conn=conn, parallel=True)
+
+
+def _run_derived_sync(conn, logger):
+    from sync_photos_derived import run_derived_sync
+    run_derived_sync(conn, logger)
+
+
+def get_refresh_steps():
+    return [
+        # The snapshot copy is I/O bound and does not use the Media Organizer DB connection
+        RefreshStep("0.0 Refresh Photos DB Snapshot", ["copy_all_media_photos_db.py"]),
+        RefreshStep("0.1 Storage Manager Migrations", ["storage_manager_main.py", "--migrate"], _run_storage_manager),
+        RefreshStep("0.2 Sync Raw Assets", ["sync_photos_raw.py", "--parallel"], _run_raw_sync),
+        RefreshStep("0.3 Sync Derived Metadata", ["sync_photos_derived.py"], _run_derived_sync),
+    ]
+
+
+def open_shared_connection():
+    return connect(cache_size=-262144)  # 256 MiB, kept warm across steps
+
+
+def _children_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_step_subprocess(step, logger):
+    script_path = os.path.join(SCRIPT_DIR, step.script_args[0])
+    start_wall = time.perf_counter()
+    start_cpu = _children_cpu_seconds()
+    error = None
+    try:
+        p = subprocess.Popen(
+            [sys.executable, script_path] + step.script_args[1:],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+        for line in p.stdout:
+            logger.info(line.rstrip('\r\n'))
+        p.wait()
+        if p.returncode != 0:
+            error = f"Exit code {p.returncode}"
+    except Exception as e:
+        error = str(e)
+    return StepResult(step.name, "subprocess", error is None, time.perf_counter() - start_wall,
+                      _children_cpu_seconds() - start_cpu, error)
+
+
+def run_step_in_process(step, conn, logger):
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    error = None
+    try:
+        step.func(conn, logger)
+        if conn.in_transaction:
+            conn.commit()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            pass
+    return StepResult(step.name, "in-process", error is None, time.perf_counter() - start_wall,
+                      time.process_time() - start_cpu, error)
+
+
+def record_step_timings(results, run_started_utc, logger):
+    """Appends one refresh_step_timings row (migration 056) per step result."""
+    conn = None
+    try:
+        conn = connect()
+        conn.executemany("""
+            INSERT INTO refresh_step_timings (run_started_utc, step_name, mode, success, wall_seconds, cpu_seconds, error)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [(run_started_utc, r.name, r.mode, int(r.success), r.wall_seconds, r.cpu_seconds, r.error) for r in results])
+        conn.commit()
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to record step timings: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+def run_steps(steps, logger, mode="in-process"):
+    """
+    Runs steps in order and stops at the first failure. In "in-process" mode steps with a
+    callable share one connection; "subprocess" mode runs every step as its own script.
+    Returns (success, results).
+    """
+    run_started_utc = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    results = []
+    conn = None
+    try:
+        for step in steps:
+            logger.info(f"🚀 Running step: {step.name}")
+            if mode == "in-process" and step.func is not None:
+                if conn is None:
+                    conn = open_shared_connection()
+                result = run_step_in_process(step, conn, logger)
+            else:
+                result = run_step_subprocess(step, logger)
+            results.append(result)
+
+            if not result.success:
+                logger.error(f"❌ Step failed: {step.name} ({result.error})")
+                break
+            logger.info(
+                f"✅ Step completed successfully: {step.name} "
+                f"[{result.mode}, wall {result.wall_seconds:.2f}s, cpu {result.cpu_seconds:.2f}s]"
+            )
+        success = all(r.success for r in results) and len(results) == len(steps)
+        if conn and success:
+            # The in-process storage manager session spans the whole refresh; a failed refresh
+            # keeps clean_shutdown cleared so the next one checks integrity again
+            from storage_manager.storage_state import mark_clean_shutdown
+            mark_clean_shutdown(conn)
+    finally:
+        if conn:
+            conn.close()
+
+    record_step_timings(results, run_started_utc, logger)
+    return success, results
@@ -2,12 +2,12 @@ import os
 import sys
 import gzip
 import shutil
-import sqlite3
 from datetime import datetime
 
 # Ensure project root is in path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from constants import MEDIA_ORGANIZER_DB_PATH, BG_SERVICE_PID_PATH
+from db.connections import connect
 
 def restore_database(backup_path):
     print(f"[{datetime.now().isoformat()}] Starting database restore process...")
@@ -64,7 +64,7 @@ def restore_database(backup_path):
 
         # 4. Verify integrity of the restored database
         print("Verifying integrity of the restored database...")
-        conn = sqlite3.connect(MEDIA_ORGANIZER_DB_PATH)
+        conn = connect()
         cursor = conn.cursor()
         cursor.execute("PRAGMA integrity_check;")
         res = cursor.fetchone()
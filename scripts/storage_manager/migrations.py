@@ -1,5 +1,7 @@
 import os
-import sys
+import re
+import time
+import types
 from constants import LOG_PATH
 from utils.logger import setup_logger
 
@@ -7,17 +9,102 @@ MODULE_TAG = "migrations"
 logger = setup_logger(LOG_PATH, MODULE_TAG)
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+migrations_folder = os.path.join(project_root, "migrations")
+
+
+class MigrationRegistry:
+    """
+    Migration files of one folder, keyed by filename as recorded in schema_migrations.
+    The folder is listed again only when its mtime changes, and each file is read and compiled
+    once per (mtime, size). Modules are built from the cached code objects rather than through
+    the import system, so filenames that are not valid module names ("027_add_399 code.py")
+    load like any other.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._listing = (None, [])    # (folder mtime_ns, sorted filenames)
+        self._compiled = {}           # filename -> ((mtime_ns, size), source, code)
+
+    def filenames(self):
+        """Sorted migration filenames (empty when the folder is missing)."""
+        try:
+            mtime_ns = os.stat(self.folder).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if self._listing[0] != mtime_ns:
+            self._listing = (mtime_ns, sorted(f for f in os.listdir(self.folder) if f.endswith(".py")))
+        return self._listing[1]
+
+    def _entry(self, filename):
+        path = os.path.join(self.folder, filename)
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self._compiled.get(filename)
+        if cached is None or cached[0] != key:
+            with open(path, "rb") as f:
+                source = f.read()
+            cached = (key, source, compile(source, path, "exec"))
+            self._compiled[filename] = cached
+        return cached
+
+    def sources(self):
+        """[(filename, source bytes)] of every migration, in order."""
+        return [(filename, self._entry(filename)[1]) for filename in self.filenames()]
+
+    def load(self, filename):
+        """A fresh module object executed from the cached code of `filename`."""
+        _, _, code = self._entry(filename)
+        module = types.ModuleType("migration_" + re.sub(r"\W+", "_", filename[:-3]))
+        module.__file__ = code.co_filename
+        exec(code, module.__dict__)
+        return module
+
+
+registry = MigrationRegistry(migrations_folder)
+
+
+class MigrationError(Exception):
+    """A pending migration failed; the batch it belonged to was rolled back."""
+
+
+def list_migration_files():
+    return registry.filenames()
+
+
+class _BatchConnection:
+    """
+    Connection handed to a migration's run(conn) inside the batch transaction. Migrations
+    commit when they are done; here that is deferred to the batch, which releases the
+    migration's savepoint instead.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def commit(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def has_pending_migrations(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='schema_migrations'")
+    if not cursor.fetchone():
+        return True
+    cursor.execute("SELECT 1 FROM schema_migrations WHERE status='pending' LIMIT 1")
+    return cursor.fetchone() is not None
+
+
 def get_migration_status(cursor):
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='schema_migrations'")
     name = cursor.fetchone()
     if name:
         logger.info("✅ schema_migrations table exists.")
         # List migration files in migrations/ folder
-        migrations_folder = os.path.join(project_root, "migrations")
-        migration_files = []
-        if os.path.isdir(migrations_folder):
-            migration_files = sorted(f for f in os.listdir(migrations_folder) if f.endswith(".py"))
-        else:
+        migration_files = list_migration_files()
+        if not os.path.isdir(migrations_folder):
             logger.warning(f"⚠️ Migrations folder not found at {migrations_folder}")
 
         # Get existing migrations from DB
@@ -63,32 +150,41 @@ def get_migration_status(cursor):
 
 
 def apply_pending_migrations(cursor, conn):
-    import importlib.util
-    from datetime import datetime
-    migrations_folder = os.path.join(project_root, "migrations")
-    cursor.execute("SELECT migration FROM schema_migrations WHERE status='pending'")
-    pending_migrations = cursor.fetchall()
+    """
+    Applies the pending migrations in one BEGIN IMMEDIATE transaction, each inside its own
+    savepoint. The set is all-or-nothing: when a migration fails the whole transaction is
+    rolled back, none of the pending migrations stay applied, and MigrationError is raised.
+    The connection is left open for the caller.
+    """
+    cursor.execute("SELECT migration FROM schema_migrations WHERE status='pending' ORDER BY id")
+    pending_migrations = [row[0] for row in cursor.fetchall()]
     if not pending_migrations:
         logger.info("✅ No unapplied migrations to run.")
-    else:
-        logger.info("🔧 Running pending migrations...")
-        for (migration,) in pending_migrations:
-            mig_path = os.path.join(migrations_folder, migration)
-            try:
-                logger.info(f"▶️ Applying migration: {migration}")
-                spec = importlib.util.spec_from_file_location("migration", mig_path)
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-                module.run(conn)
-                cursor.execute("""
-                    UPDATE schema_migrations
-                    SET status='applied', applied_at_utc=datetime('now')
-                    WHERE migration = ?
-                """, (migration,))
-                conn.commit()
-                logger.info(f"✅ Successfully applied migration: {migration}")
-            except Exception as e:
-                logger.error(f"❌ Failed to apply migration {migration}: {e}")
-                logger.error("💥 Migration failed — exiting storage_manager to prevent further actions.")
-                conn.close()
-                sys.exit(1)
\ No newline at end of file
+        return
+
+    logger.info(f"🔧 Running {len(pending_migrations)} pending migrations in one transaction...")
+    start = time.perf_counter()
+    if conn.in_transaction:
+        conn.commit()
+    cursor.execute("BEGIN IMMEDIATE")
+    batch_conn = _BatchConnection(conn)
+    for number, migration in enumerate(pending_migrations):
+        savepoint = f"migration_{number}"
+        cursor.execute(f"SAVEPOINT {savepoint}")
+        try:
+            logger.info(f"▶️ Applying migration: {migration}")
+            registry.load(migration).run(batch_conn)
+            cursor.execute("""
+                UPDATE schema_migrations
+                SET status='applied', applied_at_utc=datetime('now')
+                WHERE migration = ?
+            """, (migration,))
+            cursor.execute(f"RELEASE {savepoint}")
+            logger.info(f"✅ Successfully applied migration: {migration}")
+        except Exception as e:
+            logger.error(f"❌ Failed to apply migration {migration}: {e}")
+            conn.rollback()
+            logger.info(f"↩️ Rolled back all {len(pending_migrations)} pending migrations; none were applied.")
+            raise MigrationError(f"Migration {migration} failed: {e}") from e
+    conn.commit()
+    logger.info(f"✅ Applied {len(pending_migrations)} migrations in {(time.perf_counter() - start) * 1000:.0f} ms.")
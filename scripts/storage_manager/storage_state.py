@@ -0,0 +1,93 @@
+"""
+Schema fingerprint and integrity-check schedule of the Media Organizer DB, kept in the
+single-row storage_state table (migration 055).
+
+The fingerprint combines a hash of the migration files with a hash of the table, index and
+trigger definitions in sqlite_master. PRAGMA schema_version is not used: derived sync drops and
+recreates its views on every run, which bumps it without changing the schema the storage
+manager maintains. While the fingerprint matches the one stored by the last completed storage
+manager run, the schema fixups and the migration scan have nothing to do and are skipped.
+clean_shutdown is cleared when a storage manager session starts and set again only when it ends
+successfully, so a session that failed or was killed leaves it cleared and the next run does a
+full integrity check.
+"""
+import sqlite3
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+STORAGE_STATE_TABLE = "storage_state"
+UTC_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def migration_set_hash(migration_sources):
+    """sha256 over the names and contents of the migration files, given as [(filename, source bytes)]."""
+    digest = hashlib.sha256()
+    for filename, source in migration_sources:
+        digest.update(filename.encode())
+        digest.update(source)
+    return digest.hexdigest()
+
+
+def schema_fingerprint(cursor, migration_hash):
+    """Migration set hash + hash of the main schema's table, index and trigger definitions."""
+    cursor.execute("""
+        SELECT type, name, tbl_name, sql FROM main.sqlite_master
+        WHERE type IN ('table', 'index', 'trigger')
+        ORDER BY type, name
+    """)
+    digest = hashlib.sha256()
+    for row in cursor.fetchall():
+        digest.update(repr(row).encode())
+    return f"{migration_hash[:16]}:{digest.hexdigest()[:16]}"
+
+
+def read_storage_state(cursor):
+    """Returns the storage_state row as a dict, or None before migration 055 is applied."""
+    cursor.execute("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = ?", (STORAGE_STATE_TABLE,))
+    if cursor.fetchone() is None:
+        return None
+    cursor.execute(f"SELECT schema_fingerprint, last_integrity_check_utc, clean_shutdown FROM {STORAGE_STATE_TABLE} WHERE id = 1")
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return {"schema_fingerprint": row[0], "last_integrity_check_utc": row[1], "clean_shutdown": bool(row[2])}
+
+
+def integrity_check_reason(state, interval_hours, now=None):
+    """Why an integrity check is due, or None when the last passed check is recent enough."""
+    if state is None or not state["last_integrity_check_utc"]:
+        return "no check recorded"
+    if not state["clean_shutdown"]:
+        return "previous session did not shut down cleanly"
+    now = now or datetime.now(timezone.utc)
+    last_check = datetime.strptime(state["last_integrity_check_utc"], UTC_FORMAT).replace(tzinfo=timezone.utc)
+    if now - last_check >= timedelta(hours=interval_hours):
+        return f"last check is older than {interval_hours}h"
+    return None
+
+
+def mark_session_started(cursor):
+    cursor.execute(f"UPDATE {STORAGE_STATE_TABLE} SET clean_shutdown = 0 WHERE id = 1")
+
+
+def record_integrity_check(cursor):
+    cursor.execute(f"UPDATE {STORAGE_STATE_TABLE} SET last_integrity_check_utc = datetime('now') WHERE id = 1")
+
+
+def record_schema_fingerprint(cursor, fingerprint):
+    cursor.execute(f"UPDATE {STORAGE_STATE_TABLE} SET schema_fingerprint = ? WHERE id = 1", (fingerprint,))
+
+
+def mark_clean_shutdown(conn):
+    """
+    Ends a storage manager session that succeeded. Best effort: a malformed or locked DB keeps
+    the flag cleared, which only means the next run checks integrity again.
+    """
+    try:
+        cursor = conn.cursor()
+        if read_storage_state(cursor) is None:
+            return
+        cursor.execute(f"UPDATE {STORAGE_STATE_TABLE} SET clean_shutdown = 1 WHERE id = 1")
+        conn.commit()
+    except sqlite3.Error:
+        pass
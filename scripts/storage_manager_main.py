@@ -1,33 +1,73 @@
 import os
 import sys
+import time
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, project_root)
 import sqlite3
 from constants import MEDIA_ORGANIZER_DB_PATH as DB_PATH
-from constants import LOG_PATH
+from constants import LOG_PATH, STORAGE_INTEGRITY_CHECK_INTERVAL_HOURS
+from db.connections import connect
 from utils.logger import setup_logger
 from storage_manager.init_schema import init_schema
-from storage_manager.migrations import get_migration_status, apply_pending_migrations
+from storage_manager.migrations import (
+    registry, has_pending_migrations, get_migration_status, apply_pending_migrations, MigrationError,
+)
+from storage_manager.storage_state import (
+    migration_set_hash, schema_fingerprint, read_storage_state, integrity_check_reason,
+    mark_session_started, record_integrity_check, record_schema_fingerprint, mark_clean_shutdown,
+)
+from db.ranked_assets import ensure_ranked_assets
 
 MODULE_TAG = "storage_manager"
 logger = setup_logger(LOG_PATH, MODULE_TAG)
 
-def main():
-    logger.info(f"🗂  Checking Storage Status at {DB_PATH}")
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
 
-    # Early integrity check for Media Organizer DB
+def check_integrity(cursor):
+    """PRAGMA quick_check; raises sqlite3.DatabaseError when the Media Organizer DB is malformed."""
     cursor.execute("PRAGMA quick_check;")
     integrity_result = cursor.fetchone()
     if integrity_result and integrity_result[0] != 'ok':
         logger.error(f"❌ Media Organizer DB is malformed: {integrity_result[0]}")
         logger.error(f"Location: {DB_PATH}")
         logger.error("🚨 Corruption detected! A common fix is to delete this file and let the pipeline recreate it.")
-        conn.close()
-        sys.exit(1)
+        raise sqlite3.DatabaseError(f"Media Organizer DB is malformed: {integrity_result[0]}")
     logger.info("✅ Media Organizer DB integrity check passed.")
 
+
+def run_storage_manager(conn, migrate=False, force_integrity_check=False):
+    """
+    Integrity check, schema fixups and migration status on an open connection.
+    The integrity check runs only when due, and everything else is skipped while the schema
+    fingerprint matches the last completed run (storage_manager/storage_state.py). Starts a
+    session that mark_clean_shutdown() ends.
+    Raises sqlite3.DatabaseError when the Media Organizer DB is malformed and MigrationError
+    when a pending migration fails.
+    """
+    start = time.perf_counter()
+    cursor = conn.cursor()
+    state = read_storage_state(cursor)
+    migration_hash = migration_set_hash(registry.sources())
+
+    reason = "requested" if force_integrity_check else integrity_check_reason(state, STORAGE_INTEGRITY_CHECK_INTERVAL_HOURS)
+    if reason:
+        logger.info(f"🩺 Running integrity check ({reason}).")
+        check_integrity(cursor)
+    else:
+        logger.info(f"⏭️ Integrity check not due (last passed {state['last_integrity_check_utc']} UTC).")
+    if state is not None:
+        mark_session_started(cursor)
+        if reason:
+            record_integrity_check(cursor)
+    conn.commit()
+
+    if state is not None and state["schema_fingerprint"] == schema_fingerprint(cursor, migration_hash):
+        # Score weights live in constants.py, outside the fingerprint
+        if migrate and ensure_ranked_assets(cursor, logger):
+            record_schema_fingerprint(cursor, schema_fingerprint(cursor, migration_hash))
+        conn.commit()
+        logger.info(f"⚡ Schema unchanged since the last run. Skipped fixups and migration scan ({(time.perf_counter() - start) * 1000:.0f} ms).")
+        return
+
     # Drop the old unique index on (original_filename, month) if it exists
     cursor.execute("DROP INDEX IF EXISTS idx_assets_filename_month")
     logger.info("Dropped old unique index 'idx_assets_filename_month' if it existed.")
@@ -55,9 +95,37 @@ def main():
 
     get_migration_status(cursor)
     conn.commit()
-    if "--migrate" in sys.argv:
+    if migrate:
         apply_pending_migrations(cursor, conn)
-    conn.close()
+        # Picks up score weight changes in constants.py even when no sync runs
+        ensure_ranked_assets(cursor, logger)
+        conn.commit()
+
+    # Only a fully migrated schema gets a fingerprint; migration 055 may have just created the table
+    if not has_pending_migrations(cursor) and read_storage_state(cursor) is not None:
+        if state is None:
+            mark_session_started(cursor)
+            record_integrity_check(cursor)
+        record_schema_fingerprint(cursor, schema_fingerprint(cursor, migration_hash))
+        conn.commit()
+        logger.info("🔖 Recorded schema fingerprint.")
+
+
+def main():
+    logger.info(f"🗂  Checking Storage Status at {DB_PATH}")
+    conn = connect(DB_PATH)
+    try:
+        run_storage_manager(conn, migrate="--migrate" in sys.argv, force_integrity_check="--integrity-check" in sys.argv)
+        # A failed run keeps clean_shutdown cleared, so the next one checks integrity again
+        mark_clean_shutdown(conn)
+    except MigrationError as e:
+        logger.error(f"💥 {e} — exiting storage_manager to prevent further actions.")
+        sys.exit(1)
+    except sqlite3.DatabaseError as e:
+        logger.error(f"❌ Storage manager failed ({type(e).__name__}): {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
 
 
 if __name__ == "__main__":
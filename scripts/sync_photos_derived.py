@@ -5,17 +5,506 @@ import argparse
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from utils.logger import setup_logger, close_logger
-from constants import LOG_PATH, MEDIA_ORGANIZER_DB_PATH, APPLE_PHOTOS_DB_PATH, AESTHETIC_SCORE_WEIGHT, GOOGLE_FAVORITES_WEIGHT, APPLE_SELECTION_WEIGHT, APPLE_FEATURED_WEIGHT
-from db.connections import get_connection, get_cursor, commit, close as close_conn
+from constants import LOG_PATH, MEDIA_ORGANIZER_DB_PATH
+from constants import DERIVED_SYNC_FETCH_CHUNK_SIZE
+from utils.utils import get_peak_rss_bytes, human_readable_size
+from db.connections import get_connection, close as close_conn
+from db.change_set import has_change_set, get_pending_changes, clear_changes
+from db.ranked_assets import ensure_ranked_assets, create_ranked_assets_view
+from db.camera_sequences import has_camera_sequences, sync_camera_sequences
+from db.photos_snapshot import photos_snapshot
+from utils.time_dims import register_time_functions
 
 MODULE_TAG = 'sync_photos_derived'
 
-def sync_assets(media_cursor, logger):
+# ZGENERICALBUM rows (aliased `a`, parent folder `p`) mirrored into each derived album table
+ALBUM_TABLE_FILTERS = {
+    "smart_albums": """a.ZKIND = 1507
+        AND a.ZTRASHEDSTATE = 0
+        AND (p.ZTITLE = 'MonthlyExports' OR a.ZPARENTFOLDER IN (SELECT Z_PK FROM photos_db.ZGENERICALBUM WHERE ZTITLE = 'MonthlyExports'))""",
+    "albums": """a.ZKIND <> 1507
+        AND a.ZTITLE IS NOT NULL
+        AND a.ZTRASHEDSTATE = 0""",
+    "moments": """a.ZKIND <> 1507
+        AND a.ZTITLE IS NOT NULL
+        AND p.ZTITLE = 'Moments'
+        AND a.ZTRASHEDSTATE = 0""",
+}
+
+# Restricts a query over assets (aliased `a`) to the assets an incremental sync recomputes
+CHANGED_ASSETS_FILTER = "AND a.Z_PK IN (SELECT asset_pk FROM temp.derived_changed_assets)"
+
+def collect_derived_changes(media_cursor, max_id, logger):
+    """
+    Works out what an incremental derived sync has to recompute from the raw change set rows
+    up to `max_id` and the album Z_OPT values recorded by the last derived sync:
+      - temp.derived_changed_albums: ZGENERICALBUM rows that are new, deleted or whose Z_OPT
+        moved, plus their child and grandchild albums (folder titles feed the album flags)
+      - temp.derived_changed_assets: assets touched by raw sync plus members of changed albums
+      - temp.derived_changed_sessions: import sessions of those assets, before and after the change
+    Must run before the assets table is upserted, while it still holds the previous import_id.
+    """
+    for table in ("derived_changed_albums", "derived_changed_assets", "derived_changed_sessions"):
+        media_cursor.execute(f"DROP TABLE IF EXISTS temp.{table};")
+
+    media_cursor.execute("CREATE TEMP TABLE derived_changed_albums (album_pk INTEGER PRIMARY KEY)")
+    media_cursor.execute("""
+        INSERT INTO temp.derived_changed_albums (album_pk)
+        SELECT ga.Z_PK
+        FROM photos_db.ZGENERICALBUM ga
+        LEFT JOIN main.album_sync_state s ON s.album_pk = ga.Z_PK
+        WHERE s.album_pk IS NULL OR s.z_opt IS NOT COALESCE(ga.Z_OPT, 0)
+    """)
+    media_cursor.execute("""
+        INSERT OR IGNORE INTO temp.derived_changed_albums (album_pk)
+        SELECT s.album_pk FROM main.album_sync_state s
+        WHERE NOT EXISTS (SELECT 1 FROM photos_db.ZGENERICALBUM ga WHERE ga.Z_PK = s.album_pk)
+    """)
+    # Twice: children, then grandchildren of changed folders
+    for _ in range(2):
+        media_cursor.execute("""
+            INSERT OR IGNORE INTO temp.derived_changed_albums (album_pk)
+            SELECT ga.Z_PK FROM photos_db.ZGENERICALBUM ga
+            WHERE ga.ZPARENTFOLDER IN (SELECT album_pk FROM temp.derived_changed_albums)
+        """)
+
+    media_cursor.execute("CREATE TEMP TABLE derived_changed_assets (asset_pk INTEGER PRIMARY KEY)")
+    media_cursor.execute("""
+        INSERT OR IGNORE INTO temp.derived_changed_assets (asset_pk)
+        SELECT asset_pk FROM main.raw_change_set
+        WHERE id <= ? AND asset_pk IS NOT NULL
+    """, (max_id if max_id is not None else 0,))
+    media_cursor.execute("""
+        INSERT OR IGNORE INTO temp.derived_changed_assets (asset_pk)
+        SELECT aa.Z_3ASSETS FROM photos_db.Z_30ASSETS aa
+        WHERE aa.Z_30ALBUMS IN (SELECT album_pk FROM temp.derived_changed_albums)
+    """)
+
+    media_cursor.execute("CREATE TEMP TABLE derived_changed_sessions (session INTEGER PRIMARY KEY)")
+    media_cursor.execute("""
+        INSERT OR IGNORE INTO temp.derived_changed_sessions (session)
+        SELECT old_import_session FROM main.raw_change_set
+        WHERE id <= ? AND old_import_session IS NOT NULL
+    """, (max_id if max_id is not None else 0,))
+    media_cursor.execute("""
+        INSERT OR IGNORE INTO temp.derived_changed_sessions (session)
+        SELECT a.ZIMPORTSESSION FROM ZASSET a
+        WHERE a.Z_PK IN (SELECT asset_pk FROM temp.derived_changed_assets)
+          AND a.ZIMPORTSESSION IS NOT NULL
+    """)
+    media_cursor.execute("""
+        INSERT OR IGNORE INTO temp.derived_changed_sessions (session)
+        SELECT CAST(import_id AS INTEGER) FROM main.assets
+        WHERE asset_pk IN (SELECT asset_pk FROM temp.derived_changed_assets)
+          AND import_id IS NOT NULL
+    """)
+
+    counts = []
+    for table in ("derived_changed_albums", "derived_changed_assets", "derived_changed_sessions"):
+        media_cursor.execute(f"SELECT COUNT(*) FROM temp.{table}")
+        counts.append(media_cursor.fetchone()[0])
+    logger.info(f"Incremental scope: {counts[1]} assets, {counts[2]} import sessions, {counts[0]} albums.")
+
+def drop_derived_changes(media_cursor):
+    for table in ("derived_changed_albums", "derived_changed_assets", "derived_changed_sessions"):
+        media_cursor.execute(f"DROP TABLE IF EXISTS temp.{table};")
+
+def sync_album_table(media_cursor, table, album_filter, changed_only=False):
+    """
+    Brings an album table in line with the ZGENERICALBUM rows matching `album_filter` with a
+    set-difference upsert/delete keyed on album_pk, so albums that did not change are not
+    rewritten. With `changed_only` only albums in temp.derived_changed_albums are compared.
+    Returns (upserted, deleted).
+    """
+    scope = "AND a.Z_PK IN (SELECT album_pk FROM temp.derived_changed_albums)" if changed_only else ""
+    media_cursor.execute(f"""
+        INSERT INTO {table} (album_pk, album_name, parent_folder_pk, parent_folder_name)
+        SELECT a.Z_PK, a.ZTITLE, a.ZPARENTFOLDER, p.ZTITLE
+        FROM photos_db.ZGENERICALBUM a
+        LEFT JOIN photos_db.ZGENERICALBUM p ON a.ZPARENTFOLDER = p.Z_PK
+        WHERE {album_filter}
+        {scope}
+        ON CONFLICT(album_pk) DO UPDATE SET
+            album_name = excluded.album_name,
+            parent_folder_pk = excluded.parent_folder_pk,
+            parent_folder_name = excluded.parent_folder_name
+        WHERE album_name IS NOT excluded.album_name
+           OR parent_folder_pk IS NOT excluded.parent_folder_pk
+           OR parent_folder_name IS NOT excluded.parent_folder_name
+    """)
+    upserted = media_cursor.rowcount
+
+    delete_scope = "album_pk IN (SELECT album_pk FROM temp.derived_changed_albums) AND" if changed_only else ""
+    media_cursor.execute(f"""
+        DELETE FROM {table}
+        WHERE {delete_scope} album_pk NOT IN (
+            SELECT a.Z_PK
+            FROM photos_db.ZGENERICALBUM a
+            LEFT JOIN photos_db.ZGENERICALBUM p ON a.ZPARENTFOLDER = p.Z_PK
+            WHERE {album_filter}
+        )
+    """)
+    return upserted, media_cursor.rowcount
+
+def build_album_membership(media_cursor, logger, changed_only=False):
+    """
+    Precomputes the album-derived asset flags in one pass over Z_30ASSETS instead of three
+    correlated subqueries per asset.
+
+    temp.asset_album_membership holds one row per (asset, album) for live albums in the
+    folders the flags care about, with the folder role(s) of that album. temp.asset_album_flags
+    reduces it to one row per asset:
+      - moments_album_name: album under 'Moments' (lowest Z_PK wins, publishing opt-outs excluded)
+      - apple_photos_monthly_selection: in an album under 'Apple Photos Month Selection'
+      - mobile_apple_photos_featured_photos: in an album under 'MobileApplePhotosFeaturedPhotos'
+        (parent or grandparent folder)
+    With `changed_only` only the assets in temp.derived_changed_assets are considered.
+    """
+    media_cursor.execute("DROP TABLE IF EXISTS temp.asset_album_membership;")
+    media_cursor.execute("DROP TABLE IF EXISTS temp.asset_album_flags;")
+    media_cursor.execute("""
+        CREATE TEMP TABLE asset_album_membership (
+            asset_pk INTEGER NOT NULL,
+            album_pk INTEGER NOT NULL,
+            album_title TEXT,
+            is_moments INTEGER NOT NULL,
+            is_monthly_selection INTEGER NOT NULL,
+            is_featured INTEGER NOT NULL
+        )
+    """)
+    asset_filter = "AND aa.Z_3ASSETS IN (SELECT asset_pk FROM temp.derived_changed_assets)" if changed_only else ""
+    media_cursor.execute(f"""
+        INSERT INTO temp.asset_album_membership
+        SELECT
+            aa.Z_3ASSETS,
+            ga.Z_PK,
+            ga.ZTITLE,
+            COALESCE(p.ZTITLE = 'Moments', 0),
+            COALESCE(p.ZTITLE = 'Apple Photos Month Selection', 0),
+            COALESCE(p.ZTITLE = 'MobileApplePhotosFeaturedPhotos' OR gp.ZTITLE = 'MobileApplePhotosFeaturedPhotos', 0)
+        FROM Z_30ASSETS aa
+        JOIN ZGENERICALBUM ga ON ga.Z_PK = aa.Z_30ALBUMS
+        LEFT JOIN ZGENERICALBUM p ON ga.ZPARENTFOLDER = p.Z_PK
+        LEFT JOIN ZGENERICALBUM gp ON p.ZPARENTFOLDER = gp.Z_PK
+        WHERE ga.ZTRASHEDSTATE = 0
+          AND ga.ZKIND <> 1507
+          AND (p.ZTITLE IN ('Moments', 'Apple Photos Month Selection', 'MobileApplePhotosFeaturedPhotos')
+               OR gp.ZTITLE = 'MobileApplePhotosFeaturedPhotos')
+          {asset_filter}
+    """)
+    media_cursor.execute("CREATE INDEX temp.idx_asset_album_membership_asset ON asset_album_membership(asset_pk, album_pk)")
+
+    media_cursor.execute("""
+        CREATE TEMP TABLE asset_album_flags (
+            asset_pk INTEGER PRIMARY KEY,
+            moments_album_pk INTEGER,
+            moments_album_name TEXT,
+            apple_photos_monthly_selection INTEGER,
+            mobile_apple_photos_featured_photos INTEGER
+        )
+    """)
+    media_cursor.execute("""
+        INSERT INTO temp.asset_album_flags (asset_pk, moments_album_pk, apple_photos_monthly_selection, mobile_apple_photos_featured_photos)
+        SELECT
+            asset_pk,
+            MIN(CASE WHEN is_moments AND album_title NOT IN ('SkipPublishing', 'Ignore') THEN album_pk END),
+            MAX(is_monthly_selection),
+            MAX(is_featured)
+        FROM temp.asset_album_membership
+        GROUP BY asset_pk
+    """)
+    media_cursor.execute("""
+        UPDATE temp.asset_album_flags
+        SET moments_album_name = (
+            SELECT m.album_title FROM temp.asset_album_membership m
+            WHERE m.asset_pk = asset_album_flags.asset_pk AND m.album_pk = asset_album_flags.moments_album_pk
+        )
+        WHERE moments_album_pk IS NOT NULL
+    """)
+    media_cursor.execute("SELECT COUNT(*) FROM temp.asset_album_membership")
+    memberships = media_cursor.fetchone()[0]
+    media_cursor.execute("SELECT COUNT(*) FROM temp.asset_album_flags")
+    logger.info(f"Precomputed {memberships} album memberships for {media_cursor.fetchone()[0]} assets.")
+
+# All assets that exist in ZASSET but might not be in the assets table, might not have the
+# default Apple Photos aesthetic score yet or might have had it re-evaluated. Column order
+# matches ASSET_INSERT_COLUMNS; {asset_filter} is empty or CHANGED_ASSETS_FILTER.
+ASSET_SOURCE_SELECT = """
+    SELECT
+        a.ZUUID,
+        a.ZOVERALLAESTHETICSCORE,
+        a.ZFAVORITE,
+        aaa.ZORIGINALFILENAME,
+        datetime(a.ZDATECREATED + 978307200, 'unixepoch'),
+        datetime(a.ZADDEDDATE + 978307200, 'unixepoch'),
+        a.ZIMPORTSESSION as import_id,
+        cd_local_month(a.ZDATECREATED) as month,
+        f.moments_album_name as MomentsAlbumName,
+        COALESCE(f.apple_photos_monthly_selection, 0),
+        COALESCE(f.mobile_apple_photos_featured_photos, 0),
+        a.Z_PK,
+        cd_unix_epoch(a.ZDATECREATED),
+        cd_local_datetime(a.ZDATECREATED),
+        cd_local_date(a.ZDATECREATED)
+    FROM ZASSET a
+    JOIN ZADDITIONALASSETATTRIBUTES aaa ON aaa.ZASSET = a.Z_PK
+    LEFT JOIN temp.asset_album_flags f ON f.asset_pk = a.Z_PK
+    WHERE a.ZIMPORTSESSION IS NOT NULL
+      AND a.ZTRASHEDSTATE = 0
+      {asset_filter}
+"""
+
+ASSET_INSERT_COLUMNS = """
+    asset_id,
+    aesthetic_score,
+    apple_favorite,
+    original_filename,
+    date_created_utc,
+    imported_date_utc,
+    import_id,
+    month,
+    MomentsAlbumName,
+    apple_photos_monthly_selection,
+    mobile_apple_photos_featured_photos,
+    asset_pk,
+    created_epoch,
+    created_local_datetime,
+    created_local_date,
+    score_imported_at_utc,
+    updated_at_utc
+"""
+
+# Only rows whose synced values changed are rewritten
+ASSET_UPSERT_CLAUSE = """
+    ON CONFLICT(asset_id) DO UPDATE SET
+        asset_id = excluded.asset_id,
+        aesthetic_score = excluded.aesthetic_score,
+        apple_favorite = excluded.apple_favorite,
+        MomentsAlbumName = excluded.MomentsAlbumName,
+        date_created_utc = excluded.date_created_utc,
+        imported_date_utc = excluded.imported_date_utc,
+        import_id = excluded.import_id,
+        apple_photos_monthly_selection = excluded.apple_photos_monthly_selection,
+        mobile_apple_photos_featured_photos = excluded.mobile_apple_photos_featured_photos,
+        asset_pk = excluded.asset_pk,
+        month = excluded.month,
+        created_epoch = excluded.created_epoch,
+        created_local_datetime = excluded.created_local_datetime,
+        created_local_date = excluded.created_local_date,
+        score_imported_at_utc = datetime('now'),
+        updated_at_utc = datetime('now')
+    WHERE asset_id IS NOT excluded.asset_id
+       OR ROUND(COALESCE(aesthetic_score, -1.0), 6) IS NOT ROUND(COALESCE(excluded.aesthetic_score, -1.0), 6)
+       OR COALESCE(apple_favorite, 0) IS NOT COALESCE(excluded.apple_favorite, 0)
+       OR COALESCE(CAST(import_id AS TEXT), '') IS NOT COALESCE(CAST(excluded.import_id AS TEXT), '')
+       OR COALESCE(date_created_utc, '') IS NOT COALESCE(excluded.date_created_utc, '')
+       OR COALESCE(MomentsAlbumName, '') IS NOT COALESCE(excluded.MomentsAlbumName, '')
+       OR COALESCE(apple_photos_monthly_selection, 0) IS NOT COALESCE(excluded.apple_photos_monthly_selection, 0)
+       OR COALESCE(mobile_apple_photos_featured_photos, 0) IS NOT COALESCE(excluded.mobile_apple_photos_featured_photos, 0)
+       OR asset_pk IS NOT excluded.asset_pk
+       OR month IS NOT excluded.month
+       OR created_epoch IS NOT excluded.created_epoch
+       OR created_local_datetime IS NOT excluded.created_local_datetime
+"""
+
+def get_asset_source_select(changed_only=False):
+    return ASSET_SOURCE_SELECT.format(asset_filter=CHANGED_ASSETS_FILTER if changed_only else "")
+
+def upsert_assets(media_cursor, changed_only=False):
+    """
+    Upserts the assets table with a single INSERT ... SELECT, so rows stream inside SQLite
+    and never become Python objects. Returns the number of rows inserted or updated.
+    """
+    # The SELECT's WHERE clause also resolves the parsing ambiguity between a join's ON and the upsert's ON CONFLICT
+    media_cursor.execute(f"""
+        INSERT INTO assets ({ASSET_INSERT_COLUMNS})
+        SELECT src.*, datetime('now'), datetime('now') FROM ({get_asset_source_select(changed_only)}) src WHERE true
+        {ASSET_UPSERT_CLAUSE}
+    """)
+    return media_cursor.rowcount
+
+def upsert_assets_streaming(media_cursor, logger, transform=None, chunk_size=DERIVED_SYNC_FETCH_CHUNK_SIZE, changed_only=False):
+    """
+    Fallback for when rows need a Python-side transform before the upsert: reads the source
+    rows in fetchmany() chunks and upserts each chunk, so only one chunk is held in memory.
+    `transform(row)` returns the row to write, or None to skip it.
+    Returns the number of rows inserted or updated.
+    """
+    read_cursor = media_cursor.connection.cursor()
+    read_cursor.execute(get_asset_source_select(changed_only))
+    placeholders = ", ".join("?" for _ in range(15))
+    upsert_sql = f"""
+        INSERT INTO assets ({ASSET_INSERT_COLUMNS})
+        VALUES ({placeholders}, datetime('now'), datetime('now'))
+        {ASSET_UPSERT_CLAUSE}
+    """
+    fetched = 0
+    upserted = 0
+    try:
+        while True:
+            rows = read_cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            fetched += len(rows)
+            if transform:
+                rows = [r for r in (transform(row) for row in rows) if r is not None]
+            media_cursor.executemany(upsert_sql, rows)
+            upserted += media_cursor.rowcount
+    finally:
+        read_cursor.close()
+    logger.info(f"Streamed {fetched} assets from Photos DB in chunks of {chunk_size}.")
+    return upserted
+
+def sync_import_sessions(media_cursor, logger, changed_only=False):
+    """
+    Maintains one imports row per (import session, camera), and one import_months row per
+    (import session, camera, local month), from the raw ZASSET mirror.
+    With `changed_only` the purge and the aggregate only touch the sessions in
+    temp.derived_changed_sessions, i.e. sessions that gained or lost assets in this refresh;
+    the mirror indexes on ZIMPORTSESSION and ZASSET keep both to index lookups.
+    """
+    session_scope = "IN (SELECT session FROM temp.derived_changed_sessions)" if changed_only else "IS NOT NULL"
+
+    # Purge import sessions from local 'imports' table that no longer have corresponding assets in ZASSET
+    logger.info("Purging orphaned import sessions that no longer exist in Apple Photos...")
+    purge_scope = f"import_uuid {session_scope} AND" if changed_only else ""
+    media_cursor.execute(f"""
+        DELETE FROM imports
+        WHERE {purge_scope} (import_uuid, camera_model) NOT IN (
+            SELECT DISTINCT
+                a.ZIMPORTSESSION,
+                COALESCE(ea.ZCAMERAMODEL, 'Unknown')
+            FROM ZASSET a
+            LEFT JOIN ZEXTENDEDATTRIBUTES ea ON ea.ZASSET = a.Z_PK
+            WHERE a.ZIMPORTSESSION {session_scope}
+        )
+    """)
+    purged_imports_count = media_cursor.rowcount
+    if purged_imports_count > 0:
+        logger.info(f"🗑️ Purged {purged_imports_count} orphaned import session records.")
+
+    logger.info("Syncing import session records (inserting new and updating existing)...")
+    media_cursor.execute(f'''
+        INSERT INTO imports (import_uuid, import_name, import_timestamp_utc, album, assets_count, camera_make, camera_model, min_filename, max_filename, min_date, max_date, months_detected, min_created_epoch, max_created_epoch)
+        SELECT
+            z.ZIMPORTSESSION,
+            COALESCE(ea.ZCAMERAMODEL, 'Unknown') || ' (Session ' || z.ZIMPORTSESSION || ')',
+            cd_local_datetime(MIN(z.ZDATECREATED)),
+            NULL,
+            COUNT(z.Z_ENT),
+            COALESCE(ea.ZCAMERAMAKE, 'Unknown'),
+            COALESCE(ea.ZCAMERAMODEL, 'Unknown'),
+            MIN(aaa.ZORIGINALFILENAME),
+            MAX(aaa.ZORIGINALFILENAME),
+            cd_local_datetime(MIN(z.ZDATECREATED)),
+            cd_local_datetime(MAX(z.ZDATECREATED)),
+            GROUP_CONCAT(DISTINCT cd_local_month(z.ZDATECREATED)),
+            cd_unix_epoch(MIN(z.ZDATECREATED)),
+            cd_unix_epoch(MAX(z.ZDATECREATED))
+        FROM ZASSET z
+        LEFT JOIN ZEXTENDEDATTRIBUTES ea ON ea.ZASSET = z.Z_PK
+        LEFT JOIN ZADDITIONALASSETATTRIBUTES aaa ON aaa.ZASSET = z.Z_PK
+        WHERE z.ZIMPORTSESSION {session_scope}
+        GROUP BY z.ZIMPORTSESSION, ea.ZCAMERAMAKE, ea.ZCAMERAMODEL
+        ORDER BY z.ZIMPORTSESSION DESC
+        ON CONFLICT(import_uuid, camera_model) DO UPDATE SET
+            assets_count = excluded.assets_count,
+            min_filename = excluded.min_filename,
+            max_filename = excluded.max_filename,
+            min_date = excluded.min_date,
+            max_date = excluded.max_date,
+            months_detected = excluded.months_detected,
+            min_created_epoch = excluded.min_created_epoch,
+            max_created_epoch = excluded.max_created_epoch
+        WHERE assets_count IS NOT excluded.assets_count
+           OR min_filename IS NOT excluded.min_filename
+           OR max_filename IS NOT excluded.max_filename
+           OR min_date IS NOT excluded.min_date
+           OR max_date IS NOT excluded.max_date
+           OR months_detected IS NOT excluded.months_detected
+           OR min_created_epoch IS NOT excluded.min_created_epoch
+           OR max_created_epoch IS NOT excluded.max_created_epoch;
+    ''')
+    media_cursor.connection.commit()
+
+    logger.info("New import sessions inserted successfully.")
+
+    media_cursor.execute("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = 'import_months'")
+    if media_cursor.fetchone() is None:
+        logger.warning("⚠️ import_months table not found. Apply pending migrations first.")
+        return
+
+    # Per-month breakdown of the same sessions, keyed like imports on the COALESCEd camera model
+    month_source = f"""
+        SELECT
+            z.ZIMPORTSESSION AS import_uuid,
+            COALESCE(ea.ZCAMERAMODEL, 'Unknown') AS camera_model,
+            cd_local_month(z.ZDATECREATED) AS month,
+            COUNT(*) AS asset_count,
+            MIN(aaa.ZORIGINALFILENAME) AS min_filename,
+            MAX(aaa.ZORIGINALFILENAME) AS max_filename,
+            cd_local_datetime(MIN(z.ZDATECREATED)) AS min_date,
+            cd_local_datetime(MAX(z.ZDATECREATED)) AS max_date
+        FROM ZASSET z
+        LEFT JOIN ZEXTENDEDATTRIBUTES ea ON ea.ZASSET = z.Z_PK
+        LEFT JOIN ZADDITIONALASSETATTRIBUTES aaa ON aaa.ZASSET = z.Z_PK
+        WHERE z.ZIMPORTSESSION {session_scope}
+          AND z.ZDATECREATED IS NOT NULL
+        GROUP BY 1, 2, 3
+        -- Out-of-range placeholder dates have no local month; import_months.month is NOT NULL
+        HAVING month IS NOT NULL
+    """
+    media_cursor.execute("DROP TABLE IF EXISTS temp.import_months_source;")
+    media_cursor.execute(f"CREATE TEMP TABLE import_months_source AS {month_source}")
+
+    purge_scope = f"import_uuid {session_scope} AND" if changed_only else ""
+    media_cursor.execute(f"""
+        DELETE FROM import_months
+        WHERE {purge_scope} (import_uuid, camera_model, month) NOT IN (
+            SELECT import_uuid, camera_model, month FROM temp.import_months_source
+        )
+    """)
+    deleted = media_cursor.rowcount
+    media_cursor.execute("""
+        INSERT INTO import_months (import_uuid, camera_model, month, asset_count, min_filename, max_filename, min_date, max_date)
+        SELECT import_uuid, camera_model, month, asset_count, min_filename, max_filename, min_date, max_date
+        FROM temp.import_months_source
+        WHERE true
+        ON CONFLICT(import_uuid, camera_model, month) DO UPDATE SET
+            asset_count = excluded.asset_count,
+            min_filename = excluded.min_filename,
+            max_filename = excluded.max_filename,
+            min_date = excluded.min_date,
+            max_date = excluded.max_date
+        WHERE asset_count IS NOT excluded.asset_count
+           OR min_filename IS NOT excluded.min_filename
+           OR max_filename IS NOT excluded.max_filename
+           OR min_date IS NOT excluded.min_date
+           OR max_date IS NOT excluded.max_date
+    """)
+    upserted = media_cursor.rowcount
+    media_cursor.execute("DROP TABLE IF EXISTS temp.import_months_source;")
+    media_cursor.connection.commit()
+    logger.info(f"Synced import_months: {upserted} rows inserted or updated, {deleted} rows deleted.")
+
+def sync_assets(media_cursor, logger, streaming=False, full=False):
+    """
+    Syncs the derived tables from the raw mirror and the Photos DB. When the raw sync left a
+    change set, only the changed assets, their import sessions and the albums whose Z_OPT
+    moved are recomputed; `full` (or a full-rebuild marker in the change set) recomputes all.
+    """
     logger.info("Photos assets sync started.")
 
-    # Attach the Apple Photos database in read-only mode
-    media_cursor.execute(f"ATTACH DATABASE 'file:{APPLE_PHOTOS_DB_PATH}?mode=ro' AS photos_db;")
-    logger.info("Attached Photos.sqlite database read-only.")
+    # Attach the Apple Photos database read-only; detached again even when the sync fails
+    with photos_snapshot(media_cursor):
+        logger.info("Attached Photos.sqlite database read-only.")
+        sync_assets_attached(media_cursor, logger, streaming=streaming, full=full)
+    logger.info("Detached Photos.sqlite database.")
+
+def sync_assets_attached(media_cursor, logger, streaming=False, full=False):
+    """sync_assets() body; expects photos_db attached."""
+    # Local dates and months are converted once, in the pinned PIPELINE_TIMEZONE
+    register_time_functions(media_cursor.connection)
 
     # Drop the broken view immediately if it exists to clear schema errors
     # that prevent subsequent queries from running.
@@ -28,7 +517,8 @@ def sync_assets(media_cursor, logger):
     media_cursor.execute("PRAGMA index_list(imports)")
     has_new_idx = any(idx[1] == 'idx_imports_uuid_model' for idx in media_cursor.fetchall())
 
-    if i_row and (not has_new_idx or "import_timestamp_utc" in i_row[0]):
+    # Legacy tables declared a column-level UNIQUE constraint; the current one relies on idx_imports_uuid_model
+    if i_row and (not has_new_idx or "UNIQUE" in i_row[0].upper()):
         logger.info("Legacy UNIQUE constraint detected in 'imports' table. Migrating...")
         media_cursor.execute("ALTER TABLE imports RENAME TO imports_old")
         media_cursor.execute("""
@@ -47,7 +537,9 @@ def sync_assets(media_cursor, logger):
                 months_detected TEXT,
                 execution_id TEXT,
                 status_code TEXT,
-                sequencing_confirmed INTEGER DEFAULT 0
+                sequencing_confirmed INTEGER DEFAULT 0,
+                min_created_epoch INTEGER,
+                max_created_epoch INTEGER
             )
         """)
         media_cursor.execute("""
@@ -64,256 +556,96 @@ def sync_assets(media_cursor, logger):
         """)
         media_cursor.execute("DROP TABLE imports_old")
         media_cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_imports_uuid_model ON imports(import_uuid, camera_model)")
-        commit()
+        media_cursor.connection.commit()
         logger.info("Migration of 'imports' table completed successfully.")
 
     # Create unique index to support UPSERT on (import_uuid, camera_model) if not handled by migration
     media_cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_imports_uuid_model ON imports(import_uuid, camera_model)")
 
-    # We are fetching all assets that exist in ZASSET table,
-    # but might not be in assets table and also do not have 
-    # a default /Apple Photos/ assigned aestetic score
-    # or might have aestetic score reeveluated
-    # ideally this should be a refresh of the assets table with 
-    # what exists in ZASSET table
+    change_set_max_id = None
+    incremental = False
+    if has_change_set(media_cursor):
+        change_set_max_id, needs_full, changed_rows = get_pending_changes(media_cursor)
+        incremental = not full and not needs_full
+        if incremental:
+            logger.info(f"Incremental derived sync for {changed_rows} raw change(s).")
+        elif needs_full and not full:
+            logger.info("Raw sync rebuilt a mirror table. Running a full derived sync.")
+    if not incremental:
+        logger.info("Full derived sync.")
+    else:
+        collect_derived_changes(media_cursor, change_set_max_id, logger)
+
+    # Triggers must match the current weights before assets change
+    ensure_ranked_assets(media_cursor, logger)
+    media_cursor.connection.commit()
+
+    build_album_membership(media_cursor, logger, changed_only=incremental)
+
     logger.info("Syncing asset metadata (detecting new assets and updating aesthetic scores)...")
-    media_cursor.execute("""
-        SELECT 
-            a.ZUUID, 
-            a.ZOVERALLAESTHETICSCORE, 
-            a.ZFAVORITE,
-            aaa.ZORIGINALFILENAME, 
-            datetime(a.ZDATECREATED + 978307200, 'unixepoch'),
-            datetime(a.ZADDEDDATE + 978307200, 'unixepoch'),
-            a.ZIMPORTSESSION as import_id,
-            strftime('%Y-%m', datetime(a.ZDATECREATED + 978307200, 'unixepoch', 'localtime')) as month,
-            (SELECT ga.ZTITLE FROM ZGENERICALBUM ga 
-            JOIN Z_30ASSETS aa ON aa.Z_30ALBUMS = ga.Z_PK 
-            LEFT JOIN ZGENERICALBUM p ON ga.ZPARENTFOLDER = p.Z_PK 
-            LEFT JOIN ZGENERICALBUM gp ON p.ZPARENTFOLDER = gp.Z_PK 
-            WHERE aa.Z_3ASSETS = a.Z_PK 
-            AND (p.ZTITLE IN ('Moments' ) )
-            AND ga.ZTRASHEDSTATE = 0
-            AND ga.ZKIND <> 1507
-            AND ga.ZTITLE NOT IN ('SkipPublishing', 'Ignore')
-            ORDER BY (CASE WHEN p.ZTITLE = 'Moments' THEN 0 ELSE 1 END) ASC LIMIT 1) as MomentsAlbumName,
-            (SELECT 1 FROM Z_30ASSETS aa 
-            JOIN ZGENERICALBUM ga ON ga.Z_PK = aa.Z_30ALBUMS 
-            LEFT JOIN ZGENERICALBUM p ON ga.ZPARENTFOLDER = p.Z_PK
-            LEFT JOIN ZGENERICALBUM gp ON p.ZPARENTFOLDER = gp.Z_PK
-            WHERE aa.Z_3ASSETS = a.Z_PK 
-            AND (p.ZTITLE = 'Apple Photos Month Selection')
-            AND ga.ZTRASHEDSTATE = 0
-            AND ga.ZKIND <> 1507 LIMIT 1) as apple_photos_monthly_selection,
-            (SELECT 1 FROM Z_30ASSETS aa 
-            JOIN ZGENERICALBUM ga ON ga.Z_PK = aa.Z_30ALBUMS 
-            LEFT JOIN ZGENERICALBUM p ON ga.ZPARENTFOLDER = p.Z_PK
-            LEFT JOIN ZGENERICALBUM gp ON p.ZPARENTFOLDER = gp.Z_PK
-            WHERE aa.Z_3ASSETS = a.Z_PK 
-            AND (p.ZTITLE = 'MobileApplePhotosFeaturedPhotos' OR gp.ZTITLE = 'MobileApplePhotosFeaturedPhotos')
-            AND ga.ZTRASHEDSTATE = 0
-            AND ga.ZKIND <> 1507 LIMIT 1) as mobile_apple_photos_featured_photos
-        FROM ZASSET a
-        JOIN ZADDITIONALASSETATTRIBUTES aaa ON aaa.ZASSET = a.Z_PK
-        WHERE a.ZIMPORTSESSION IS NOT NULL
-          AND a.ZTRASHEDSTATE = 0
-    """)
-    results = media_cursor.fetchall()
-
-    logger.info(f"Fetched {len(results)} assets from Photos DB.")
-
-    inserted_count = 0
-    assets_to_insert = []
-
-    for row in results:
-        asset_id, score, is_fav, filename, date_created, imported_date, import_id, month, MomentsAlbumName, selection_flag, featured_flag = row
-        assets_to_insert.append((
-            asset_id, score, is_fav, filename, date_created, imported_date, 
-            import_id, month, MomentsAlbumName, selection_flag or 0, featured_flag or 0
-        ))
-
-    if assets_to_insert:
-        logger.info(f"Preparing to insert/update {len(assets_to_insert)} asset records...")
-        media_cursor.executemany("""
-            INSERT INTO assets (
-                asset_id, 
-                aesthetic_score, 
-                apple_favorite,
-                original_filename, 
-                date_created_utc,
-                imported_date_utc,
-                import_id,
-                month,
-                MomentsAlbumName,
-                apple_photos_monthly_selection,
-                mobile_apple_photos_featured_photos,
-                score_imported_at_utc,
-                updated_at_utc
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'))
-            ON CONFLICT(asset_id) DO UPDATE SET
-                asset_id = excluded.asset_id,
-                aesthetic_score = excluded.aesthetic_score,
-                apple_favorite = excluded.apple_favorite,
-                MomentsAlbumName = excluded.MomentsAlbumName,
-                date_created_utc = excluded.date_created_utc,
-                imported_date_utc = excluded.imported_date_utc,
-                import_id = excluded.import_id,
-                apple_photos_monthly_selection = excluded.apple_photos_monthly_selection,
-                mobile_apple_photos_featured_photos = excluded.mobile_apple_photos_featured_photos,
-                score_imported_at_utc = datetime('now'),
-                updated_at_utc = datetime('now')
-            WHERE asset_id IS NOT excluded.asset_id
-               OR ROUND(COALESCE(aesthetic_score, -1.0), 6) IS NOT ROUND(COALESCE(excluded.aesthetic_score, -1.0), 6)
-               OR COALESCE(apple_favorite, 0) IS NOT COALESCE(excluded.apple_favorite, 0)
-               OR COALESCE(CAST(import_id AS TEXT), '') IS NOT COALESCE(CAST(excluded.import_id AS TEXT), '')
-               OR COALESCE(date_created_utc, '') IS NOT COALESCE(excluded.date_created_utc, '')
-               OR COALESCE(MomentsAlbumName, '') IS NOT COALESCE(excluded.MomentsAlbumName, '')
-               OR COALESCE(apple_photos_monthly_selection, 0) IS NOT COALESCE(excluded.apple_photos_monthly_selection, 0)
-               OR COALESCE(mobile_apple_photos_featured_photos, 0) IS NOT COALESCE(excluded.mobile_apple_photos_featured_photos, 0);
-        """, assets_to_insert)
-        inserted_count = media_cursor.rowcount
-        commit()
+    if streaming:
+        inserted_count = upsert_assets_streaming(media_cursor, logger, changed_only=incremental)
+    else:
+        inserted_count = upsert_assets(media_cursor, changed_only=incremental)
+    media_cursor.connection.commit()
+    media_cursor.execute("DROP TABLE IF EXISTS temp.asset_album_flags;")
+    media_cursor.execute("DROP TABLE IF EXISTS temp.asset_album_membership;")
 
     logger.info(f"✅ Inserted or updated {inserted_count} asset records in Media Organizer DB.")
 
     # Purge assets from local 'assets' table that no longer exist or are trashed in Apple Photos
     logger.info("Purging orphaned or trashed assets that no longer exist in Apple Photos...")
-    media_cursor.execute("""
-        DELETE FROM assets 
-        WHERE asset_id NOT IN (
-            SELECT ZUUID FROM photos_db.ZASSET WHERE ZTRASHEDSTATE = 0
-        )
-    """)
+    if incremental:
+        media_cursor.execute("""
+            DELETE FROM assets
+            WHERE asset_pk IN (SELECT asset_pk FROM temp.derived_changed_assets)
+              AND NOT EXISTS (
+                  SELECT 1 FROM ZASSET z WHERE z.Z_PK = assets.asset_pk AND z.ZTRASHEDSTATE = 0
+              )
+        """)
+    else:
+        media_cursor.execute("""
+            DELETE FROM assets 
+            WHERE asset_id NOT IN (
+                SELECT ZUUID FROM photos_db.ZASSET WHERE ZTRASHEDSTATE = 0
+            )
+        """)
     purged_count = media_cursor.rowcount
     if purged_count > 0:
         logger.info(f"🗑️ Purged {purged_count} orphaned or trashed asset records.")
-        commit()
-
-    # Purge import sessions from local 'imports' table that no longer have corresponding assets in ZASSET
-    logger.info("Purging orphaned import sessions that no longer exist in Apple Photos...")
+        media_cursor.connection.commit()
+
+    if has_camera_sequences(media_cursor):
+        upserted, deleted = sync_camera_sequences(media_cursor, changed_only=incremental)
+        media_cursor.connection.commit()
+        logger.info(f"Synced camera_sequences: {upserted} rows inserted or updated, {deleted} rows deleted.")
+    else:
+        logger.warning("⚠️ camera_sequences table not found. Apply pending migrations first.")
+
+    logger.info("Syncing smart_albums, albums and moments from Apple Photos DB...")
+    for table, album_filter in ALBUM_TABLE_FILTERS.items():
+        media_cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} (album_pk INTEGER PRIMARY KEY, album_name TEXT, parent_folder_pk INTEGER, parent_folder_name TEXT)")
+        upserted, deleted = sync_album_table(media_cursor, table, album_filter, changed_only=incremental)
+        logger.info(f"Synced {table}: {upserted} rows inserted or updated, {deleted} rows deleted.")
+
+    # Remember each album's Z_OPT so the next incremental run can tell which ones moved
+    scope = "AND a.Z_PK IN (SELECT album_pk FROM temp.derived_changed_albums)" if incremental else ""
+    media_cursor.execute(f'''
+        INSERT INTO album_sync_state (album_pk, z_opt)
+        SELECT a.Z_PK, COALESCE(a.Z_OPT, 0) FROM photos_db.ZGENERICALBUM a
+        WHERE true {scope}
+        ON CONFLICT(album_pk) DO UPDATE SET z_opt = excluded.z_opt
+        WHERE z_opt IS NOT excluded.z_opt
+    ''')
     media_cursor.execute("""
-        DELETE FROM imports
-        WHERE (import_uuid, camera_model) NOT IN (
-            SELECT DISTINCT
-                a.ZIMPORTSESSION,
-                COALESCE(ea.ZCAMERAMODEL, 'Unknown')
-            FROM photos_db.ZASSET a
-            LEFT JOIN photos_db.ZEXTENDEDATTRIBUTES ea ON ea.ZASSET = a.Z_PK
-            WHERE a.ZIMPORTSESSION IS NOT NULL
-        )
+        DELETE FROM album_sync_state
+        WHERE album_pk NOT IN (SELECT Z_PK FROM photos_db.ZGENERICALBUM)
     """)
-    purged_imports_count = media_cursor.rowcount
-    if purged_imports_count > 0:
-        logger.info(f"🗑️ Purged {purged_imports_count} orphaned import session records.")
-        commit()
-
-    # Ensure smart_albums table exists and clear it before repopulating
-    media_cursor.execute("CREATE TABLE IF NOT EXISTS smart_albums (album_pk INTEGER, album_name TEXT, parent_folder_pk INTEGER, parent_folder_name TEXT)")
-    logger.info("Clearing existing smart_albums entries...")
-    media_cursor.execute("DELETE FROM smart_albums;")
-
-    logger.info("Populating smart_albums from Apple Photos DB...")
-    media_cursor.execute('''
-        INSERT INTO smart_albums (album_pk, album_name, parent_folder_pk, parent_folder_name)
-        SELECT 
-            a.Z_PK, 
-            a.ZTITLE, 
-            a.ZPARENTFOLDER, 
-            p.ZTITLE
-        FROM photos_db.ZGENERICALBUM a
-        LEFT JOIN photos_db.ZGENERICALBUM p ON a.ZPARENTFOLDER = p.Z_PK
-        WHERE a.ZKIND = 1507
-        AND a.ZTRASHEDSTATE = 0
-        AND (p.ZTITLE = 'MonthlyExports' OR a.ZPARENTFOLDER IN (SELECT Z_PK FROM photos_db.ZGENERICALBUM WHERE ZTITLE = 'MonthlyExports'))
-        ORDER BY a.ZTITLE;
-    ''')
-
-    # Ensure albums table exists and clear it before repopulating
-    media_cursor.execute("CREATE TABLE IF NOT EXISTS albums (album_pk INTEGER, album_name TEXT, parent_folder_pk INTEGER, parent_folder_name TEXT)")
-    logger.info("Clearing existing albums entries...")
-    media_cursor.execute("DELETE FROM albums;")
-
-    logger.info("Populating albums from Apple Photos DB...")
-    media_cursor.execute('''
-        INSERT INTO albums (album_pk, album_name, parent_folder_pk, parent_folder_name)
-        SELECT 
-            a.Z_PK, 
-            a.ZTITLE, 
-            a.ZPARENTFOLDER, 
-            p.ZTITLE
-        FROM photos_db.ZGENERICALBUM a
-        LEFT JOIN photos_db.ZGENERICALBUM p ON a.ZPARENTFOLDER = p.Z_PK
-        WHERE a.ZKIND <> 1507
-        and a.ZTITLE is NOT NULL
-        and a.ZTRASHEDSTATE = 0
-        ORDER BY a.ZTITLE;
-    ''')
-
-    # Ensure moments table exists and clear it before repopulating
-    media_cursor.execute("CREATE TABLE IF NOT EXISTS moments (album_pk INTEGER, album_name TEXT, parent_folder_pk INTEGER, parent_folder_name TEXT)")
-    logger.info("Clearing existing moments entries...")
-    media_cursor.execute("DELETE FROM moments;")
-
-    logger.info("Populating moments from Apple Photos DB...")
-    media_cursor.execute('''
-        INSERT INTO moments (album_pk, album_name, parent_folder_pk, parent_folder_name)
-        SELECT 
-            a.Z_PK, 
-            a.ZTITLE, 
-            a.ZPARENTFOLDER, 
-            p.ZTITLE
-        FROM photos_db.ZGENERICALBUM a
-        LEFT JOIN photos_db.ZGENERICALBUM p ON a.ZPARENTFOLDER = p.Z_PK
-        WHERE a.ZKIND <> 1507
-        and a.ZTITLE is NOT NULL
-        and p.ZTITLE = 'Moments' 
-        and a.ZTRASHEDSTATE = 0
-        ORDER BY a.ZTITLE;
-    ''')
-
-    commit()
+    media_cursor.connection.commit()
 
     logger.info("Smart albums synced successfully.")
 
-    logger.info("Syncing import session records (inserting new and updating existing)...")
-    media_cursor.execute('''
-        INSERT INTO imports (import_uuid, import_name, import_timestamp_utc, album, assets_count, camera_make, camera_model, min_filename, max_filename, min_date, max_date, months_detected)
-        SELECT
-            z.ZIMPORTSESSION,
-            COALESCE(ea.ZCAMERAMODEL, 'Unknown') || ' (Session ' || z.ZIMPORTSESSION || ')',
-            MIN(datetime(z.ZDATECREATED + 978307200, 'unixepoch', 'localtime')),
-            NULL,
-            COUNT(z.Z_ENT),
-            COALESCE(ea.ZCAMERAMAKE, 'Unknown'),
-            COALESCE(ea.ZCAMERAMODEL, 'Unknown'),
-            MIN(aaa.ZORIGINALFILENAME),
-            MAX(aaa.ZORIGINALFILENAME),
-            MIN(datetime(z.ZDATECREATED + 978307200, 'unixepoch', 'localtime')),
-            MAX(datetime(z.ZDATECREATED + 978307200, 'unixepoch', 'localtime')),
-            GROUP_CONCAT(DISTINCT strftime('%Y-%m', datetime(z.ZDATECREATED + 978307200, 'unixepoch', 'localtime')))
-        FROM photos_db.ZASSET z
-        LEFT JOIN photos_db.ZEXTENDEDATTRIBUTES ea ON ea.ZASSET = z.Z_PK
-        LEFT JOIN photos_db.ZADDITIONALASSETATTRIBUTES aaa ON aaa.ZASSET = z.Z_PK
-        WHERE z.ZIMPORTSESSION IS NOT NULL
-        GROUP BY z.ZIMPORTSESSION, ea.ZCAMERAMAKE, ea.ZCAMERAMODEL
-        ORDER BY z.ZIMPORTSESSION DESC
-        ON CONFLICT(import_uuid, camera_model) DO UPDATE SET
-            assets_count = excluded.assets_count,
-            min_filename = excluded.min_filename,
-            max_filename = excluded.max_filename,
-            min_date = excluded.min_date,
-            max_date = excluded.max_date,
-            months_detected = excluded.months_detected
-        WHERE assets_count != excluded.assets_count 
-           OR min_filename != excluded.min_filename 
-           OR max_filename != excluded.max_filename
-           OR min_date != excluded.min_date
-           OR max_date != excluded.max_date
-           OR months_detected != excluded.months_detected;
-    ''')
-    commit()
-
-    logger.info("New import sessions inserted successfully.")
+    sync_import_sessions(media_cursor, logger, changed_only=incremental)
 
     # Drop and recreate the photos_assets_view
     logger.info("Dropping and recreating photos_assets_view...")
@@ -331,46 +663,46 @@ def sync_assets(media_cursor, logger):
         FROM main.ZASSET a
         LEFT JOIN main.ZADDITIONALASSETATTRIBUTES aaa ON aaa.ZASSET = a.Z_PK;
     ''')
-    commit()
+    media_cursor.connection.commit()
 
     logger.info("View photos_assets_view recreated successfully.")
 
-    # Drop and recreate the ranked_assets_view
-    logger.info("Dropping and recreating ranked_assets_view...")
-    media_cursor.execute("DROP VIEW IF EXISTS main.ranked_assets_view;")
-    media_cursor.execute(f'''
-        CREATE VIEW main.ranked_assets_view AS
-        SELECT 
-            asset_id,
-            original_filename,
-            month,
-            aesthetic_score,
-            google_favorite,
-            apple_favorite,
-            apple_photos_monthly_selection,
-            mobile_apple_photos_featured_photos,
-            (
-                (COALESCE(aesthetic_score, 0) * {AESTHETIC_SCORE_WEIGHT}) + 
-                (google_favorite * {GOOGLE_FAVORITES_WEIGHT}) + 
-                (apple_photos_monthly_selection * {APPLE_SELECTION_WEIGHT}) +
-                (mobile_apple_photos_featured_photos * {APPLE_FEATURED_WEIGHT})
-            ) AS score_normalized,
-            date_created_utc,
-            MomentsAlbumName
-        FROM main.assets
-        WHERE ignore_continuity_check = 0 OR ignore_continuity_check IS NULL;
-    ''')
-    commit()
+    # ranked_assets itself is kept current by triggers; the view only keeps old queries working
+    logger.info("Recreating ranked_assets_view over the ranked_assets table...")
+    create_ranked_assets_view(media_cursor)
+    media_cursor.connection.commit()
 
     logger.info("View ranked_assets_view recreated successfully.")
 
-    # Now update the db_updates.derived_synced flag
+    # Now update the db_updates.derived_synced flag and consume the change set
     media_cursor.execute("UPDATE db_updates SET derived_synced = 1")
-    commit()
+    if change_set_max_id is not None:
+        clear_changes(media_cursor, change_set_max_id)
+    media_cursor.connection.commit()
+    drop_derived_changes(media_cursor)
+
+def run_derived_sync(conn, logger, force=False, streaming=False):
+    """
+    Runs the derived sync on an open connection unless the derived_synced flag says the
+    latest raw sync was already processed and no raw changes are pending. `force` always
+    runs and rebuilds every derived table. Returns False when the sync was skipped.
+    """
+    media_cursor = conn.cursor()
+    if not force:
+        media_cursor.execute("SELECT derived_synced FROM db_updates ORDER BY id DESC LIMIT 1")
+        row = media_cursor.fetchone()
+        pending = has_change_set(media_cursor) and get_pending_changes(media_cursor)[0] is not None
+        if row and row[0] == 1 and not pending:
+            logger.info("Derived sync flag is already set. Skipping derived assets sync (use --force to override).")
+            return False
+    sync_assets(media_cursor, logger, streaming=streaming, full=force)
+    logger.info(f"📈 Peak RSS after derived sync: {human_readable_size(get_peak_rss_bytes())}")
+    return True
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--force", action="store_true", help="Force sync even if derived_synced flag is set")
+    parser.add_argument("--force", action="store_true", help="Force a full rebuild even if derived_synced flag is set")
+    parser.add_argument("--streaming", action="store_true", help="Upsert assets from fetchmany() chunks instead of one INSERT ... SELECT")
     args = parser.parse_args()
 
     logger = setup_logger(LOG_PATH, MODULE_TAG)
@@ -378,22 +710,10 @@ if __name__ == "__main__":
         handler.setFormatter(logging.Formatter('%(asctime)s [%(name)s:%(lineno)d] - %(levelname)s - %(message)s'))
 
     conn = get_connection()
-    conn.execute("PRAGMA journal_mode=WAL;")
-    conn.execute("PRAGMA busy_timeout = 30000")
-    media_cursor = get_cursor()
-
-    if not args.force:
-        media_cursor.execute("SELECT derived_synced FROM db_updates ORDER BY id DESC LIMIT 1")
-        row = media_cursor.fetchone()
-        if row and row[0] == 1:
-            logger.info("Derived sync flag is already set. Skipping derived assets sync (use --force to override).")
-            close_conn()
-            close_logger(logger=logger)
-            sys.exit(0)
 
     try:
-        sync_assets(media_cursor, logger)
-        logger.info("Photos assets sync completed successfully.")
+        if run_derived_sync(conn, logger, force=args.force, streaming=args.streaming):
+            logger.info("Photos assets sync completed successfully.")
     except Exception as e:
         logger.error(f"Photo assets sync failed: {e}")
         sys.exit(1)
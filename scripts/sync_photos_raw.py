@@ -1,15 +1,454 @@
 import sys
 import os
 import time
+import threading
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import sqlite3
 import logging
-from constants import BASE_DIR, MEDIA_ORGANIZER_DB_PATH, APPLE_PHOTOS_DB_PATH, LOG_PATH, MAX_RETRIES, RETRY_DELAY
+import argparse
+from dataclasses import dataclass, field
+from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from constants import BASE_DIR, APPLE_PHOTOS_DB_PATH, LOG_PATH, MAX_RETRIES, RETRY_DELAY
+from constants import RAW_SYNC_PARALLEL_WORKERS, RAW_SYNC_STAGING_DIR
 from utils.logger import setup_logger, close_logger
+from db.mirror_manifest import get_mirror_columns, get_mirror_index_statements
+from db.change_set import has_change_set, record_table_changes, record_full_rebuild
+from db.connections import connect, get_thread_connection, close_thread_connection
+from db.photos_snapshot import photos_snapshot, get_photos_schema
 
 MODULE_TAG = 'sync_photos_raw'
 
-def sync_metadata(logger):
+RAW_TABLES = ["ZASSET", "ZADDITIONALASSETATTRIBUTES", "ZEXTENDEDATTRIBUTES", "ZIMPORTSESSION"]
+
+
+@dataclass
+class TablePlan:
+    table: str
+    column_defs: List[Tuple[str, str]]
+    # Recreate main.<table> from scratch (missing, no Z_PK key or columns differ from the manifest)
+    rebuild: bool = False
+    # The rebuild drops columns from an existing wider table
+    narrowed: bool = False
+    # Core Data entities to read from persistent history; empty means full diff
+    entities: List[int] = field(default_factory=list)
+
+    @property
+    def columns(self):
+        return [name for name, _ in self.column_defs]
+
+
+def get_last_history_watermark(cursor):
+    """Returns the last ATRANSACTION.Z_PK applied by a raw sync, or None."""
+    cursor.execute("PRAGMA main.table_info(metadata_sync_log);")
+    if "history_transaction_pk" not in {row[1] for row in cursor.fetchall()}:
+        return None
+    cursor.execute("""
+        SELECT history_transaction_pk FROM metadata_sync_log
+        WHERE history_transaction_pk IS NOT NULL
+        ORDER BY id DESC LIMIT 1
+    """)
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def get_history_bounds(cursor):
+    """
+    Returns (min_pk, max_pk) of photos_db.ATRANSACTION, or None when the Photos DB has no
+    usable Core Data persistent history.
+    """
+    schema = get_photos_schema(cursor)
+    for table, required in (("ATRANSACTION", {"Z_PK"}), ("ACHANGE", {"ZENTITY", "ZENTITYPK", "ZTRANSACTIONID"})):
+        if not required.issubset(schema.get(table, {})):
+            return None
+    cursor.execute("SELECT MIN(Z_PK), MAX(Z_PK) FROM photos_db.ATRANSACTION;")
+    return cursor.fetchone()
+
+
+def plan_history_sync(cursor, logger, force_full=False):
+    """
+    Decides between a watermark-based sync and the full table diff.
+    Returns (mode, from_pk, to_pk): mode is 'history' or 'full'; to_pk is the watermark to
+    record after a successful sync (None when there is no history to track).
+    """
+    bounds = get_history_bounds(cursor)
+    if bounds is None:
+        logger.info("ℹ️ Photos DB has no persistent history tables. Using full table diff.")
+        return "full", None, None
+    min_pk, max_pk = bounds
+    watermark = get_last_history_watermark(cursor)
+
+    if force_full:
+        logger.info("ℹ️ Full table diff requested.")
+        return "full", None, max_pk
+    if watermark is None:
+        logger.info("ℹ️ No history watermark recorded yet. Using full table diff.")
+        return "full", None, max_pk
+    if max_pk is None or max_pk < watermark:
+        logger.warning(f"⚠️ Persistent history was reset (watermark {watermark}, latest transaction {max_pk}). Using full table diff.")
+        return "full", None, max_pk
+    if min_pk > watermark + 1:
+        logger.warning(f"⚠️ Persistent history was truncated (watermark {watermark}, oldest transaction {min_pk}). Using full table diff.")
+        return "full", None, max_pk
+
+    if max_pk == watermark:
+        logger.info(f"ℹ️ No new persistent history transactions since {watermark}.")
+    else:
+        logger.info(f"Using persistent history: transactions {watermark + 1}..{max_pk} ({max_pk - watermark} new).")
+    return "history", watermark, max_pk
+
+
+def get_table_entities(cursor, table):
+    """
+    Returns the Core Data entity numbers stored in photos_db.<table>. Sub-entities share
+    their root entity's table, which is named 'Z' + the upper-cased root entity name.
+    """
+    cursor.execute("SELECT Z_ENT, Z_NAME, Z_SUPER FROM photos_db.Z_PRIMARYKEY;")
+    entities = {ent: (name, super_ent) for ent, name, super_ent in cursor.fetchall()}
+    table_entities = []
+    for ent in entities:
+        root = ent
+        while entities.get(root, (None, 0))[1] in entities:
+            root = entities[root][1]
+        if f"Z{entities[root][0].upper()}" == table:
+            table_entities.append(ent)
+    return table_entities
+
+
+def get_source_column_defs(cursor, table, logger):
+    """
+    Returns [(name, declared_type)] for the manifest columns of `table` that photos_db has.
+    Columns missing from this Photos schema version are skipped with a warning.
+    """
+    source_types = get_photos_schema(cursor).get(table, {})
+    column_defs = []
+    for column in get_mirror_columns(table):
+        if column in source_types:
+            column_defs.append((column, source_types[column]))
+        else:
+            logger.warning(f"⚠️ Mirrored column {table}.{column} not found in Photos DB. Skipping it.")
+    return column_defs
+
+
+def mirror_column_definitions(column_defs):
+    return ", ".join(
+        f"{name} INTEGER PRIMARY KEY" if name == "Z_PK" else f"{name} {declared_type}".rstrip()
+        for name, declared_type in column_defs
+    )
+
+
+def plan_table_sync(cursor_media, table, sync_mode, logger):
+    """
+    Compares main.<table> with the manifest and photos_db and decides how to sync it.
+    Returns None for a missing optional table.
+    """
+    if table not in get_photos_schema(cursor_media):
+        if table == "ZIMPORTSESSION":
+            logger.warning(f"Optional table {table} not found in Apple Photos DB. Skipping.")
+            return None
+        raise sqlite3.OperationalError(f"Required table {table} not found in photos_db.")
+
+    plan = TablePlan(table, get_source_column_defs(cursor_media, table, logger))
+
+    # Check if local table exists with Z_PK as primary key and exactly the manifest columns
+    cursor_media.execute(f"PRAGMA main.table_info({table});")
+    local_columns = cursor_media.fetchall()
+    # col[1] is name, col[5] is pk flag (1 or 0)
+    has_pk = any(col[1] == "Z_PK" and col[5] == 1 for col in local_columns)
+    matches_manifest = [col[1] for col in local_columns] == plan.columns
+
+    if not local_columns or not has_pk or not matches_manifest:
+        plan.rebuild = True
+        plan.narrowed = len(local_columns) > len(plan.columns)
+    elif sync_mode == "history":
+        plan.entities = get_table_entities(cursor_media, table)
+    return plan
+
+
+def create_mirror_table(cursor_media, table, column_defs):
+    """(Re)creates main.<table> with only the manifest columns and fills it from photos_db."""
+    cursor_media.execute(f"DROP TABLE IF EXISTS main.{table};")
+    cursor_media.execute(f"CREATE TABLE main.{table} ({mirror_column_definitions(column_defs)});")
+    columns = ", ".join(name for name, _ in column_defs)
+    cursor_media.execute(f"INSERT INTO main.{table} ({columns}) SELECT {columns} FROM photos_db.{table};")
+
+
+def ensure_mirror_indexes(cursor_media, tables):
+    """Creates the manifest's secondary indexes on main.<table>; rebuilt tables lose them."""
+    for table in tables:
+        for statement in get_mirror_index_statements(table):
+            cursor_media.execute(statement)
+
+
+def collect_changed_pks_full_diff(cursor_media, table):
+    """Fills temp.raw_sync_changed_pks with rows whose Z_OPT moved, new rows and rows missing from photos_db."""
+    cursor_media.execute("CREATE TEMP TABLE IF NOT EXISTS raw_sync_changed_pks (pk INTEGER PRIMARY KEY);")
+    cursor_media.execute("DELETE FROM temp.raw_sync_changed_pks;")
+    # 1. New/modified rows
+    cursor_media.execute(f"""
+        INSERT OR IGNORE INTO temp.raw_sync_changed_pks (pk)
+        SELECT src.Z_PK FROM photos_db.{table} src
+        LEFT JOIN main.{table} dest ON dest.Z_PK = src.Z_PK
+        WHERE dest.Z_PK IS NULL OR src.Z_OPT > dest.Z_OPT;
+    """)
+    # 2. Removed rows
+    cursor_media.execute(f"""
+        INSERT OR IGNORE INTO temp.raw_sync_changed_pks (pk)
+        SELECT Z_PK FROM main.{table}
+        WHERE Z_PK NOT IN (SELECT Z_PK FROM photos_db.{table});
+    """)
+
+
+def collect_changed_pks_from_history(cursor_media, entities, from_pk, to_pk):
+    """
+    Fills temp.raw_sync_changed_pks with the rows persistent history reports as inserted,
+    updated or deleted in transactions (from_pk, to_pk].
+    """
+    cursor_media.execute("CREATE TEMP TABLE IF NOT EXISTS raw_sync_changed_pks (pk INTEGER PRIMARY KEY);")
+    cursor_media.execute("DELETE FROM temp.raw_sync_changed_pks;")
+    placeholders = ", ".join("?" for _ in entities)
+    cursor_media.execute(f"""
+        INSERT OR IGNORE INTO temp.raw_sync_changed_pks (pk)
+        SELECT ZENTITYPK FROM photos_db.ACHANGE
+        WHERE ZTRANSACTIONID > ? AND ZTRANSACTIONID <= ?
+          AND ZENTITY IN ({placeholders});
+    """, [from_pk, to_pk] + list(entities))
+
+
+def apply_changed_pks(cursor_media, table, columns):
+    """
+    Re-copies the rows listed in temp.raw_sync_changed_pks that still exist in photos_db and
+    deletes the rest. Returns (upserted, deleted).
+    """
+    column_list = ", ".join(columns)
+    source_list = ", ".join(f"src.{c}" for c in columns)
+    cursor_media.execute(f"""
+        INSERT OR REPLACE INTO main.{table} ({column_list})
+        SELECT {source_list} FROM photos_db.{table} src
+        WHERE src.Z_PK IN (SELECT pk FROM temp.raw_sync_changed_pks);
+    """)
+    upserted = cursor_media.rowcount
+    cursor_media.execute(f"""
+        DELETE FROM main.{table}
+        WHERE Z_PK IN (
+            SELECT c.pk FROM temp.raw_sync_changed_pks c
+            WHERE NOT EXISTS (SELECT 1 FROM photos_db.{table} src WHERE src.Z_PK = c.pk)
+        );
+    """)
+    return upserted, cursor_media.rowcount
+
+
+def apply_table_plan(conn_media, plan, from_pk, to_pk, logger, emit_changes=False):
+    """
+    Sequential mode: syncs one table directly into main on the shared connection. With
+    emit_changes the touched PKs are appended to the raw_change_set for derived sync.
+    """
+    cursor_media = conn_media.cursor()
+    table, columns = plan.table, plan.columns
+    if plan.rebuild:
+        logger.info(f"Creating/upgrading local table main.{table} with {len(columns)} mirrored columns...")
+        # Populate table initially
+        logger.info(f"Performing initial full sync for main.{table}...")
+        create_mirror_table(cursor_media, table, plan.column_defs)
+        if emit_changes:
+            record_full_rebuild(cursor_media, table)
+    else:
+        if plan.entities:
+            collect_changed_pks_from_history(cursor_media, plan.entities, from_pk, to_pk)
+            label = "History sync"
+        else:
+            # Table exists and has PK, perform incremental sync (upsert and delete)
+            logger.info(f"Performing incremental sync for main.{table}...")
+            collect_changed_pks_full_diff(cursor_media, table)
+            label = "Incremental sync"
+        # Recorded before applying so deleted attribute rows can still be mapped to their asset
+        changed = record_table_changes(cursor_media, table, "SELECT pk FROM temp.raw_sync_changed_pks") if emit_changes else None
+        inserted_updated, deleted = apply_changed_pks(cursor_media, table, columns)
+        changed_msg = f"{changed} changed PKs, " if changed is not None else ""
+        logger.info(f"{label} for {table} completed: {changed_msg}upserted {inserted_updated} rows, deleted {deleted} rows.")
+    conn_media.commit()
+
+
+def get_staging_path(table):
+    return os.path.join(RAW_SYNC_STAGING_DIR, f"{table}.sqlite")
+
+
+def remove_staging_file(staging_path):
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        if os.path.exists(staging_path + suffix):
+            os.remove(staging_path + suffix)
+
+
+def stage_table_changes(plan, from_pk, to_pk):
+    """
+    Parallel mode worker: computes one table's changes on the worker thread's connection and
+    writes them into a scratch staging database (staged_rows to upsert, staged_deletes to remove).
+    The connection has the Media Organizer DB open read-only as main (its views reference
+    main.*, so it cannot be attached under another name), so it never takes the write lock.
+    It is reused for the worker's next table, so the staging file is detached again on exit.
+    Returns (staging_path, staged_rows, staged_deletes).
+    """
+    staging_path = get_staging_path(plan.table)
+    remove_staging_file(staging_path)
+    # query_only stays off: the attached staging file is written
+    conn = get_thread_connection(read_only=True, query_only=False)
+    try:
+        conn.execute(f"ATTACH DATABASE 'file:{staging_path}' AS stage;")
+        # Scratch file, rebuilt on every run
+        conn.execute("PRAGMA stage.journal_mode=OFF;")
+        conn.execute("PRAGMA stage.synchronous=OFF;")
+        with photos_snapshot(conn):
+            table = plan.table
+            column_list = ", ".join(plan.columns)
+            source_list = ", ".join(f"src.{c}" for c in plan.columns)
+            conn.execute(f"CREATE TABLE stage.staged_rows ({mirror_column_definitions(plan.column_defs)});")
+            conn.execute("CREATE TABLE stage.staged_deletes (pk INTEGER PRIMARY KEY);")
+
+            if plan.rebuild:
+                conn.execute(f"INSERT INTO stage.staged_rows ({column_list}) SELECT {column_list} FROM photos_db.{table};")
+            elif plan.entities:
+                conn.execute("CREATE TEMP TABLE raw_sync_changed_pks (pk INTEGER PRIMARY KEY);")
+                placeholders = ", ".join("?" for _ in plan.entities)
+                conn.execute(f"""
+                    INSERT OR IGNORE INTO temp.raw_sync_changed_pks (pk)
+                    SELECT ZENTITYPK FROM photos_db.ACHANGE
+                    WHERE ZTRANSACTIONID > ? AND ZTRANSACTIONID <= ?
+                      AND ZENTITY IN ({placeholders});
+                """, [from_pk, to_pk] + list(plan.entities))
+                conn.execute(f"""
+                    INSERT INTO stage.staged_rows ({column_list})
+                    SELECT {source_list} FROM photos_db.{table} src
+                    WHERE src.Z_PK IN (SELECT pk FROM temp.raw_sync_changed_pks);
+                """)
+                conn.execute(f"""
+                    INSERT INTO stage.staged_deletes (pk)
+                    SELECT c.pk FROM temp.raw_sync_changed_pks c
+                    WHERE NOT EXISTS (SELECT 1 FROM photos_db.{table} src WHERE src.Z_PK = c.pk);
+                """)
+            else:
+                conn.execute(f"""
+                    INSERT INTO stage.staged_rows ({column_list})
+                    SELECT {source_list} FROM photos_db.{table} src
+                    LEFT JOIN main.{table} dest ON dest.Z_PK = src.Z_PK
+                    WHERE dest.Z_PK IS NULL OR src.Z_OPT > dest.Z_OPT;
+                """)
+                conn.execute(f"""
+                    INSERT INTO stage.staged_deletes (pk)
+                    SELECT Z_PK FROM main.{table}
+                    WHERE Z_PK NOT IN (SELECT Z_PK FROM photos_db.{table});
+                """)
+            conn.commit()
+        staged_rows = conn.execute("SELECT COUNT(*) FROM stage.staged_rows;").fetchone()[0]
+        staged_deletes = conn.execute("SELECT COUNT(*) FROM stage.staged_deletes;").fetchone()[0]
+    finally:
+        conn.rollback()
+        conn.execute("DROP TABLE IF EXISTS temp.raw_sync_changed_pks;")
+        try:
+            conn.execute("DETACH DATABASE stage;")
+        except sqlite3.OperationalError as e:
+            if "no such database" not in str(e):
+                raise
+    return staging_path, staged_rows, staged_deletes
+
+
+def swap_staged_tables(conn_media, staged, sync_mode, to_pk, logger, emit_changes=False):
+    """
+    Applies every staged table and the sync log entry to main in one IMMEDIATE transaction,
+    so the Media Organizer DB write lock is held only for this final swap.
+    `staged` is a list of (plan, staging_path).
+    """
+    cursor_media = conn_media.cursor()
+    aliases = []
+    try:
+        for i, (plan, staging_path) in enumerate(staged):
+            alias = f"raw_stage_{i}"
+            cursor_media.execute(f"ATTACH DATABASE 'file:{staging_path}?mode=ro' AS {alias};")
+            aliases.append(alias)
+
+        start = time.perf_counter()
+        cursor_media.execute("BEGIN IMMEDIATE;")
+        for (plan, _), alias in zip(staged, aliases):
+            table = plan.table
+            column_list = ", ".join(plan.columns)
+            if plan.rebuild:
+                if emit_changes:
+                    record_full_rebuild(cursor_media, table)
+                cursor_media.execute(f"DROP TABLE IF EXISTS main.{table};")
+                cursor_media.execute(f"CREATE TABLE main.{table} ({mirror_column_definitions(plan.column_defs)});")
+                cursor_media.execute(f"INSERT INTO main.{table} ({column_list}) SELECT {column_list} FROM {alias}.staged_rows;")
+            else:
+                if emit_changes:
+                    record_table_changes(cursor_media, table, f"SELECT Z_PK AS pk FROM {alias}.staged_rows UNION SELECT pk FROM {alias}.staged_deletes")
+                cursor_media.execute(f"INSERT OR REPLACE INTO main.{table} ({column_list}) SELECT {column_list} FROM {alias}.staged_rows;")
+                cursor_media.execute(f"DELETE FROM main.{table} WHERE Z_PK IN (SELECT pk FROM {alias}.staged_deletes);")
+        record_sync(cursor_media, sync_mode, to_pk)
+        conn_media.commit()
+        logger.info(f"Swapped {len(staged)} staged tables into the Media Organizer DB in {time.perf_counter() - start:.2f}s.")
+    except Exception:
+        conn_media.rollback()
+        raise
+    finally:
+        for alias in aliases:
+            cursor_media.execute(f"DETACH DATABASE {alias};")
+
+
+def close_worker_connections(pool, workers):
+    """Runs close_thread_connection() once on each of the pool's `workers` threads."""
+    # Every task blocks until all `workers` of them run, so each lands on a different thread
+    barrier = threading.Barrier(workers)
+
+    def close_on_worker():
+        barrier.wait()
+        close_thread_connection()
+
+    for future in [pool.submit(close_on_worker) for _ in range(workers)]:
+        future.result()
+
+
+def sync_tables_parallel(conn_media, plans, sync_mode, from_pk, to_pk, logger, emit_changes=False):
+    """Stages every table on its own worker and connection, then swaps them in at once."""
+    os.makedirs(RAW_SYNC_STAGING_DIR, exist_ok=True)
+    logger.info(f"Staging {len(plans)} tables on {min(RAW_SYNC_PARALLEL_WORKERS, len(plans))} workers...")
+    staged = []
+    try:
+        with ThreadPoolExecutor(max_workers=RAW_SYNC_PARALLEL_WORKERS) as pool:
+            try:
+                futures = [(plan, pool.submit(stage_table_changes, plan, from_pk, to_pk)) for plan in plans]
+                for plan, future in futures:
+                    staging_path, staged_rows, staged_deletes = future.result()
+                    staged.append((plan, staging_path))
+                    action = "rebuild" if plan.rebuild else ("history" if plan.entities else "diff")
+                    logger.info(f"Staged {plan.table} ({action}): {staged_rows} rows to upsert, {staged_deletes} rows to delete.")
+            finally:
+                close_worker_connections(pool, RAW_SYNC_PARALLEL_WORKERS)
+        swap_staged_tables(conn_media, staged, sync_mode, to_pk, logger, emit_changes=emit_changes)
+    finally:
+        for plan in plans:
+            remove_staging_file(get_staging_path(plan.table))
+
+
+def record_sync(cursor_media, sync_mode, history_transaction_pk):
+    cursor_media.execute("PRAGMA main.table_info(metadata_sync_log);")
+    if "history_transaction_pk" in {row[1] for row in cursor_media.fetchall()}:
+        cursor_media.execute("""
+            INSERT INTO metadata_sync_log (synced_at_utc, history_transaction_pk, sync_mode)
+            VALUES (datetime('now'), ?, ?);
+        """, (history_transaction_pk, sync_mode))
+    else:
+        cursor_media.execute("INSERT INTO metadata_sync_log (synced_at_utc) VALUES (datetime('now'));")
+
+
+def sync_metadata(logger, conn=None, force_full=False, parallel=False):
+    """
+    Mirrors the raw Photos tables into the Media Organizer DB.
+    Changed rows are found through Core Data persistent history (ATRANSACTION/ACHANGE) past
+    the watermark kept in metadata_sync_log; without a usable watermark, or with force_full,
+    every table is diffed in full on Z_OPT.
+    With parallel, each table is diffed on its own worker into a staging file and all of them
+    are swapped into main in one short transaction; otherwise tables are synced one by one.
+    When conn is given (in-process step runner) it is reused and left open; otherwise each
+    attempt opens and closes its own connection.
+    """
     if not os.path.exists(APPLE_PHOTOS_DB_PATH):
         logger.error(f"Apple Photos database not found at {APPLE_PHOTOS_DB_PATH}")
         return
@@ -17,9 +456,10 @@ def sync_metadata(logger):
     for attempt in range(1, MAX_RETRIES + 1):
         conn_media = None
         try:
-            conn_media = sqlite3.connect(MEDIA_ORGANIZER_DB_PATH, timeout=30, uri=True)
-            conn_media.execute("PRAGMA journal_mode=WAL;")
-            conn_media.execute("PRAGMA busy_timeout = 30000;")
+            if conn is not None:
+                conn_media = conn
+            else:
+                conn_media = connect()
             cursor_media = conn_media.cursor()
 
             logger.info(f"Connected to Media Organizer DB (Attempt {attempt}/{MAX_RETRIES}).")
@@ -31,94 +471,57 @@ def sync_metadata(logger):
                 logger.info("Raw sync flag is already set. Skipping raw assets sync.")
                 return
 
-            # Attach the Apple Photos database in read-only mode
-            cursor_media.execute(f"ATTACH DATABASE 'file:{APPLE_PHOTOS_DB_PATH}?mode=ro' AS photos_db;")
-            logger.info("Attached Photos.sqlite database read-only.")
-
-            # Verify attached database integrity
-            # logger.info("Verifying attached database integrity (this may take a while)...")
-            # cursor_media.execute("PRAGMA photos_db.quick_check;")
-            # integrity_res = cursor_media.fetchone()
-            # if integrity_res and integrity_res[0] != 'ok':
-            #     raise sqlite3.DatabaseError(f"Attached Photos DB copy is malformed: {integrity_res[0]}")
-
-            # Refresh local copies of heavy tables.
-            for table in ["ZASSET", "ZADDITIONALASSETATTRIBUTES", "ZEXTENDEDATTRIBUTES", "ZIMPORTSESSION"]:
-                cursor_media.execute("SELECT name FROM photos_db.sqlite_master WHERE type='table' AND name=?", (table,))
-                if cursor_media.fetchone():
-                    # Check if local table exists and has Z_PK as primary key
-                    cursor_media.execute("SELECT name FROM main.sqlite_master WHERE type='table' AND name=?", (table,))
-                    local_exists = cursor_media.fetchone() is not None
-                    
-                    has_pk = False
-                    if local_exists:
-                        cursor_media.execute(f"PRAGMA main.table_info({table});")
-                        columns = cursor_media.fetchall()
-                        for col in columns:
-                            # col[1] is name, col[5] is pk flag (1 or 0)
-                            if col[1] == "Z_PK" and col[5] == 1:
-                                has_pk = True
-                                break
-                    
-                    if not local_exists or not has_pk:
-                        logger.info(f"Creating/upgrading local table main.{table} with primary key schema...")
-                        # Drop if exists (since it doesn't have PK)
-                        cursor_media.execute(f"DROP TABLE IF EXISTS main.{table};")
-                        # Get creation SQL from source DB
-                        cursor_media.execute("SELECT sql FROM photos_db.sqlite_master WHERE type='table' AND name=?", (table,))
-                        create_sql = cursor_media.fetchone()[0]
-                        # Execute creation SQL in main
-                        cursor_media.execute(create_sql)
-                        
-                        # Populate table initially
-                        logger.info(f"Performing initial full sync for main.{table}...")
-                        cursor_media.execute(f"INSERT INTO main.{table} SELECT * FROM photos_db.{table};")
-                        conn_media.commit()
-                    else:
-                        # Table exists and has PK, perform incremental sync (upsert and delete)
-                        logger.info(f"Performing incremental sync for main.{table}...")
-                        
-                        # 1. Upsert new/modified rows
-                        cursor_media.execute(f"""
-                            INSERT OR REPLACE INTO main.{table}
-                            SELECT src.* FROM photos_db.{table} src
-                            LEFT JOIN main.{table} dest ON dest.Z_PK = src.Z_PK
-                            WHERE dest.Z_PK IS NULL OR src.Z_OPT > dest.Z_OPT;
-                        """)
-                        inserted_updated = cursor_media.rowcount
-                        
-                        # 2. Delete removed rows
-                        cursor_media.execute(f"""
-                            DELETE FROM main.{table}
-                            WHERE Z_PK NOT IN (SELECT Z_PK FROM photos_db.{table});
-                        """)
-                        deleted = cursor_media.rowcount
-                        
-                        logger.info(f"Incremental sync for {table} completed: upserted {inserted_updated} rows, deleted {deleted} rows.")
-                        conn_media.commit()
+            # Attach the Apple Photos database read-only; detached again also when the sync fails
+            with photos_snapshot(cursor_media):
+                logger.info("Attached Photos.sqlite database read-only.")
+
+                # Verify attached database integrity
+                # logger.info("Verifying attached database integrity (this may take a while)...")
+                # cursor_media.execute("PRAGMA photos_db.quick_check;")
+                # integrity_res = cursor_media.fetchone()
+                # if integrity_res and integrity_res[0] != 'ok':
+                #     raise sqlite3.DatabaseError(f"Attached Photos DB copy is malformed: {integrity_res[0]}")
+
+                sync_mode, from_pk, to_pk = plan_history_sync(cursor_media, logger, force_full=force_full)
+
+                # Refresh local copies of heavy tables, narrowed to the columns in db/mirror_manifest.py
+                plans = [plan for plan in (plan_table_sync(cursor_media, table, sync_mode, logger) for table in RAW_TABLES) if plan]
+                narrowed_tables = [plan.table for plan in plans if plan.narrowed]
+                # Touched PKs are handed to derived sync through raw_change_set (migration 047)
+                emit_changes = has_change_set(cursor_media)
+
+                if parallel:
+                    sync_tables_parallel(conn_media, plans, sync_mode, from_pk, to_pk, logger, emit_changes=emit_changes)
+                    logger.info("Copied tables successfully.")
                 else:
-                    if table == "ZIMPORTSESSION":
-                        logger.warning(f"Optional table {table} not found in Apple Photos DB. Skipping.")
-                    else:
-                        raise sqlite3.OperationalError(f"Required table {table} not found in photos_db.")
+                    for plan in plans:
+                        apply_table_plan(conn_media, plan, from_pk, to_pk, logger, emit_changes=emit_changes)
+                    logger.info("Copied tables successfully.")
 
-            logger.info("Copied tables successfully.")
+                    # Insert sync timestamp and the history watermark into metadata_sync_log
+                    record_sync(cursor_media, sync_mode, to_pk)
+                    conn_media.commit()
 
-            # Insert sync timestamp into metadata_sync_log
-            cursor_media.execute("INSERT INTO metadata_sync_log (synced_at_utc) VALUES (datetime('now'));")
-            conn_media.commit()
+                ensure_mirror_indexes(cursor_media, RAW_TABLES)
+                conn_media.commit()
 
-            # Detach Photos DB
-            cursor_media.execute("DETACH DATABASE photos_db;")
             logger.info("Detached Photos.sqlite database.")
 
             # After successful sync, update the raw_synced flag
             cursor_media.execute("UPDATE db_updates SET raw_synced = 1")
             conn_media.commit()
             logger.info("Raw sync flag updated to 1 after successful metadata sync.")
+
+            if narrowed_tables:
+                # Dropping the wide tables only frees pages inside the file; VACUUM gives them back
+                logger.info(f"Narrowed {', '.join(narrowed_tables)}. Running VACUUM to reclaim space...")
+                cursor_media.execute("VACUUM;")
+                logger.info("VACUUM completed.")
             return
 
         except Exception as e:
+            if conn_media:
+                conn_media.rollback()
             if attempt < MAX_RETRIES:
                 logger.warning(f"⚠️ Attempt {attempt} failed: {e}. Retrying in {RETRY_DELAY} seconds...")
                 time.sleep(RETRY_DELAY)
@@ -126,7 +529,7 @@ def sync_metadata(logger):
                 logger.error(f"❌ Error during metadata sync after {MAX_RETRIES} attempts: {e}")
                 raise
         finally:
-            if conn_media:
+            if conn_media and conn is None:
                 conn_media.close()
                 logger.info("Closed connection to Media Organizer DB.")
 
@@ -135,8 +538,13 @@ if __name__ == '__main__':
     for handler in logger.handlers:
         handler.setFormatter(logging.Formatter('%(asctime)s [%(name)s:%(lineno)d] - %(levelname)s - %(message)s'))
 
+    parser = argparse.ArgumentParser(description="Mirror the raw Apple Photos tables into the Media Organizer DB.")
+    parser.add_argument("--full", action="store_true", help="Ignore the persistent history watermark and diff every table in full.")
+    parser.add_argument("--parallel", action="store_true", help="Stage each table on its own worker and swap them in with one transaction.")
+    args = parser.parse_args()
+
     try:
-        sync_metadata(logger)
+        sync_metadata(logger, force_full=args.full, parallel=args.parallel)
         logger.info("Photos metadata sync completed successfully.")
     except Exception as e:
         logger.error(f"Sync failed: {e}")
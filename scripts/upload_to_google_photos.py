@@ -8,10 +8,7 @@ import argparse
 import hashlib
 import re
 import subprocess
-from constants import MEDIA_ORGANIZER_DB_PATH, STAGING_ROOT, LOG_PATH, MAX_UPLOAD_FILE_SIZE_MB, MAX_UPLOAD_FILE_SIZE_BYTES, SKIPPED_UPLOADS_ALBUM_NAME, APPLE_PHOTOS_DB_LOCK_PATH
-import json
-import socket
-import errno
+from constants import MEDIA_ORGANIZER_DB_PATH, STAGING_ROOT, LOG_PATH, MAX_UPLOAD_FILE_SIZE_MB, MAX_UPLOAD_FILE_SIZE_BYTES, SKIPPED_UPLOADS_ALBUM_NAME
 import time
 import atexit
 from db.queries import get_planned_month
@@ -21,86 +18,12 @@ from google_photos import create_or_get_album, upload_media, human_readable_size
 from datetime import datetime, timezone
 import logging
 from utils.logger import compute_file_hash
+from utils.locks import acquire_db_lock, release_db_lock
 
 
 MODULE_TAG = 'upload_to_google_photos'
 logger = setup_logger(LOG_PATH, MODULE_TAG)
 
-def read_lock_file():
-    if not os.path.exists(APPLE_PHOTOS_DB_LOCK_PATH):
-        return None
-    try:
-        with open(APPLE_PHOTOS_DB_LOCK_PATH, "r") as f:
-            return json.load(f)
-    except Exception:
-        return None
-
-def write_lock_file(status, pid, started_at=None, latest_successful_refresh_utc="—"):
-    try:
-        lock_data = {
-            "status": status,
-            "pid": pid,
-            "started_at": started_at,
-            "host": socket.gethostname(),
-            "latest_successful_refresh_utc": latest_successful_refresh_utc
-        }
-        with open(APPLE_PHOTOS_DB_LOCK_PATH, "w") as f:
-            json.dump(lock_data, f, indent=2)
-    except Exception as e:
-        logger.warning(f"Failed to write lock file: {e}")
-
-def is_pid_alive(pid):
-    if pid is None:
-        return False
-    try:
-        os.kill(pid, 0)
-        return True
-    except OSError as err:
-        if err.errno == errno.ESRCH:
-            return False
-        return True
-
-def acquire_db_lock():
-    while True:
-        lock = read_lock_file()
-        last_refresh = "—"
-        
-        if lock:
-            last_refresh = lock.get("latest_successful_refresh_utc", "—")
-            status = lock.get("status")
-            lock_pid = lock.get("pid")
-            
-            if status in ["refreshing", "planner_active"]:
-                if is_pid_alive(lock_pid):
-                    logger.info(f"ℹ️ Database copy is currently locked by {status} (PID: {lock_pid}). Waiting for lock release...")
-                    time.sleep(10)
-                    continue
-                else:
-                    logger.warning(f"⚠️ Found stale {status} lock file from dead PID {lock_pid}. Overriding lock.")
-            elif status == "executor_active" and lock_pid == os.getpid():
-                # Already own the lock
-                return
-        
-        # Lock is available, acquire it
-        logger.info(f"🔐 Acquiring executor database lock (PID: {os.getpid()}).")
-        write_lock_file(
-            status="executor_active",
-            pid=os.getpid(),
-            started_at=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-            latest_successful_refresh_utc=last_refresh
-        )
-        break
-
-def release_db_lock():
-    lock = read_lock_file()
-    if lock and lock.get("pid") == os.getpid() and lock.get("status") == "executor_active":
-        logger.info("🔓 Releasing executor database lock.")
-        write_lock_file(
-            status="available",
-            pid=None,
-            latest_successful_refresh_utc=lock.get("latest_successful_refresh_utc", "—")
-        )
-
 SUPPORTED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.heic', '.mov', '.mp4'}
 
 
@@ -255,10 +178,10 @@ def main(args):
     logger.info(f"Found {len(files)} media files to upload from batch {month} (Max size per file: {max_upload_size_mb:.0f} MB)")
 
     # Register cleanup for safety
-    atexit.register(release_db_lock)
+    atexit.register(release_db_lock, "uploader", logger)
 
     # Acquire DB lock and open connection to read metadata
-    acquire_db_lock()
+    acquire_db_lock("uploader", logger)
     conn = get_connection()
     cursor = get_cursor()
 
@@ -289,7 +212,7 @@ def main(args):
 
     # Close connection and release DB lock immediately after reading
     close_conn()
-    release_db_lock()
+    release_db_lock("uploader", logger)
 
     def find_metadata_match(filename):
         # Strip the " 2", " 3" suffix added by Apple Photos export to find the original DB record
@@ -353,7 +276,7 @@ def main(args):
         logger.info(f"✅ No new files to upload for month {month}. (Checked {len(files)} files, {skipped_count} already uploaded, {skipped_oversized_count} skipped > {max_upload_size_mb:.0f} MB).")
         # Since all eligible files in the staging folder have been processed, we finalize the status to 400.
         if not args.dry_run:
-            acquire_db_lock()
+            acquire_db_lock("uploader", logger)
             conn = get_connection()
             cursor = get_cursor()
             cursor.execute("SELECT status_code FROM month_batches WHERE month = ?", (month,))
@@ -363,7 +286,7 @@ def main(args):
                 conn.commit()
                 logger.info(f"✅ Batch {month} status finalized to 400.")
             close_conn()
-            release_db_lock()
+            release_db_lock("uploader", logger)
         return
     else:
         logger.info(f"🔍 Batch Analysis: {len(files_to_process) + skipped_count + skipped_oversized_count} total files found. "
@@ -413,7 +336,7 @@ def main(args):
             files_to_process = selected_files
 
             # Mark batch as partial upload if not all files fit AND it's not already further along (e.g. 500)
-            acquire_db_lock()
+            acquire_db_lock("uploader", logger)
             conn = get_connection()
             cursor = get_cursor()
             cursor.execute("SELECT status_code FROM month_batches WHERE month = ?", (month,))
@@ -429,7 +352,7 @@ def main(args):
                 conn.commit()
                 logger.info(f"Batch {month} status set to partial upload (399).")
             close_conn()
-            release_db_lock()
+            release_db_lock("uploader", logger)
 
         album_title = f"Currently Curating - {month}"
         # Authenticate with a scope that can list albums
@@ -499,7 +422,7 @@ def main(args):
 
     # Save successful uploads and finalize batch status
     if not args.dry_run:
-        acquire_db_lock()
+        acquire_db_lock("uploader", logger)
         conn = get_connection()
         cursor = get_cursor()
 
@@ -536,7 +459,7 @@ def main(args):
 
         conn.commit()
         close_conn()
-        release_db_lock()
+        release_db_lock("uploader", logger)
 
     logger.info(f"✅ Upload process completed at {datetime.now(timezone.utc).isoformat()}")
     if has_error:
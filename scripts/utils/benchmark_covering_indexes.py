@@ -0,0 +1,187 @@
+"""
+Before/after benchmark of the covering indexes of migration 054.
+
+Builds the synthetic schema of check_query_plans.py in a scratch file without migration 054's
+indexes, fills it with a synthetic library (500k assets over ten years by default, with their
+ranked_assets rows, import sessions, moment albums, exports and publications) and times the
+registered queries (db/query_registry.py) of three workloads: the planner's Memory flow, its
+batch summary and the favorites pull. It then applies migration 054 (indexes + ANALYZE) and
+times them again. Writes run inside a transaction that is rolled back, so both passes read
+the same data. The Photos DB is attached empty and the raw mirror tables stay empty.
+
+Usage: python scripts/utils/benchmark_covering_indexes.py [--assets 500000] [--repeat 3] [--db PATH]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import importlib.util
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from db.query_registry import HOT_QUERIES
+from check_query_plans import project_root, build_synthetic_db, find_query_sql, count_parameters
+
+MIGRATION = "migrations/054_add_covering_indexes.py"
+MONTHS = 120
+ASSETS_PER_SESSION = 250
+MOMENT_EVERY = 33          # every 33rd asset is assigned to a moment album
+FAVORITE_EVERY = 50
+PER_CALL_SAMPLE = 200      # lookups per workload for queries run once per moment / month / favorite
+
+# (query name, params(data) -> [parameter tuples]) per workload
+WORKLOADS = {
+    "Memory flow": [
+        ("memory_cutoff_score", lambda d: [()]),
+        ("memory_cutoff_score_local", lambda d: [()]),
+        ("memory_unassigned_high_rank", lambda d: [()]),
+        ("memory_published_moment_stats", lambda d: [()]),
+        ("memory_qualified_assets", lambda d: [(0.5,)]),
+        ("memory_publication_scores", lambda d: [()]),
+        ("memory_moment_timeline", lambda d: [()]),
+        ("memory_moment_assets", lambda d: [(m,) for m in d["moments"]]),
+        ("memory_publish_curated_exports", lambda d: [(m,) for m in d["moments"]]),
+        ("memory_publish_already_published", lambda d: [(m,) for m in d["moments"]]),
+    ],
+    "Batch summary": [
+        ("latest_import_and_month", lambda d: [("pipeline",)]),
+        ("batch_summary_favorites_mapping", lambda d: [()]),
+        ("favorites_count_local", lambda d: [(m,) for m in d["months"]]),
+        ("sequencing_session_ranges", lambda d: [(s,) for s in d["sessions"]]),
+    ],
+    "Favorites pull": [
+        ("favorites_reset_month", lambda d: [(d["months"][-1],)]),
+        ("favorites_match", lambda d: d["favorites"]),
+        ("moment_previously_curated", lambda d: [(m,) for m in d["moments"]]),
+    ],
+}
+
+
+def populate(conn, asset_count, seed=7):
+    """Fills the synthetic schema; returns the sample keys the workloads look up."""
+    rng = random.Random(seed)
+    start = datetime(2016, 1, 1)
+    span = timedelta(days=MONTHS * 30.4) / asset_count
+    months = sorted({(start + span * i).strftime("%Y-%m") for i in range(0, asset_count, max(1, asset_count // 2000))})
+
+    assets, ranked, exports, favorites = [], [], [], []
+    for i in range(asset_count):
+        created = start + span * i
+        month = created.strftime("%Y-%m")
+        asset_id = f"ASSET-{i:08d}"
+        filename = f"IMG_{i % 10000:04d}.HEIC"
+        created_utc = created.strftime("%Y-%m-%d %H:%M:%S")
+        moment = f"{month} - Moment {i % 7}" if i % MOMENT_EVERY == 0 else None
+        favorite = 1 if i % FAVORITE_EVERY == 0 else 0
+        score = rng.random()
+        assets.append((asset_id, i, filename, month, moment, created_utc, f"SESSION-{i // ASSETS_PER_SESSION}", score, favorite))
+        ranked.append((asset_id, filename, month, score, favorite, score, created_utc, moment))
+        if moment:
+            exports.append((asset_id, moment, "curated" if i % 2 else "to_be_curated"))
+        if favorite:
+            favorites.append((filename, created_utc))
+
+    conn.executemany("""
+        INSERT INTO assets (asset_id, asset_pk, original_filename, month, MomentsAlbumName, date_created_utc, import_id, aesthetic_score, google_favorite)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, assets)
+    conn.executemany("""
+        INSERT INTO ranked_assets (asset_id, original_filename, month, aesthetic_score, google_favorite, score_normalized, date_created_utc, MomentsAlbumName)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, ranked)
+    conn.executemany("INSERT INTO moment_exports (asset_id, album_name, curation_stage) VALUES (?, ?, ?)", exports)
+    moments = sorted({album for _, album, _ in exports})
+    conn.executemany("""
+        INSERT INTO publications (asset_id, moment_name, platform, published_at_utc)
+        SELECT asset_id, album_name, 'google_photos', datetime('now') FROM moment_exports
+        WHERE curation_stage = 'curated' AND album_name = ?
+    """, [(m,) for m in moments[::2]])
+    sessions = [f"SESSION-{s}" for s in range((asset_count - 1) // ASSETS_PER_SESSION + 1)]
+    conn.executemany(
+        "INSERT INTO imports (import_uuid, camera_make, camera_model, sequencing_confirmed) VALUES (?, 'Apple', 'iPhone 15 Pro', 1)",
+        [(s,) for s in sessions],
+    )
+    conn.executemany("INSERT INTO month_batches (month, status_code) VALUES (?, '600')", [(m,) for m in months])
+    conn.execute("INSERT INTO batch_status (code, preceding_code, transition_type) VALUES ('650', '600', 'pipeline')")
+    conn.commit()
+
+    sample = rng.sample
+    return {
+        "months": months,
+        "moments": sample(moments, min(PER_CALL_SAMPLE, len(moments))),
+        "sessions": sample(sessions, min(PER_CALL_SAMPLE, len(sessions))),
+        "favorites": sample(favorites, min(PER_CALL_SAMPLE, len(favorites))),
+    }
+
+
+def run_workload(conn, queries, data, repeat):
+    """Returns ({query name: best seconds}, best total seconds) over `repeat` passes."""
+    best = {}
+    for _ in range(repeat):
+        for name, params_fn in queries:
+            sql = queries_sql[name]
+            width = count_parameters(conn, sql)
+            params = [p + (None,) * (width - len(p)) for p in params_fn(data)]
+            start = time.perf_counter()
+            for p in params:
+                conn.execute(sql, p).fetchall()
+            elapsed = time.perf_counter() - start
+            best[name] = min(best.get(name, elapsed), elapsed)
+        conn.rollback()
+    return best, sum(best.values())
+
+
+def apply_migration(conn):
+    spec = importlib.util.spec_from_file_location("migration", os.path.join(project_root, MIGRATION))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.run(conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the hot queries before and after migration 054.")
+    parser.add_argument("--assets", type=int, default=500_000, help="Synthetic library size")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes per workload; the best is reported")
+    parser.add_argument("--db", help="Scratch database path (default: a temporary file, removed afterwards)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix="mo_bench_"), "benchmark.db")
+    if os.path.exists(path):
+        os.remove(path)
+
+    print(f"🏗️  Building synthetic DB with {args.assets:,} assets at {path} ...")
+    start = time.perf_counter()
+    conn = build_synthetic_db(path, exclude=(MIGRATION,))
+    data = populate(conn, args.assets)
+    print(f"✅ Built in {time.perf_counter() - start:.1f} s")
+
+    print("⏱️  Before migration 054 ...")
+    before = {w: run_workload(conn, q, data, args.repeat) for w, q in WORKLOADS.items()}
+    print("🔧 Applying migration 054 ...")
+    start = time.perf_counter()
+    apply_migration(conn)
+    print(f"   took {time.perf_counter() - start:.1f} s")
+    print("⏱️  After migration 054 ...")
+    after = {w: run_workload(conn, q, data, args.repeat) for w, q in WORKLOADS.items()}
+    conn.close()
+
+    for workload, queries in WORKLOADS.items():
+        (b_queries, b_total), (a_queries, a_total) = before[workload], after[workload]
+        print(f"\n📊 {workload}: {b_total * 1000:,.1f} ms -> {a_total * 1000:,.1f} ms ({b_total / a_total:.1f}x)")
+        print(f"{'query':<36} {'calls':>6} {'before ms':>11} {'after ms':>11} {'speedup':>8}")
+        print("-" * 76)
+        for name, params_fn in queries:
+            b, a = b_queries[name], a_queries[name]
+            print(f"{name:<36} {len(params_fn(data)):>6} {b * 1000:>11,.1f} {a * 1000:>11,.1f} {b / a if a else float('inf'):>7.1f}x")
+
+    if not args.db:
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+
+
+queries_sql = {q.name: find_query_sql(q)[1] for q in HOT_QUERIES}
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Static check that every query reading a mirrored Photos table only uses mirrored columns.
+
+Scans the SQL string literals of the project's Python files, finds the mirror tables they
+read through `main.` or an unqualified name (photos_db.* reads the Photos DB itself), resolves
+their aliases and compares every referenced Z* column against db/mirror_manifest.py.
+Exits with status 1 and lists the offending queries when a column is not mirrored.
+
+Usage: python scripts/utils/check_mirror_columns.py [paths...]
+"""
+import os
+import re
+import sys
+import ast
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+from db.mirror_manifest import MIRROR_COLUMNS, get_mirror_columns
+
+DEFAULT_PATHS = ["scripts", "db", "utils", "migrations"]
+
+SOURCE_RE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+\.)?(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+QUALIFIED_COLUMN_RE = re.compile(r"\b(\w+)\.(Z_?[A-Z0-9_]+)\b")
+BARE_COLUMN_RE = re.compile(r"(?<![\w.])(Z_?[A-Z0-9_]+)\b")
+SQL_KEYWORDS = {
+    "WHERE", "JOIN", "LEFT", "RIGHT", "INNER", "OUTER", "CROSS", "ON", "USING", "GROUP", "ORDER",
+    "LIMIT", "UNION", "SET", "AND", "OR", "NATURAL", "WINDOW", "HAVING", "VALUES", "EXCEPT", "INTERSECT",
+}
+
+
+def iter_sql_literals(path):
+    """Yields (lineno, text) for every string literal in a Python file; f-string holes become '?'."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            yield node.lineno, node.value
+        elif isinstance(node, ast.JoinedStr):
+            parts = [v.value if isinstance(v, ast.Constant) else "?" for v in node.values]
+            yield node.lineno, "".join(parts)
+
+
+def find_violations(sql):
+    """Returns sorted (table, column) pairs the SQL text reads from a mirror table but are not mirrored."""
+    sql = re.sub(r"--[^\n]*", "", sql)
+    aliases = {}
+    other_aliases = set()
+    mirror_sources = set()
+    all_sources = 0
+    for schema, table, alias in SOURCE_RE.findall(sql):
+        all_sources += 1
+        if alias.upper() in SQL_KEYWORDS:
+            alias = ""
+        is_mirror = table.upper() in MIRROR_COLUMNS and schema.lower() in ("", "main.")
+        for name in filter(None, {alias, table}):
+            if is_mirror:
+                aliases[name] = table.upper()
+            else:
+                other_aliases.add(name)
+        if is_mirror:
+            mirror_sources.add(table.upper())
+
+    violations = set()
+    for alias, column in QUALIFIED_COLUMN_RE.findall(sql):
+        # An alias reused for a photos_db source in the same statement is ambiguous; skip it
+        if alias in aliases and alias not in other_aliases:
+            table = aliases[alias]
+            if column not in get_mirror_columns(table):
+                violations.add((table, column))
+
+    # A single unaliased mirror source: bare Z* identifiers are its columns
+    if all_sources == 1 and len(mirror_sources) == 1:
+        table = next(iter(mirror_sources))
+        for column in BARE_COLUMN_RE.findall(sql):
+            if column not in MIRROR_COLUMNS and column not in get_mirror_columns(table):
+                violations.add((table, column))
+    return sorted(violations)
+
+
+def iter_python_files(paths):
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if d != "__pycache__"]
+            for name in sorted(files):
+                if name.endswith(".py"):
+                    yield os.path.join(root, name)
+
+
+def main(paths):
+    failures = 0
+    for path in iter_python_files(paths):
+        try:
+            literals = list(iter_sql_literals(path))
+        except SyntaxError as e:
+            print(f"⚠️ Skipping {os.path.relpath(path, project_root)}: {e}")
+            continue
+        for lineno, sql in literals:
+            for table, column in find_violations(sql):
+                failures += 1
+                print(f"❌ {os.path.relpath(path, project_root)}:{lineno}: {table}.{column} is not mirrored")
+
+    if failures:
+        print(f"\n{failures} reference(s) to unmirrored columns. Add them to db/mirror_manifest.py or read photos_db directly.")
+        return 1
+    print("✅ All mirror table queries use mirrored columns.")
+    return 0
+
+
+if __name__ == "__main__":
+    targets = sys.argv[1:] or [os.path.join(project_root, p) for p in DEFAULT_PATHS]
+    sys.exit(main(targets))
@@ -0,0 +1,247 @@
+"""
+EXPLAIN QUERY PLAN regression check for the hot queries in db/query_registry.py.
+
+Builds an in-memory copy of the Media Organizer schema (the tables below plus every CREATE
+INDEX the migrations, scripts and db/ modules issue, so ad hoc indexes count too) with an
+empty photos_db attached, reads each registered SQL literal from its source function and
+plans it. Exits with status 1 when a query does a full SCAN (or builds an automatic index)
+of a table in WATCHED_TABLES that its entry does not allow, or can no longer be found or
+planned.
+
+Usage: python scripts/utils/check_query_plans.py [-v]
+"""
+import os
+import re
+import sys
+import ast
+import sqlite3
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, project_root)
+from db.query_registry import HOT_QUERIES, WATCHED_TABLES
+from db.mirror_manifest import MIRROR_COLUMNS, get_mirror_columns, get_mirror_index_statements
+
+INDEX_SOURCE_PATHS = ["migrations", "scripts", "db"]
+
+# Columns the registered queries use; indexes come from the project's CREATE INDEX statements
+SYNTHETIC_SCHEMA = """
+    CREATE TABLE assets (
+        asset_id TEXT PRIMARY KEY, asset_pk INTEGER, original_filename TEXT, month TEXT,
+        MomentsAlbumName TEXT, date_created_utc TEXT, imported_date_utc TEXT, import_id TEXT,
+        aesthetic_score REAL, google_favorite INTEGER DEFAULT 0, apple_favorite INTEGER DEFAULT 0,
+        apple_photos_monthly_selection INTEGER DEFAULT 0, mobile_apple_photos_featured_photos INTEGER DEFAULT 0,
+        to_be_curated_album TEXT, curated_album TEXT, created_epoch INTEGER,
+        created_local_datetime TEXT, created_local_date TEXT, updated_at_utc TEXT
+    );
+    CREATE TABLE imports (
+        import_uuid TEXT, import_name TEXT, camera_make TEXT, camera_model TEXT, assets_count INTEGER,
+        min_filename TEXT, max_filename TEXT, min_date TEXT, max_date TEXT, months_detected TEXT,
+        min_created_epoch INTEGER, max_created_epoch INTEGER, status_code TEXT,
+        sequencing_confirmed INTEGER DEFAULT 0
+    );
+    CREATE TABLE ranked_assets (
+        asset_id TEXT PRIMARY KEY, original_filename TEXT, month TEXT, aesthetic_score REAL,
+        google_favorite INTEGER, apple_favorite INTEGER, apple_photos_monthly_selection INTEGER,
+        mobile_apple_photos_featured_photos INTEGER, score_normalized REAL, date_created_utc TEXT,
+        MomentsAlbumName TEXT
+    );
+    CREATE TABLE moment_exports (
+        asset_id TEXT, album_name TEXT, exported_at_utc TEXT, curation_stage TEXT DEFAULT 'to_be_curated',
+        PRIMARY KEY (asset_id, album_name)
+    );
+    CREATE TABLE publications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, asset_id TEXT NOT NULL, moment_name TEXT NOT NULL,
+        platform TEXT NOT NULL, published_at_utc TEXT NOT NULL
+    );
+    CREATE TABLE curated_moments (moment_name TEXT PRIMARY KEY, memory_stage TEXT DEFAULT 'M100');
+    CREATE TABLE month_batches (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, month TEXT, status_code TEXT, is_bypassed INTEGER DEFAULT 0
+    );
+    CREATE TABLE batch_status (
+        code TEXT PRIMARY KEY, preceding_code TEXT, short_label TEXT, full_description TEXT,
+        transition_type TEXT, script_name TEXT, pipeline_stage TEXT
+    );
+    CREATE TABLE import_months (
+        import_uuid TEXT NOT NULL, camera_model TEXT NOT NULL, month TEXT NOT NULL, asset_count INTEGER,
+        min_filename TEXT, max_filename TEXT, min_date TEXT, max_date TEXT,
+        PRIMARY KEY (import_uuid, camera_model, month)
+    );
+    CREATE TABLE threshold_history (id INTEGER PRIMARY KEY, threshold_score REAL);
+"""
+
+# Photos.sqlite tables (and their own indexes) the registered queries read through photos_db
+PHOTOS_SCHEMA = """
+    CREATE TABLE photos_db.ZASSET (Z_PK INTEGER PRIMARY KEY, ZUUID VARCHAR, ZMOMENT INTEGER, ZDATECREATED TIMESTAMP);
+    CREATE INDEX photos_db.ZASSET_ZUUID_INDEX ON ZASSET (ZUUID);
+    CREATE TABLE photos_db.ZMOMENT (Z_PK INTEGER PRIMARY KEY, ZTITLE VARCHAR, ZSUBTITLE VARCHAR);
+    CREATE TABLE photos_db.ZGENERICALBUM (
+        Z_PK INTEGER PRIMARY KEY, ZTITLE VARCHAR, ZKIND INTEGER, ZPARENTFOLDER INTEGER, ZTRASHEDSTATE INTEGER
+    );
+    CREATE TABLE photos_db.Z_30ASSETS (Z_30ALBUMS INTEGER, Z_3ASSETS INTEGER, PRIMARY KEY (Z_30ALBUMS, Z_3ASSETS));
+    CREATE INDEX photos_db.Z_30ASSETS_Z_3ASSETS_INDEX ON Z_30ASSETS (Z_3ASSETS, Z_30ALBUMS);
+    CREATE TABLE photos_db.ZADDITIONALASSETATTRIBUTES (Z_PK INTEGER PRIMARY KEY, ZASSET INTEGER, ZORIGINALFILENAME VARCHAR);
+    CREATE INDEX photos_db.ZADDITIONALASSETATTRIBUTES_ZASSET_INDEX ON ZADDITIONALASSETATTRIBUTES (ZASSET);
+"""
+
+CREATE_INDEX_RE = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:(\w+)\.)?\w+\s+ON\s+(\w+)\s*\([^;]*?\)",
+    re.IGNORECASE,
+)
+SOURCE_RE = re.compile(r"\b(?:FROM|JOIN)\s+(?:\w+\.)?(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+PLAN_SCAN_RE = re.compile(r"^(?:SCAN|SEARCH) (\w+)(.*)$")
+BINDINGS_RE = re.compile(r"uses (\d+), and there are")
+SQL_KEYWORDS = {
+    "WHERE", "JOIN", "LEFT", "RIGHT", "INNER", "OUTER", "CROSS", "ON", "USING", "GROUP", "ORDER",
+    "LIMIT", "UNION", "SET", "AND", "OR", "NATURAL", "WINDOW", "HAVING", "VALUES", "EXCEPT", "INTERSECT",
+}
+
+
+def iter_function_literals(path, function):
+    """Yields (lineno, text) for the string literals inside `function` (at any nesting); f-string holes become '?'."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == function:
+            f_string_parts = set()
+            for child in ast.walk(node):
+                if isinstance(child, ast.JoinedStr):
+                    f_string_parts.update(id(v) for v in child.values)
+                    yield child.lineno, "".join(v.value if isinstance(v, ast.Constant) else "?" for v in child.values)
+                elif isinstance(child, ast.Constant) and isinstance(child.value, str) and id(child) not in f_string_parts:
+                    yield child.lineno, child.value
+
+
+def find_query_sql(query):
+    """Returns (lineno, sql) of the registered literal; raises LookupError unless exactly one matches."""
+    matches = [
+        (lineno, text)
+        for lineno, text in iter_function_literals(os.path.join(project_root, query.path), query.function)
+        if all(s in text for s in query.contains) and not any(s in text for s in query.excludes)
+    ]
+    if len(matches) != 1:
+        raise LookupError(f"{len(matches)} SQL literals in {query.path}:{query.function}() match {query.contains}")
+    return matches[0]
+
+
+def iter_index_statements(tables, exclude=()):
+    """
+    Yields the CREATE INDEX statements in the project's sources that target one of `tables` in
+    main, skipping the project-relative source paths in `exclude`.
+    """
+    for base in INDEX_SOURCE_PATHS:
+        for root, dirs, files in os.walk(os.path.join(project_root, base)):
+            dirs[:] = [d for d in dirs if d != "__pycache__"]
+            for name in sorted(files):
+                if not name.endswith(".py") or os.path.relpath(os.path.join(root, name), project_root) in exclude:
+                    continue
+                try:
+                    with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+                        tree = ast.parse(f.read())
+                except SyntaxError:
+                    continue
+                for node in ast.walk(tree):
+                    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                        for m in CREATE_INDEX_RE.finditer(node.value):
+                            if m.group(1) in (None, "main") and m.group(2) in tables:
+                                yield m.group(0)
+    for table in MIRROR_COLUMNS:
+        if table in tables:
+            yield from get_mirror_index_statements(table)
+
+
+def build_synthetic_db(path=":memory:", exclude=()):
+    """Creates the synthetic schema in `path` without the indexes of the sources in `exclude`."""
+    conn = sqlite3.connect(path)
+    conn.executescript(SYNTHETIC_SCHEMA)
+    # Raw mirror tables the queries join, with their manifest columns
+    for table in MIRROR_COLUMNS:
+        column_defs = ", ".join(f"{c} INTEGER PRIMARY KEY" if c == "Z_PK" else c for c in get_mirror_columns(table))
+        conn.execute(f"CREATE TABLE {table} ({column_defs})")
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for statement in iter_index_statements(tables, exclude):
+        try:
+            conn.execute(statement)
+        except sqlite3.OperationalError as e:
+            # An index on a column the synthetic schema leaves out does not matter to these queries
+            if "no such column" not in str(e):
+                raise
+    conn.execute("ATTACH DATABASE ':memory:' AS photos_db")
+    conn.executescript(PHOTOS_SCHEMA)
+    return conn
+
+
+def source_tables(sql):
+    """Maps each table name and alias in the SQL text to the set of tables it may stand for."""
+    sources = {}
+    for table, alias in SOURCE_RE.findall(re.sub(r"--[^\n]*", "", sql)):
+        for name in filter(None, {table, "" if alias.upper() in SQL_KEYWORDS else alias}):
+            sources.setdefault(name, set()).add(table)
+    return sources
+
+
+def count_parameters(conn, sql):
+    """Returns the number of parameters `sql` takes, as reported by SQLite."""
+    try:
+        conn.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return 0
+    except sqlite3.ProgrammingError as e:
+        m = BINDINGS_RE.search(str(e))
+        if not m:
+            raise
+        return int(m.group(1))
+
+
+def explain(conn, sql):
+    """Returns the EXPLAIN QUERY PLAN detail lines of `sql`, binding NULL to every parameter."""
+    params = [None] * count_parameters(conn, sql)
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def find_full_scans(plan, sources, allowed):
+    """Returns the plan lines that read a watched table in full (SCAN or an automatic index)."""
+    regressions = []
+    for detail in plan:
+        m = PLAN_SCAN_RE.match(detail)
+        if not m:
+            continue
+        op, rest = detail.split(" ", 1)[0], m.group(2)
+        if op == "SEARCH" and "AUTOMATIC" not in rest:
+            continue
+        tables = sources.get(m.group(1), {m.group(1)})
+        if any(t in WATCHED_TABLES and t not in allowed for t in tables):
+            regressions.append(detail)
+    return regressions
+
+
+def main(verbose=False):
+    conn = build_synthetic_db()
+    failures = 0
+    for query in HOT_QUERIES:
+        try:
+            lineno, sql = find_query_sql(query)
+            plan = explain(conn, sql)
+        except (LookupError, sqlite3.Error) as e:
+            failures += 1
+            print(f"❌ {query.name}: {e}")
+            continue
+
+        regressions = find_full_scans(plan, source_tables(sql), query.allowed_scans)
+        location = f"{query.path}:{lineno}"
+        if regressions:
+            failures += 1
+            print(f"❌ {query.name} ({location}): {'; '.join(regressions)}")
+        else:
+            print(f"✅ {query.name} ({location})")
+        if verbose or regressions:
+            for detail in plan:
+                print(f"      {detail}")
+
+    if failures:
+        print(f"\n{failures} of {len(HOT_QUERIES)} hot queries regressed. Add an index or update db/query_registry.py.")
+        return 1
+    print(f"\n✅ All {len(HOT_QUERIES)} hot queries use indexes on {', '.join(WATCHED_TABLES)}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(verbose="-v" in sys.argv[1:]))
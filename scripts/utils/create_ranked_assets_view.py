@@ -1,10 +1,11 @@
-import sqlite3
 import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 from utils.logger import setup_logger
 from constants import MEDIA_ORGANIZER_DB_PATH as DB_PATH, LOG_PATH
+from db.connections import connect
+from db.ranked_assets import ensure_ranked_assets, create_ranked_assets_view
 
 MODULE_TAG = "create_ranked_view"
 logger = setup_logger(LOG_PATH,MODULE_TAG)
@@ -14,36 +15,12 @@ def create_view():
         logger.error(f"Database file not found at: {DB_PATH}")
         return
 
-    view_sql = """
-    DROP VIEW IF EXISTS ranked_assets_view;
-    CREATE VIEW ranked_assets_view AS
-    SELECT
-        a.asset_id,
-        a.original_filename,
-        a.month,
-        a.aesthetic_score,
-        a.google_favorite,
-        a.apple_favorite,
-        a.apple_photos_monthly_selection,
-        a.mobile_apple_photos_featured_photos,
-        (
-            (COALESCE(a.aesthetic_score, 0) * 0.875) + 
-            (a.google_favorite * 0.125) + 
-            (a.apple_photos_monthly_selection * 0.15) +
-            (a.mobile_apple_photos_featured_photos * 0.15)
-        ) AS score_normalized,
-        a.date_created_utc,
-        a.MomentsAlbumName
-    FROM
-        assets a
-    WHERE
-        a.ignore_continuity_check = 0 OR a.ignore_continuity_check IS NULL;
-    """
-
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect(DB_PATH)
         cursor = conn.cursor()
-        cursor.executescript(view_sql)
+        # Fills ranked_assets and its triggers if they are missing or use outdated weights
+        ensure_ranked_assets(cursor, logger)
+        create_ranked_assets_view(cursor)
         conn.commit()
         conn.close()
         logger.info("✅ ranked_assets_view created successfully.")
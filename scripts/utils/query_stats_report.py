@@ -0,0 +1,83 @@
+"""
+Ranks the statements recorded by the query instrumentation (db/query_stats.py) by total time,
+per script.
+
+Record stats by running any pipeline script with MEDIA_ORGANIZER_QUERY_STATS=1, e.g.
+    MEDIA_ORGANIZER_QUERY_STATS=1 python scripts/pipeline_planner.py
+then report on the query_stats table:
+    python scripts/utils/query_stats_report.py [--script pipeline_planner] [--top 15] [--runs 1]
+
+--runs N only counts each script's N most recent runs (default: all recorded runs).
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from db.connections import connect
+
+STATEMENT_WIDTH = 90
+
+
+def fetch_script_totals(cursor, script=None, runs=None):
+    """Returns {script: [(fingerprint, statement, calls, total_ms, max_ms, rows, vm_steps, runs), ...]} by total time."""
+    cursor.execute("""
+        WITH ranked_runs AS (
+            SELECT run_id,
+                   ROW_NUMBER() OVER (PARTITION BY script ORDER BY MAX(recorded_at_utc) DESC) AS recency
+            FROM query_stats
+            GROUP BY script, run_id
+        )
+        SELECT script, fingerprint, MAX(statement), SUM(calls), SUM(total_ms), MAX(max_ms),
+               SUM(rows), SUM(vm_steps), COUNT(DISTINCT run_id)
+        FROM query_stats
+        WHERE run_id IN (SELECT run_id FROM ranked_runs WHERE :runs IS NULL OR recency <= :runs)
+          AND (:script IS NULL OR script = :script)
+        GROUP BY script, fingerprint
+        ORDER BY script, SUM(total_ms) DESC
+    """, {"runs": runs, "script": script})
+    totals = {}
+    for script_name, *row in cursor.fetchall():
+        totals.setdefault(script_name, []).append(tuple(row))
+    return totals
+
+
+def print_report(totals, top):
+    if not totals:
+        print("ℹ️ No query stats recorded. Run a script with MEDIA_ORGANIZER_QUERY_STATS=1 first.")
+        return
+    for script, rows in totals.items():
+        script_ms = sum(r[3] for r in rows)
+        print(f"\n📊 {script}: {len(rows)} statements, {script_ms / 1000:.1f} s in SQLite over {max(r[7] for r in rows)} run(s)")
+        print(f"{'#':>3} {'total ms':>11} {'share':>6} {'calls':>8} {'avg ms':>9} {'max ms':>9} {'rows':>10}  statement")
+        print("-" * (63 + STATEMENT_WIDTH))
+        for rank, (fingerprint, statement, calls, total_ms, max_ms, row_count, _, _) in enumerate(rows[:top], start=1):
+            share = total_ms / script_ms * 100 if script_ms else 0
+            text = statement if len(statement) <= STATEMENT_WIDTH else statement[:STATEMENT_WIDTH - 3] + "..."
+            print(f"{rank:>3} {total_ms:>11,.1f} {share:>5.1f}% {calls:>8,} {total_ms / calls:>9.2f} {max_ms:>9.1f} {row_count:>10,}  {text}")
+        if len(rows) > top:
+            print(f"    ... {len(rows) - top} more statements")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank recorded SQLite statements by total time per script.")
+    parser.add_argument("--script", help="Only report this script (e.g. pipeline_planner)")
+    parser.add_argument("--top", type=int, default=15, help="Statements to list per script")
+    parser.add_argument("--runs", type=int, help="Only count each script's N most recent runs")
+    args = parser.parse_args()
+
+    conn = connect(read_only=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'query_stats'")
+        if not cursor.fetchone():
+            print("⚠️ query_stats table not found. Apply migration 053 first.")
+            sys.exit(1)
+        print_report(fetch_script_totals(cursor, args.script, args.runs), args.top)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from datetime import datetime
 from collections import defaultdict
 from utils import setup_logger
-from constants import STAGING_ROOT, LOG_PATH, MEDIA_ORGANIZER_DB_PATH
-import sqlite3
+from constants import STAGING_ROOT, LOG_PATH
+from db.connections import connect
 from db.queries import get_next_batch  # Assumes such utility exists
 
 MODULE_TAG = 'verify_staging'
@@ -53,7 +53,7 @@ def main():
         sys.exit(1)
 
     # Fetch latest batch from DB with status = 'exported' or equivalent
-    conn = sqlite3.connect(MEDIA_ORGANIZER_DB_PATH)
+    conn = connect(read_only=True)
     cursor = conn.cursor()
     batch_month = get_next_batch(cursor)
     conn.close()
@@ -0,0 +1,54 @@
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.db_fingerprint import compute_fingerprint, describe_fingerprint_change
+
+
+class DescribeFingerprintChangeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "Photos.sqlite")
+        # Stands in for Photos: keeps the WAL open and checkpoints only when asked
+        self.conn = sqlite3.connect(self.db_path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA wal_autocheckpoint=0")
+        self.conn.executescript("""
+            CREATE TABLE Z_PRIMARYKEY (Z_ENT INTEGER PRIMARY KEY, Z_NAME VARCHAR, Z_MAX INTEGER);
+            INSERT INTO Z_PRIMARYKEY VALUES (1, 'Asset', 1);
+            CREATE TABLE ZASSET (Z_PK INTEGER PRIMARY KEY, ZFAVORITE INTEGER);
+            INSERT INTO ZASSET VALUES (1, 0);
+        """)
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_unchanged_database(self):
+        previous = compute_fingerprint(self.db_path)
+        self.assertIsNone(describe_fingerprint_change(previous, compute_fingerprint(self.db_path)))
+
+    def test_touch_is_not_a_change(self):
+        previous = compute_fingerprint(self.db_path)
+        st = os.stat(self.db_path)
+        os.utime(self.db_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertIsNone(describe_fingerprint_change(previous, compute_fingerprint(self.db_path)))
+
+    def test_update_checkpointed_before_next_fingerprint(self):
+        previous = compute_fingerprint(self.db_path)
+        self.assertTrue(previous["wal"]["committed_frames"])
+        # No new primary key is issued, and the WAL is emptied before the next fingerprint
+        self.conn.execute("UPDATE ZASSET SET ZFAVORITE = 1 WHERE Z_PK = 1")
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        current = compute_fingerprint(self.db_path)
+        self.assertEqual(previous["change_counter"], current["change_counter"])
+        self.assertEqual(previous["primary_keys"], current["primary_keys"])
+        self.assertIsNotNone(describe_fingerprint_change(previous, current))
+
+
+if __name__ == "__main__":
+    unittest.main()
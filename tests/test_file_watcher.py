@@ -0,0 +1,119 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from utils.file_watcher import InotifyWatcher, PollingWatcher, WatcherUnavailable, wait_for_quiet
+
+
+def append(path, data=b"x"):
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+class WatcherTestMixin:
+    """Runs against a fake Photos.sqlite (and its -wal) in a scratch directory."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "Photos.sqlite")
+        append(self.db_path, b"SQLite format 3\0")
+        self.watcher = self.create_watcher([self.db_path, self.db_path + "-wal"])
+
+    def tearDown(self):
+        self.watcher.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_times_out_without_changes(self):
+        start = time.monotonic()
+        self.assertFalse(self.watcher.wait(0.3))
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+
+    def test_reports_write_to_source(self):
+        append(self.db_path)
+        self.assertTrue(self.watcher.wait(2))
+
+    def test_reports_wal_creation(self):
+        append(self.db_path + "-wal")
+        self.assertTrue(self.watcher.wait(2))
+
+    def test_ignores_other_files(self):
+        append(os.path.join(self.tmp_dir, "Photos.sqlite.lastcopy"))
+        self.assertFalse(self.watcher.wait(0.3))
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is only available on Linux")
+class InotifyWatcherTest(WatcherTestMixin, unittest.TestCase):
+    def create_watcher(self, paths):
+        return InotifyWatcher(paths)
+
+    def test_removed_directory_makes_watcher_unavailable(self):
+        shutil.rmtree(self.tmp_dir)
+        with self.assertRaises(WatcherUnavailable):
+            self.watcher.wait(2)
+
+
+class PollingWatcherTest(WatcherTestMixin, unittest.TestCase):
+    def create_watcher(self, paths):
+        return PollingWatcher(paths, poll_interval=0.05)
+
+
+class ScriptedWatcher:
+    """Reports a change after each delay in `event_delays`, then stays quiet."""
+
+    def __init__(self, event_delays):
+        self._event_delays = list(event_delays)
+
+    def wait(self, timeout):
+        if self._event_delays and self._event_delays[0] <= timeout:
+            time.sleep(self._event_delays.pop(0))
+            return True
+        time.sleep(timeout)
+        return False
+
+
+class WaitForQuietTest(unittest.TestCase):
+    def test_burst_coalesces_into_one_refresh(self):
+        watcher = ScriptedWatcher([0.02] * 5)
+        start = time.monotonic()
+        self.assertEqual(wait_for_quiet(watcher, debounce=0.2, max_latency=5), 5)
+        # Returns one debounce window after the last event, not after max_latency
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_returns_after_debounce_when_quiet(self):
+        self.assertEqual(wait_for_quiet(ScriptedWatcher([]), debounce=0.1, max_latency=5), 0)
+
+    def test_max_latency_caps_a_continuous_burst(self):
+        watcher = ScriptedWatcher([0.05] * 100)
+        start = time.monotonic()
+        absorbed = wait_for_quiet(watcher, debounce=0.2, max_latency=0.5)
+        self.assertLess(time.monotonic() - start, 0.8)
+        self.assertLess(absorbed, 100)
+
+    def test_coalesces_writes_to_a_polled_file(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        db_path = os.path.join(tmp_dir, "Photos.sqlite")
+        append(db_path)
+        watcher = PollingWatcher([db_path], poll_interval=0.02)
+
+        def writer():
+            for _ in range(5):
+                append(db_path)
+                time.sleep(0.05)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        self.assertTrue(watcher.wait(2))
+        absorbed = wait_for_quiet(watcher, debounce=0.3, max_latency=5)
+        thread.join()
+        self.assertGreaterEqual(absorbed, 1)
+        self.assertFalse(watcher.wait(0.2))
+
+
+if __name__ == "__main__":
+    unittest.main()
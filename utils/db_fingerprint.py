@@ -0,0 +1,159 @@
+"""
+Content fingerprint of the Apple Photos SQLite database.
+
+File mtimes move on no-op touches and are coarse on exFAT, so change detection reads what
+SQLite and Core Data record about the logical content instead:
+
+- the file change counter of page 1, taken from the newest committed WAL copy of the page
+  when there is one,
+- the WAL header salts and the number of committed frames (new WAL transactions),
+- the Core Data Z_PRIMARYKEY.Z_MAX values (highest primary key issued per entity),
+- the size of the main file.
+
+In WAL mode the change counter does not move, so an UPDATE that issues no new primary key and
+is checkpointed before the next fingerprint only shows up as committed WAL frames that are gone.
+The mtime is deliberately left out for the reasons above.
+"""
+import os
+import json
+import sqlite3
+from urllib.parse import quote
+
+SQLITE_HEADER_MAGIC = b"SQLite format 3\x00"
+
+
+def read_header_change_counter(db_path):
+    with open(db_path, "rb") as f:
+        header = f.read(100)
+    if len(header) < 100 or not header.startswith(SQLITE_HEADER_MAGIC):
+        raise ValueError(f"Not a SQLite database: {db_path}")
+    return int.from_bytes(header[24:28], "big")
+
+
+def read_wal_state(wal_path):
+    """
+    Returns the WAL salts, checkpoint sequence, number of committed frames and the change
+    counter of the newest committed copy of page 1, or None when there is no WAL. Frames after
+    the last commit frame belong to an open transaction and frames with stale salts are left
+    over from before the last WAL reset; neither is counted.
+    """
+    if not os.path.exists(wal_path):
+        return None
+    with open(wal_path, "rb") as f:
+        header = f.read(32)
+        if len(header) < 32:
+            return None
+        page_size = int.from_bytes(header[8:12], "big")
+        salt = header[16:24]
+        frames = 0
+        committed_frames = 0
+        page1_counter = None
+        committed_page1_counter = None
+        while True:
+            frame_header = f.read(24)
+            if len(frame_header) < 24 or frame_header[8:16] != salt:
+                break
+            frames += 1
+            if int.from_bytes(frame_header[0:4], "big") == 1:
+                page_header = f.read(28)
+                page1_counter = int.from_bytes(page_header[24:28], "big")
+                f.seek(page_size - len(page_header), os.SEEK_CUR)
+            else:
+                f.seek(page_size, os.SEEK_CUR)
+            # A non-zero "database size after commit" marks the last frame of a transaction
+            if int.from_bytes(frame_header[4:8], "big"):
+                committed_frames = frames
+                committed_page1_counter = page1_counter
+    return {
+        "salt": salt.hex(),
+        "checkpoint_seq": int.from_bytes(header[12:16], "big"),
+        "committed_frames": committed_frames,
+        "page1_change_counter": committed_page1_counter,
+    }
+
+
+def read_primary_key_maxima(db_path):
+    conn = sqlite3.connect(f"file:{quote(db_path)}?mode=ro", uri=True, timeout=5)
+    try:
+        has_table = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Z_PRIMARYKEY'"
+        ).fetchone()
+        if not has_table:
+            return {}
+        rows = conn.execute("SELECT Z_NAME, Z_MAX FROM Z_PRIMARYKEY ORDER BY Z_ENT").fetchall()
+    finally:
+        conn.close()
+    return {name: max_pk for name, max_pk in rows}
+
+
+def compute_fingerprint(db_path):
+    """
+    Builds the fingerprint dict for db_path. The Z_PRIMARYKEY part is None when the
+    database cannot be opened (e.g. busy); the file-level parts are always present.
+    """
+    try:
+        primary_keys = read_primary_key_maxima(db_path)
+    except sqlite3.Error:
+        primary_keys = None
+    wal = read_wal_state(db_path + "-wal")
+    change_counter = (wal or {}).get("page1_change_counter")
+    if change_counter is None:
+        change_counter = read_header_change_counter(db_path)
+    st = os.stat(db_path)
+    return {
+        "change_counter": change_counter,
+        "file_size": st.st_size,
+        "wal": wal,
+        "primary_keys": primary_keys,
+    }
+
+
+def describe_fingerprint_change(previous, current):
+    """
+    Compares two fingerprints and returns a human readable reason when the content changed,
+    or None when it did not.
+    """
+    if not previous:
+        return "No fingerprint recorded for the last refresh."
+    if previous.get("change_counter") != current.get("change_counter"):
+        return f"Header change counter moved ({previous.get('change_counter')} → {current.get('change_counter')})."
+    prev_wal = previous.get("wal") or {}
+    curr_wal = current.get("wal") or {}
+    prev_frames = prev_wal.get("committed_frames", 0)
+    curr_frames = curr_wal.get("committed_frames", 0)
+    if curr_frames:
+        if curr_wal.get("salt") != prev_wal.get("salt"):
+            return f"WAL was restarted and has {curr_frames} new committed frames."
+        if curr_frames != prev_frames:
+            return f"WAL has new commits ({prev_frames} → {curr_frames} committed frames)."
+    elif prev_frames:
+        # Commits appended after the last fingerprint may have been checkpointed with the rest
+        return f"WAL was checkpointed ({prev_frames} committed frames no longer in the WAL)."
+    if previous.get("file_size") != current.get("file_size"):
+        return f"Main database file size changed ({previous.get('file_size')} → {current.get('file_size')} bytes)."
+    prev_keys = previous.get("primary_keys")
+    curr_keys = current.get("primary_keys")
+    if prev_keys is None or curr_keys is None:
+        # Without Core Data keys on both sides we cannot rule out a change
+        return "Core Data primary key counters unavailable."
+    changed = sorted(name for name in set(prev_keys) | set(curr_keys) if prev_keys.get(name) != curr_keys.get(name))
+    if changed:
+        return f"New Core Data rows in: {', '.join(changed[:5])}{'...' if len(changed) > 5 else ''}."
+    return None
+
+
+def load_fingerprint(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_fingerprint(path, fingerprint):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(fingerprint, f, indent=2)
+    os.replace(tmp_path, path)
@@ -0,0 +1,173 @@
+"""
+Change watchers for the Apple Photos database files.
+
+InotifyWatcher watches the directory holding the database (so WAL creation, deletion and
+file replacement are seen) through the Linux inotify API via ctypes. PollingWatcher is the
+portable fallback that compares stat signatures. Both expose the same wait(timeout) call,
+and wait_for_quiet() layers the debounce window on top of either.
+"""
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class WatcherUnavailable(Exception):
+    pass
+
+
+class InotifyWatcher:
+    backend = "inotify"
+
+    def __init__(self, paths):
+        if not sys.platform.startswith("linux"):
+            raise WatcherUnavailable("inotify is only available on Linux")
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        try:
+            self._libc = ctypes.CDLL(libc_name, use_errno=True)
+            self._libc.inotify_init1
+        except (OSError, AttributeError) as e:
+            raise WatcherUnavailable(f"inotify is not available: {e}")
+
+        self._names = {os.path.basename(p) for p in paths}
+        self._directories = {os.path.dirname(os.path.abspath(p)) for p in paths}
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise WatcherUnavailable(f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+        for directory in self._directories:
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                os.close(self._fd)
+                raise WatcherUnavailable(f"Cannot watch {directory}: {os.strerror(err)}")
+
+    def wait(self, timeout):
+        """
+        Blocks until one of the watched files changes or timeout seconds pass.
+        Returns True on a change. Raises WatcherUnavailable if the watched directory went away.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                return False
+            if self._drain():
+                return True
+
+    def _drain(self):
+        changed = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return changed
+                raise
+            offset = 0
+            while offset < len(data):
+                _, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b"\0").decode(errors="replace")
+                offset += name_len
+                if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                    raise WatcherUnavailable("Watched directory was removed or unmounted")
+                if mask & IN_Q_OVERFLOW or name in self._names:
+                    changed = True
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class PollingWatcher:
+    backend = "polling"
+
+    def __init__(self, paths, poll_interval):
+        self._paths = list(paths)
+        self._poll_interval = poll_interval
+        self._signature = self._snapshot()
+
+    def _snapshot(self):
+        signature = []
+        for path in self._paths:
+            try:
+                st = os.stat(path)
+                signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self._snapshot()
+            if current != self._signature:
+                self._signature = current
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self._poll_interval, remaining))
+
+    def close(self):
+        pass
+
+
+def create_watcher(paths, backend="auto", poll_interval=5, logger=None):
+    """
+    Returns an InotifyWatcher when backend is "auto" or "inotify" and inotify works here,
+    otherwise a PollingWatcher. Forcing "inotify" raises WatcherUnavailable instead of falling back.
+    """
+    if backend in ("auto", "inotify"):
+        try:
+            return InotifyWatcher(paths)
+        except WatcherUnavailable as e:
+            if backend == "inotify":
+                raise
+            if logger:
+                logger.info(f"ℹ️ {e}. Falling back to polling every {poll_interval}s.")
+    return PollingWatcher(paths, poll_interval)
+
+
+def wait_for_quiet(watcher, debounce, max_latency):
+    """
+    Called after a first change event. Waits until the files have been quiet for `debounce`
+    seconds so a burst of WAL writes coalesces into one refresh, but never longer than
+    `max_latency` seconds after the first event. Returns the number of extra events absorbed.
+    """
+    first_event = time.monotonic()
+    absorbed = 0
+    while True:
+        remaining = max_latency - (time.monotonic() - first_event)
+        if remaining <= 0:
+            return absorbed
+        if not watcher.wait(min(debounce, remaining)):
+            return absorbed
+        absorbed += 1
@@ -0,0 +1,187 @@
+"""
+Reader/writer lock guarding the Apple Photos DB copy and the metadata refreshed from it.
+
+The lock is an fcntl.flock advisory lock on APPLE_PHOTOS_DB_LOCK_PATH. Shared holders (planner
+sessions) run concurrently; an exclusive holder (background refresh, executor, uploader) runs
+alone. The OS drops a lock when its holder exits or crashes, so there is no stale-PID handling.
+The executor and uploader take it through acquire_db_lock()/release_db_lock().
+Planner phases that write to the Media Organizer DB also take a separate planner write lock
+exclusively, so planners read side by side but only one of them writes at a time.
+
+Who holds the exclusive lock and the time of the last successful refresh are kept in a separate
+JSON state file that is only rewritten atomically by the exclusive holder. It is informational:
+the flock is the source of truth.
+"""
+import os
+import json
+import time
+import fcntl
+import socket
+from datetime import datetime, timezone
+
+SHARED = "shared"
+EXCLUSIVE = "exclusive"
+
+# Retry backoff while waiting for a lock (seconds)
+_MIN_BACKOFF = 0.005
+_MAX_BACKOFF = 0.05
+
+
+class LockTimeout(Exception):
+    pass
+
+
+def _utc_now_str():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class DbLock:
+    def __init__(self, lock_path, state_path):
+        self.lock_path = lock_path
+        self.state_path = state_path
+        self._fd = None
+        self.mode = None
+
+    def acquire(self, mode, role, timeout=None, on_wait=None):
+        """
+        Takes the lock in SHARED or EXCLUSIVE mode, waiting up to `timeout` seconds (None waits
+        forever, 0 does not wait). `on_wait(state)` is called once if the caller has to wait.
+        Re-acquiring the mode already held is a no-op. Raises LockTimeout on timeout.
+        """
+        if self.mode == mode:
+            return
+        if self._fd is None:
+            self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+
+        operation = fcntl.LOCK_SH if mode == SHARED else fcntl.LOCK_EX
+        deadline = None if timeout is None else time.monotonic() + timeout
+        backoff = _MIN_BACKOFF
+        waited = False
+        while True:
+            try:
+                fcntl.flock(self._fd, operation | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                pass
+            if not waited:
+                waited = True
+                if on_wait:
+                    on_wait(self.read_state())
+            if deadline is not None and time.monotonic() >= deadline:
+                if self.mode is None:
+                    self._close()
+                raise LockTimeout(f"Timed out waiting for {mode} lock on {self.lock_path}")
+            sleep_for = backoff if deadline is None else min(backoff, max(deadline - time.monotonic(), 0))
+            time.sleep(sleep_for)
+            backoff = min(backoff * 2, _MAX_BACKOFF)
+
+        self.mode = mode
+        if mode == EXCLUSIVE:
+            self.write_state(status=role, pid=os.getpid(), started_at=_utc_now_str())
+
+    def release(self):
+        if self.mode is None:
+            return
+        if self.mode == EXCLUSIVE:
+            self.write_state(status="available", pid=None, started_at=None)
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self.mode = None
+        self._close()
+
+    def _close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def read_state(self):
+        state = None
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            pass
+        if state is None:
+            # Before the flock manager, the lock file itself held the JSON state
+            try:
+                with open(self.lock_path, "r") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                state = {}
+        state.setdefault("status", "available")
+        state.setdefault("latest_successful_refresh_utc", "—")
+        return state
+
+    def write_state(self, **fields):
+        """Updates the state file atomically. Only call while holding the exclusive lock."""
+        state = self.read_state()
+        state.update(fields)
+        state["host"] = socket.gethostname()
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def record_successful_refresh(self):
+        self.write_state(latest_successful_refresh_utc=_utc_now_str())
+
+
+_db_lock = None
+_planner_write_lock = None
+
+
+def get_db_lock():
+    """Returns the process-wide lock object (one flock file descriptor per process)."""
+    global _db_lock
+    if _db_lock is None:
+        from constants import APPLE_PHOTOS_DB_LOCK_PATH, APPLE_PHOTOS_DB_LOCK_STATE_PATH
+        _db_lock = DbLock(APPLE_PHOTOS_DB_LOCK_PATH, APPLE_PHOTOS_DB_LOCK_STATE_PATH)
+    return _db_lock
+
+
+def get_planner_write_lock():
+    """Returns the process-wide planner write lock, only ever taken EXCLUSIVE."""
+    global _planner_write_lock
+    if _planner_write_lock is None:
+        from constants import APPLE_PHOTOS_DB_PLANNER_LOCK_PATH, APPLE_PHOTOS_DB_PLANNER_LOCK_STATE_PATH
+        _planner_write_lock = DbLock(APPLE_PHOTOS_DB_PLANNER_LOCK_PATH, APPLE_PHOTOS_DB_PLANNER_LOCK_STATE_PATH)
+    return _planner_write_lock
+
+
+def acquire_db_lock(holder, logger, timeout=None):
+    """
+    Takes the DB lock EXCLUSIVE for a writer script (`holder`, e.g. "executor"), waiting up to
+    `timeout` seconds (default DB_LOCK_WAIT_TIMEOUT_SECONDS) for the background refresh and
+    planner sessions. A no-op while the lock is already held exclusively. Raises LockTimeout,
+    or OSError when the lock file cannot be opened, so the caller never writes without the lock.
+    """
+    db_lock = get_db_lock()
+    if db_lock.mode == EXCLUSIVE:
+        return
+    if timeout is None:
+        from constants import DB_LOCK_WAIT_TIMEOUT_SECONDS
+        timeout = DB_LOCK_WAIT_TIMEOUT_SECONDS
+    try:
+        db_lock.acquire(
+            EXCLUSIVE, f"{holder}_active", timeout=timeout,
+            on_wait=lambda state: logger.info(f"ℹ️ Database copy is currently locked by {describe_holder(state)}. Waiting for lock release...")
+        )
+    except LockTimeout:
+        logger.error(f"❌ Database lock still held after {timeout}s; {holder} cannot continue.")
+        raise
+    except OSError as e:
+        logger.error(f"❌ Cannot open lock file {db_lock.lock_path}: {e}")
+        raise
+    logger.info(f"🔐 Acquired {holder} database lock (PID: {os.getpid()}).")
+
+
+def release_db_lock(holder, logger):
+    db_lock = get_db_lock()
+    if db_lock.mode == EXCLUSIVE:
+        logger.info(f"🔓 Releasing {holder} database lock.")
+        db_lock.release()
+
+
+def describe_holder(state):
+    if state.get("status") not in (None, "available") and state.get("pid"):
+        return f"{state['status']} (PID: {state['pid']})"
+    return "active planner session(s)"
@@ -0,0 +1,93 @@
+"""
+Time dimensions of Core Data timestamps (seconds since 2001-01-01 UTC), pinned to one zone.
+
+SQLite's 'localtime' modifier converts with whatever zone the current process runs in, per
+row and per query. Derived sync instead converts each timestamp once, in PIPELINE_TIMEZONE,
+and stores the results on assets and imports (created_epoch, created_local_datetime,
+created_local_date and month), so readers filter and group on indexed columns.
+"""
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+CORE_DATA_EPOCH_OFFSET = 978307200
+
+_pipeline_tz = None
+
+
+def get_pipeline_timezone():
+    """Returns the pinned zone: PIPELINE_TIMEZONE, or the machine's zone when it is not set."""
+    global _pipeline_tz
+    if _pipeline_tz is None:
+        from constants import PIPELINE_TIMEZONE
+        if PIPELINE_TIMEZONE:
+            _pipeline_tz = ZoneInfo(PIPELINE_TIMEZONE)
+        else:
+            import tzlocal
+            _pipeline_tz = ZoneInfo(tzlocal.get_localzone_name())
+    return _pipeline_tz
+
+
+def _to_local(core_data_seconds):
+    if core_data_seconds is None:
+        return None
+    try:
+        return datetime.fromtimestamp(core_data_seconds + CORE_DATA_EPOCH_OFFSET, get_pipeline_timezone())
+    except (OverflowError, OSError, ValueError):
+        # Placeholder dates far outside the supported range
+        return None
+
+
+def unix_epoch(core_data_seconds):
+    if core_data_seconds is None:
+        return None
+    return int((core_data_seconds + CORE_DATA_EPOCH_OFFSET) // 1)
+
+
+def local_datetime(core_data_seconds):
+    dt = _to_local(core_data_seconds)
+    return dt.strftime("%Y-%m-%d %H:%M:%S") if dt else None
+
+
+def local_date(core_data_seconds):
+    dt = _to_local(core_data_seconds)
+    return dt.strftime("%Y-%m-%d") if dt else None
+
+
+def local_month(core_data_seconds):
+    dt = _to_local(core_data_seconds)
+    return dt.strftime("%Y-%m") if dt else None
+
+
+def register_time_functions(conn):
+    """
+    Registers cd_unix_epoch(), cd_local_datetime(), cd_local_date() and cd_local_month() on
+    `conn`, each taking a Core Data timestamp such as ZASSET.ZDATECREATED.
+    """
+    for name, func in (
+        ("cd_unix_epoch", unix_epoch),
+        ("cd_local_datetime", local_datetime),
+        ("cd_local_date", local_date),
+        ("cd_local_month", local_month),
+    ):
+        conn.create_function(name, 1, func, deterministic=True)
+
+
+def shift_month(month, delta):
+    """'YYYY-MM' moved by `delta` months."""
+    year, mon = map(int, month.split("-"))
+    index = year * 12 + (mon - 1) + delta
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def local_month_core_data_bounds(month):
+    """
+    [start, end) of the pinned-zone calendar month 'YYYY-MM' as Core Data timestamps, for
+    index range scans on raw ZDATECREATED columns.
+    """
+    tz = get_pipeline_timezone()
+    bounds = []
+    for m in (month, shift_month(month, 1)):
+        year, mon = map(int, m.split("-"))
+        start = datetime(year, mon, 1, tzinfo=tz).astimezone(timezone.utc)
+        bounds.append((start - datetime(2001, 1, 1, tzinfo=timezone.utc)) / timedelta(seconds=1))
+    return tuple(bounds)
@@ -1,4 +1,6 @@
+import sys
 import sqlite3
+import resource
 
 def human_readable_size(size_bytes):
     if size_bytes == 0:
@@ -11,6 +13,11 @@ def human_readable_size(size_bytes):
         i += 1
     return f"{size_bytes:.2f}{size_name[i]}"
 
+def get_peak_rss_bytes():
+    """Peak resident set size of this process so far (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
 def set_batch_status(cursor, month, current_code, success=True, session_id=None):
     """Update the batch status for the given month based on the outcome of a step."""
     try: